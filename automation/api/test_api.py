@@ -7,6 +7,7 @@ Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
 Testes automatizados para a API REST do dashboard.
 """
 
+import os
 import pytest
 import requests
 import json
@@ -152,6 +153,34 @@ class TestAPIEndpoints:
         else:
             pytest.skip("Nenhuma execução encontrada para teste")
     
+    def test_endpoint_registrar_resultados(self, api_base_url, headers):
+        """Testa ingestão de resultados em lote"""
+        response = requests.get(f"{api_base_url}/execucoes", headers=headers)
+        assert response.status_code == 200
+        
+        execucoes = response.json()
+        if not execucoes:
+            pytest.skip("Nenhuma execução encontrada para teste")
+        
+        payload = [
+            {'nome_teste': f'test_lote_{i}', 'status': 'passou', 'tempo_execucao': 0.1}
+            for i in range(50)
+        ]
+        response = requests.post(
+            f"{api_base_url}/execucoes/{execucoes[0]['id']}/resultados",
+            headers=headers,
+            json=payload
+        )
+        assert response.status_code == 201
+        
+        data = response.json()
+        assert data['inseridos'] == 50
+        assert data['rejeitados'] == 0
+    
+    @pytest.mark.skipif(
+        os.environ.get('QA_DASHBOARD_EXECUCAO_ID') is not None,
+        reason='Suíte executada pelo próprio dashboard: não disparar execuções recursivas'
+    )
     def test_endpoint_executar_testes(self, api_base_url, headers):
         """Testa endpoint de execução de testes"""
         payload = {
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Benchmark de Concorrência no Banco
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Mede a vazão de leitura da API enquanto escritores ingerem resultados no
+mesmo banco SQLite. Roda duas vezes sobre bancos temporários: com os pragmas
+padrão do SQLite (journal DELETE, synchronous FULL, cache de 2 MB, sem mmap)
+e com os pragmas ajustados de banco.py (WAL, synchronous NORMAL, cache e
+mmap maiores). Reporta leituras/s, latência p95 das leituras, resultados
+gravados/s e erros (`database is locked`) de cada configuração.
+
+Leitores e escritores são processos separados (como workers do gunicorn),
+para que a disputa medida seja a do lock do banco e não a do GIL.
+
+Uso: python benchmark_concorrencia_banco.py --leitores 8 --escritores 2 --duracao 15
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend')))
+
+from app import criar_aplicacao
+from models import db, ExecucaoTeste
+
+CONFIGURACOES = {
+    'padrão SQLite': {
+        'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_CACHE_KB': 2000, 'SQLITE_MMAP_MB': 0
+    },
+    'ajustado (WAL)': {}
+}
+
+def percentil(valores, fracao):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+def criar_app(config):
+    return criar_aplicacao({**config, 'AMOSTRADOR_ATIVO': False, 'EXECUTOR_ATIVO': False})
+
+def aguardar(inicio):
+    time.sleep(max(0, inicio - time.time()))
+
+def escritor(config, inicio, fim, resultados_por_lote, fila):
+    app = criar_app(config)
+    cliente = app.test_client()
+    gravados = erros = 0
+    aguardar(inicio)
+    while time.time() < fim:
+        try:
+            with app.app_context():
+                execucao = ExecucaoTeste(tipo='api', status='sucesso', duracao=60, ambiente='homologacao')
+                db.session.add(execucao)
+                db.session.commit()
+                execucao_id = execucao.id
+            resposta = cliente.post(f'/api/execucoes/{execucao_id}/resultados', json=[
+                {'nome_teste': f'test_concorrencia_{indice % 200}', 'status': 'falhou' if indice % 20 == 0 else 'passou',
+                 'tempo_execucao': 0.1 + indice % 7, 'mensagem_erro': 'Timeout após 30s' if indice % 20 == 0 else None}
+                for indice in range(resultados_por_lote)
+            ])
+            if resposta.status_code == 201:
+                gravados += resposta.get_json()['inseridos']
+            else:
+                erros += 1
+        except Exception:
+            erros += 1
+    fila.put({'gravados': gravados, 'erros_escrita': erros})
+
+def leitor(config, inicio, fim, fila):
+    cliente = criar_app(config).test_client()
+    latencias = []
+    erros = 0
+    aguardar(inicio)
+    while time.time() < fim:
+        inicio = time.perf_counter()
+        resposta = cliente.get('/api/execucoes?limite=50')
+        if resposta.status_code == 200 and resposta.get_json():
+            execucao_id = resposta.get_json()[0]['id']
+            resposta = cliente.get(f'/api/execucoes/{execucao_id}/resultados?limite=100')
+        if resposta.status_code == 200:
+            latencias.append(time.perf_counter() - inicio)
+        else:
+            erros += 1
+    fila.put({'latencias': latencias, 'erros_leitura': erros})
+
+def executar_configuracao(diretorio, nome, pragmas, leitores, escritores, duracao, resultados_por_lote):
+    caminho = os.path.join(diretorio, f'{len(os.listdir(diretorio))}.db')
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'ARTEFATOS_DIR': os.path.join(diretorio, 'artefatos'),
+        'ARQUIVAMENTO_DIR': os.path.join(diretorio, 'arquivo'),
+        **pragmas
+    }
+    # Cria o esquema e os dados de exemplo antes de iniciar os processos
+    app = criar_app(config)
+    with app.app_context():
+        db.engine.dispose()
+    
+    fila = multiprocessing.Queue()
+    # Todos começam juntos, depois de cada processo importar o backend
+    inicio = time.time() + 5
+    fim = inicio + duracao
+    processos = [multiprocessing.Process(target=escritor, args=(config, inicio, fim, resultados_por_lote, fila))
+                 for _ in range(escritores)]
+    processos += [multiprocessing.Process(target=leitor, args=(config, inicio, fim, fila)) for _ in range(leitores)]
+    for processo in processos:
+        processo.start()
+    contadores = {'gravados': 0, 'erros_escrita': 0, 'latencias': [], 'erros_leitura': 0}
+    for _ in processos:
+        for chave, valor in fila.get().items():
+            contadores[chave] += valor
+    for processo in processos:
+        processo.join()
+    
+    leituras = len(contadores['latencias'])
+    print(
+        f"{nome:<16} {leituras / duracao:>10.0f} {percentil(contadores['latencias'], 0.95) * 1000:>10.1f} "
+        f"{contadores['gravados'] / duracao:>12.0f} {contadores['erros_leitura']:>10} {contadores['erros_escrita']:>10}"
+    )
+
+def executar_benchmark(leitores, escritores, duracao, resultados_por_lote):
+    """Executa cada configuração de pragmas e imprime a tabela de resultados"""
+    print(f"\n{'Configuração':<16} {'Leituras/s':>10} {'p95 (ms)':>10} {'Gravados/s':>12} "
+          f"{'Erros leit.':>10} {'Erros escr.':>10}")
+    print('-' * 74)
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, pragmas in CONFIGURACOES.items():
+            executar_configuracao(diretorio, nome, pragmas, leitores, escritores, duracao, resultados_por_lote)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de leituras concorrentes com ingestão no SQLite')
+    parser.add_argument('--leitores', type=int, default=8, help='Threads lendo pela API')
+    parser.add_argument('--escritores', type=int, default=2, help='Threads ingerindo resultados')
+    parser.add_argument('--duracao', type=float, default=15, help='Segundos por configuração')
+    parser.add_argument('--resultados-por-lote', type=int, default=500,
+                        help='Resultados enviados em cada POST de ingestão')
+    args = parser.parse_args()
+    
+    print('🚀 Benchmark de concorrência no banco (leitores x escritores)')
+    executar_benchmark(args.leitores, args.escritores, args.duracao, args.resultados_por_lote)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Benchmark de Importação JUnit XML
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Gera arquivos JUnit XML sintéticos de tamanhos crescentes, importa cada um
+em um banco SQLite temporário e reporta vazão (casos/s) e pico de memória
+alocada durante a importação, que deve permanecer estável com o tamanho.
+
+Uso: python benchmark_ingestao_junit.py --casos 10000 100000 500000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend')))
+
+from app import criar_aplicacao
+from junit import importar_junit
+
+def gerar_junit(caminho, casos, taxa_falha=0.05):
+    """Escreve um JUnit XML com `casos` testcases sem montá-lo em memória"""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+        arquivo.write(f'<testsuite name="benchmark" tests="{casos}">\n')
+        intervalo_falha = int(1 / taxa_falha)
+        for i in range(casos):
+            nome = f'test_caso_{i}'
+            if i % intervalo_falha == 0:
+                arquivo.write(
+                    f'<testcase classname="benchmark.TestSuite{i % 50}" name="{nome}" time="0.{i % 997:03d}">'
+                    f'<failure message="assert {i} == 0">Traceback (most recent call last):\n'
+                    f'  File "test_benchmark.py", line {i % 400}, in {nome}\nAssertionError</failure></testcase>\n'
+                )
+            else:
+                arquivo.write(
+                    f'<testcase classname="benchmark.TestSuite{i % 50}" name="{nome}" time="0.{i % 997:03d}"/>\n'
+                )
+        arquivo.write('</testsuite>\n</testsuites>\n')
+
+def executar_benchmark(tamanhos):
+    """Importa um arquivo por tamanho e imprime a tabela de resultados"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_aplicacao({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(diretorio, "benchmark.db")}',
+            'AMOSTRADOR_ATIVO': False
+        })
+        
+        print(f"\n{'Casos':>10} {'Arquivo (MB)':>13} {'Tempo (s)':>10} {'Casos/s':>10} {'Pico mem. (MB)':>15}")
+        print('-' * 62)
+        
+        for casos in tamanhos:
+            caminho = os.path.join(diretorio, f'junit_{casos}.xml')
+            gerar_junit(caminho, casos)
+            tamanho_mb = os.path.getsize(caminho) / 1024 / 1024
+            
+            with app.app_context():
+                tracemalloc.start()
+                with open(caminho, 'rb') as origem:
+                    resumo = importar_junit(origem, 'benchmark', 'desenvolvimento')
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            
+            print(
+                f"{resumo['inseridos']:>10} {tamanho_mb:>13.1f} {resumo['tempo_importacao']:>10.2f} "
+                f"{resumo['casos_por_segundo']:>10.0f} {pico / 1024 / 1024:>15.1f}"
+            )
+            os.remove(caminho)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da importação JUnit XML')
+    parser.add_argument('--casos', type=int, nargs='+', default=[10000, 100000, 300000],
+                        help='Quantidade de testcases de cada arquivo gerado')
+    args = parser.parse_args()
+    
+    print('🚀 Benchmark de importação JUnit XML (iterparse + INSERT em lote)')
+    executar_benchmark(args.casos)
+
+if __name__ == '__main__':
+    main()
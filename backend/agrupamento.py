@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Agrupamento de Falhas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Normaliza a mensagem de erro e o stack trace de uma falha em uma
+assinatura (datas, UUIDs, hexadecimais, números e diretórios mascarados),
+de modo que falhas com a mesma causa tenham o mesmo hash. Assinaturas
+parecidas, mas não idênticas, são aproximadas por MinHash e encontradas
+com LSH (bandas do MinHash); ver `ClusterFalha` em models.py.
+"""
+
+import hashlib
+import random
+import re
+import zlib
+
+# Linhas finais do stack trace consideradas na assinatura
+MAX_LINHAS_STACK = 20
+
+# MinHash: PERMUTACOES valores divididos em BANDAS de LINHAS_POR_BANDA.
+# Duas assinaturas viram candidatas quando coincidem em alguma banda
+# (probabilidade ~50% com similaridade 0,5 e ~100% acima de 0,8).
+PERMUTACOES = 64
+BANDAS = 16
+LINHAS_POR_BANDA = PERMUTACOES // BANDAS
+
+# Similaridade de Jaccard estimada mínima para unir a um cluster existente
+LIMIAR_SIMILARIDADE = 0.7
+
+# Palavras por shingle
+TAMANHO_SHINGLE = 3
+
+_PRIMO = (1 << 61) - 1
+_gerador = random.Random(20240101)
+_COEFICIENTES = [(_gerador.randrange(1, _PRIMO), _gerador.randrange(0, _PRIMO)) for _ in range(PERMUTACOES)]
+
+# Ordem importa: padrões mais específicos antes dos números
+_MASCARAS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?'), '<data>'),
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE), '<uuid>'),
+    (re.compile(r'\b0x[0-9a-f]+\b', re.IGNORECASE), '<hex>'),
+    (re.compile(r'\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{8,}\b', re.IGNORECASE), '<hex>'),
+    # Diretórios (mantém o nome do arquivo): /home/ci/build/tests/test_x.py -> <caminho>/test_x.py
+    (re.compile(r'(?:[A-Za-z]:|[\w.\-]+)?(?:[\\/][\w.\-]+)*[\\/](?=[\w.\-])'), '<caminho>/'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<n>'),
+]
+_ESPACOS = re.compile(r'[ \t]+')
+_PALAVRAS = re.compile(r'<\w+>|\w+')
+
+def normalizar(texto):
+    """Texto com datas, identificadores, números e diretórios mascarados"""
+    for padrao, substituto in _MASCARAS:
+        texto = padrao.sub(substituto, texto)
+    return '\n'.join(_ESPACOS.sub(' ', linha).strip() for linha in texto.splitlines() if linha.strip())
+
+def assinatura_falha(mensagem_erro, stack_trace):
+    """Assinatura normalizada de uma falha ('' se não houver texto)"""
+    linhas_stack = (stack_trace or '').strip().splitlines()[-MAX_LINHAS_STACK:]
+    return normalizar('\n'.join([(mensagem_erro or '').strip(), *linhas_stack])).strip()
+
+def hash_assinatura(assinatura):
+    return hashlib.sha1(assinatura.encode('utf-8')).hexdigest()  # nosec B324 - identificador, não segurança
+
+def minhash(assinatura):
+    """PERMUTACOES mínimos dos hashes dos shingles de palavras da assinatura"""
+    palavras = _PALAVRAS.findall(assinatura.lower())
+    shingles = {
+        ' '.join(palavras[inicio:inicio + TAMANHO_SHINGLE])
+        for inicio in range(max(1, len(palavras) - TAMANHO_SHINGLE + 1))
+    }
+    valores = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+    return [min((a * valor + b) % _PRIMO for valor in valores) for a, b in _COEFICIENTES]
+
+def bandas(assinatura_minhash):
+    """Chave LSH de cada banda: [(indice_banda, valor)]"""
+    return [
+        (indice, hashlib.blake2b(
+            repr(assinatura_minhash[indice * LINHAS_POR_BANDA:(indice + 1) * LINHAS_POR_BANDA]).encode('ascii'),
+            digest_size=8
+        ).hexdigest())
+        for indice in range(BANDAS)
+    ]
+
+def similaridade(minhash_a, minhash_b):
+    """Similaridade de Jaccard estimada entre dois MinHash"""
+    return sum(1 for a, b in zip(minhash_a, minhash_b) if a == b) / PERMUTACOES
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Amostrador de Métricas do Sistema
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Thread em segundo plano que coleta CPU, memória, disco e rede em intervalo
+fixo, mantém as amostras recentes em um buffer circular e as persiste em
+lotes. `/api/sistema` responde a partir da última amostra, sem bloquear a
+requisição nem gravar no banco a cada chamada.
+
+Após cada lote gravado, os níveis consolidados (minuto e hora) são
+atualizados; a retenção de cada nível é aplicada periodicamente.
+
+Cada worker do gunicorn tem seu amostrador (para responder `/api/sistema`),
+mas só o processo que detém o lease `amostrador-sistema` (LiderancaProcesso)
+grava o histórico; os demais descartam as amostras pendentes. Se o líder
+morrer, o lease expira e outro worker assume na gravação seguinte.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from executor import identificar_processo
+from models import MetricaSistema, MetricaSistemaAgregada, LiderancaProcesso
+
+# Intervalo mínimo entre aplicações da política de retenção (segundos)
+INTERVALO_RETENCAO = 3600
+
+# Nome do lease que elege o processo que grava o histórico
+LIDERANCA_AMOSTRADOR = 'amostrador-sistema'
+
+# Validade do lease, em gravações de lote perdidas pelo líder
+LOTES_LEASE = 3
+
+class AmostradorSistema:
+    """Coletor periódico de métricas do sistema com buffer circular"""
+    
+    def __init__(self, intervalo=5.0, capacidade=720, tamanho_lote=12):
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.app = None
+        self.dono = identificar_processo()
+        
+        self._buffer = deque(maxlen=capacidade)
+        self._pendentes = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._ultima_retencao = 0
+        self._parar_no_encerramento = False
+    
+    @property
+    def ativo(self):
+        """Indica se a thread de coleta está em execução"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def iniciar(self, app):
+        """Inicia a thread de coleta (idempotente)"""
+        with self._lock:
+            if self.ativo:
+                return
+            
+            self.app = app
+            self._parar.clear()
+            
+            # A primeira leitura de cpu_percent(interval=None) só define a referência
+            MetricaSistema.coletar()
+            
+            self._thread = threading.Thread(target=self._executar, name='amostrador-sistema', daemon=True)
+            self._thread.start()
+            
+            # Um registro por instância, mesmo que a coleta seja reiniciada
+            if not self._parar_no_encerramento:
+                atexit.register(self.parar)
+                self._parar_no_encerramento = True
+    
+    def parar(self):
+        """Interrompe a coleta, persiste as amostras pendentes e devolve o lease"""
+        self._parar.set()
+        if self.ativo and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.intervalo + 5)
+        self.persistir()
+        
+        if self.app is None:
+            return
+        try:
+            with self.app.app_context():
+                LiderancaProcesso.liberar(LIDERANCA_AMOSTRADOR, self.dono)
+        except Exception as e:
+            print(f"Erro ao liberar a liderança do amostrador: {e}")
+    
+    def ultima(self):
+        """Retorna a amostra mais recente (ou None se ainda não houver)"""
+        with self._lock:
+            return self._buffer[-1] if self._buffer else None
+    
+    def amostras(self):
+        """Retorna uma cópia das amostras em memória, da mais antiga à mais recente"""
+        with self._lock:
+            return list(self._buffer)
+    
+    def coletar_agora(self):
+        """Coleta uma amostra imediatamente e a registra no buffer"""
+        amostra = MetricaSistema.coletar()
+        with self._lock:
+            self._buffer.append(amostra)
+            self._pendentes.append(amostra)
+            lote_completo = len(self._pendentes) >= self.tamanho_lote
+        
+        if lote_completo:
+            self.persistir()
+        return amostra
+    
+    def persistir(self):
+        """Grava no banco as amostras ainda não persistidas"""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, []
+        
+        if not pendentes or self.app is None:
+            return
+        
+        try:
+            with self.app.app_context():
+                # Renovado a cada lote: expira se o líder deixar de gravar
+                lease = self.intervalo * self.tamanho_lote * LOTES_LEASE
+                if not LiderancaProcesso.adquirir(LIDERANCA_AMOSTRADOR, self.dono, lease):
+                    return
+                MetricaSistema.salvar_lote(pendentes)
+                MetricaSistemaAgregada.consolidar_todas()
+                
+                if time.monotonic() - self._ultima_retencao >= INTERVALO_RETENCAO:
+                    MetricaSistemaAgregada.aplicar_retencao()
+                    self._ultima_retencao = time.monotonic()
+        except Exception as e:
+            print(f"Erro ao persistir métricas do sistema: {e}")
+    
+    def _executar(self):
+        """Laço da thread: coleta a cada `intervalo` segundos até ser parada"""
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.coletar_agora()
+            except Exception as e:
+                print(f"Erro ao coletar métricas do sistema: {e}")
@@ -15,20 +15,115 @@ import random
 import psutil
 import os
 import json
-from models import db, ExecucaoTeste, ResultadoTeste, ConfiguracaoSistema
-from routes import metricas_bp, execucoes_bp, sistema_bp, pipelines_bp
+from models import (
+    db, ExecucaoTeste, ConfiguracaoSistema, TendenciaDiaria, HistogramaDuracao
+)
+from routes import (
+    metricas_bp, execucoes_bp, sistema_bp, pipelines_bp, planejamento_bp, analytics_bp, artefatos_bp, exportacao_bp,
+    simular_execucao_testes
+)
+from comandos import registrar_comandos
+from migracoes import aplicar_migracoes
+from busca import criar_indice_busca
+from banco import (
+    normalizar_uri, opcoes_engine, configurar_engine, configurar_binds, ler_opcoes_ambiente, trava_inicializacao,
+    RoteadorLeituras, BIND_LEITURA, CHAVE_ENGINE_LEITURA
+)
+from artefatos import ArmazemArtefatos
+from arquivamento import ArquivoExecucoes
+from amostrador import AmostradorSistema
+from ingestao import inserir_resultados
+from executor import ExecutorExecucoes, interpretar_limites
+from suites import ExecutorSuites, SUITES_PADRAO
 
-def criar_aplicacao():
-    """Cria e configura a aplicação Flask"""
+def criar_aplicacao(config=None):
+    """Cria e configura a aplicação Flask
+    
+    `config` permite sobrescrever configurações (ex.: banco de testes).
+    """
     app = Flask(__name__)
     
     # Configurações
     app.config['SECRET_KEY'] = 'qa-dashboard-secret-key-2024'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///qa_dashboard.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalizar_uri(os.environ.get('DATABASE_URL'))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Pool de conexões (PostgreSQL e SQLite em arquivo); DB_ENGINE_OPTIONS
+    # (JSON) sobrescreve qualquer opção do engine
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_ENGINE_OPTIONS'] = ler_opcoes_ambiente(os.environ.get('DB_ENGINE_OPTIONS'))
+    
+    # Pragmas aplicados a cada conexão SQLite (ver banco.py)
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_CACHE_KB'] = int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024))
+    app.config['SQLITE_MMAP_MB'] = int(os.environ.get('SQLITE_MMAP_MB', 256))
+    
+    # Leituras de GET/HEAD em engine separado: réplica em DATABASE_URL_LEITURA
+    # ou, no SQLite, um pool somente leitura no mesmo arquivo. Clientes que
+    # escreveram há menos de REPLICA_ATRASO_MAXIMO segundos leem do primário
+    app.config['LEITURA_REPLICA_ATIVA'] = os.environ.get('LEITURA_REPLICA_ATIVA', '1') == '1'
+    app.config['DATABASE_URL_LEITURA'] = os.environ.get('DATABASE_URL_LEITURA')
+    app.config['REPLICA_ATRASO_MAXIMO'] = float(os.environ.get('REPLICA_ATRASO_MAXIMO', 5))
+    
+    # Amostrador de métricas do sistema (intervalo em segundos)
+    app.config['AMOSTRADOR_ATIVO'] = os.environ.get('AMOSTRADOR_ATIVO', '1') == '1'
+    app.config['AMOSTRAGEM_INTERVALO'] = float(os.environ.get('AMOSTRAGEM_INTERVALO', 5))
+    app.config['AMOSTRAGEM_CAPACIDADE'] = int(os.environ.get('AMOSTRAGEM_CAPACIDADE', 720))
+    app.config['AMOSTRAGEM_LOTE'] = int(os.environ.get('AMOSTRAGEM_LOTE', 12))
+    
+    # Executor de execuções de teste: workers, fila e concorrência por tipo/ambiente
+    app.config['EXECUTOR_WORKERS'] = int(os.environ.get('EXECUTOR_WORKERS', 4))
+    app.config['EXECUTOR_FILA_MAXIMA'] = int(os.environ.get('EXECUTOR_FILA_MAXIMA', 100))
+    app.config['EXECUTOR_LIMITE_POR_GRUPO'] = int(os.environ.get('EXECUTOR_LIMITE_POR_GRUPO', 2))
+    app.config['EXECUTOR_LIMITES'] = interpretar_limites(os.environ.get('EXECUTOR_LIMITES'))
+    
+    # Fila persistente: EXECUTOR_ATIVO=0 deixa o processo só enfileirando
+    # (workers dedicados via `flask executar-jobs`); lease e poll em segundos
+    app.config['EXECUTOR_ATIVO'] = os.environ.get('EXECUTOR_ATIVO', '1') == '1'
+    app.config['EXECUTOR_LEASE'] = float(os.environ.get('EXECUTOR_LEASE', 30))
+    app.config['EXECUTOR_INTERVALO_POLL'] = float(os.environ.get('EXECUTOR_INTERVALO_POLL', 1))
+    app.config['EXECUTOR_MAX_TENTATIVAS'] = int(os.environ.get('EXECUTOR_MAX_TENTATIVAS', 3))
+    
+    # O que cada job executa: 'pytest' (padrão) roda a suíte real do tipo em
+    # shards paralelos; 'simulacao' é a execução simulada de demonstração
+    app.config['EXECUTOR_MODO'] = os.environ.get('EXECUTOR_MODO', 'pytest')
+    app.config['SUITES_PYTEST'] = json.loads(os.environ['SUITES_PYTEST']) if os.environ.get('SUITES_PYTEST') else SUITES_PADRAO
+    app.config['SUITES_PROCESSOS'] = int(os.environ.get('SUITES_PROCESSOS', 0)) or os.cpu_count() or 1
+    app.config['SUITES_PRIORIZAR'] = os.environ.get('SUITES_PRIORIZAR', '1') == '1'
+    
+    # Artefatos (screenshots, logs): diretório, tamanho máximo por upload em
+    # bytes e carência (segundos) antes de a coleta remover um sem referência
+    app.config['ARTEFATOS_DIR'] = os.environ.get('ARTEFATOS_DIR') or os.path.join(app.instance_path, 'artefatos')
+    app.config['ARTEFATOS_TAMANHO_MAXIMO'] = int(os.environ.get('ARTEFATOS_TAMANHO_MAXIMO', 100 * 1024 * 1024))
+    app.config['ARTEFATOS_CARENCIA_GC'] = float(os.environ.get('ARTEFATOS_CARENCIA_GC', 3600))
+    
+    # Arquivo frio: execuções finalizadas com mais de ARQUIVAMENTO_IDADE_DIAS
+    # dias vão para arquivos mensais comprimidos (`flask arquivar-execucoes`)
+    app.config['ARQUIVAMENTO_DIR'] = os.environ.get('ARQUIVAMENTO_DIR') or os.path.join(app.instance_path, 'arquivo')
+    app.config['ARQUIVAMENTO_IDADE_DIAS'] = int(os.environ.get('ARQUIVAMENTO_IDADE_DIAS', 180))
+    
+    if config:
+        app.config.update(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_engine(app.config))
+    configurar_binds(app.config)
+    
     # Inicializar extensões
     db.init_app(app)
+    with app.app_context():
+        configurar_engine(db.engine, app.config)
+        engine_leitura = db.engines.get(BIND_LEITURA)
+        if engine_leitura is not None:
+            configurar_engine(engine_leitura, app.config, somente_leitura=True)
+            app.extensions['roteador_leituras'] = RoteadorLeituras(
+                engine_leitura,
+                atraso_maximo=app.config['REPLICA_ATRASO_MAXIMO'],
+                mesmo_banco=engine_leitura.url == db.engine.url
+            )
     CORS(app, origins=['http://localhost:8000', 'http://127.0.0.1:8000'])
     
     # Registrar blueprints
@@ -36,6 +131,70 @@ def criar_aplicacao():
     app.register_blueprint(execucoes_bp, url_prefix='/api')
     app.register_blueprint(sistema_bp, url_prefix='/api')
     app.register_blueprint(pipelines_bp, url_prefix='/api')
+    app.register_blueprint(planejamento_bp, url_prefix='/api')
+    app.register_blueprint(analytics_bp, url_prefix='/api')
+    app.register_blueprint(artefatos_bp, url_prefix='/api')
+    app.register_blueprint(exportacao_bp, url_prefix='/api')
+    
+    # Comandos de manutenção (flask CLI)
+    registrar_comandos(app)
+    
+    # Amostrador de métricas: iniciado na primeira requisição, já no processo
+    # que atende (após fork do gunicorn e fora do processo do reloader)
+    amostrador = AmostradorSistema(
+        intervalo=app.config['AMOSTRAGEM_INTERVALO'],
+        capacidade=app.config['AMOSTRAGEM_CAPACIDADE'],
+        tamanho_lote=app.config['AMOSTRAGEM_LOTE']
+    )
+    app.extensions['amostrador'] = amostrador
+    
+    # Executor de execuções: consome a fila persistente a partir da primeira
+    # requisição (jobs pendentes de antes de um restart são retomados)
+    if app.config['EXECUTOR_MODO'] == 'pytest':
+        tarefa = ExecutorSuites(
+            suites=app.config['SUITES_PYTEST'],
+            processos=app.config['SUITES_PROCESSOS'],
+            priorizar=app.config['SUITES_PRIORIZAR']
+        )
+    elif app.config['EXECUTOR_MODO'] == 'simulacao':
+        tarefa = simular_execucao_testes
+    else:
+        raise ValueError(f"EXECUTOR_MODO inválido: {app.config['EXECUTOR_MODO']} (use 'pytest' ou 'simulacao')")
+    executor = ExecutorExecucoes(
+        tarefa=tarefa,
+        workers=app.config['EXECUTOR_WORKERS'],
+        fila_maxima=app.config['EXECUTOR_FILA_MAXIMA'],
+        limite_por_grupo=app.config['EXECUTOR_LIMITE_POR_GRUPO'],
+        limites=app.config['EXECUTOR_LIMITES'],
+        lease=app.config['EXECUTOR_LEASE'],
+        intervalo_poll=app.config['EXECUTOR_INTERVALO_POLL'],
+        max_tentativas=app.config['EXECUTOR_MAX_TENTATIVAS']
+    )
+    app.extensions['executor'] = executor
+    
+    app.extensions['artefatos'] = ArmazemArtefatos(
+        raiz=app.config['ARTEFATOS_DIR'],
+        tamanho_maximo=app.config['ARTEFATOS_TAMANHO_MAXIMO']
+    )
+    app.extensions['arquivo'] = ArquivoExecucoes(app.config['ARQUIVAMENTO_DIR'])
+    
+    @app.before_request
+    def iniciar_amostrador():
+        if app.config['AMOSTRADOR_ATIVO'] and not amostrador.ativo:
+            amostrador.iniciar(app)
+        if app.config['EXECUTOR_ATIVO'] and not executor.ativo:
+            executor.iniciar(app)
+    
+    @app.before_request
+    def rotear_leituras():
+        roteador = app.extensions.get('roteador_leituras')
+        if roteador and roteador.usar_leitura():
+            db.session.info[CHAVE_ENGINE_LEITURA] = roteador.engine
+    
+    @app.after_request
+    def registrar_escrita(resposta):
+        roteador = app.extensions.get('roteador_leituras')
+        return roteador.marcar_escrita(resposta) if roteador else resposta
     
     # Rota principal
     @app.route('/')
@@ -62,9 +221,17 @@ def criar_aplicacao():
             'uptime': 'ativo'
         })
     
-    # Criar tabelas do banco
-    with app.app_context():
+    # Criar tabelas do banco: um processo por vez (workers do gunicorn iniciam
+    # juntos), então esquema, migrações e backfills rodam uma única vez
+    with app.app_context(), trava_inicializacao(db.engine):
+        # Banco sem tabelas: create_all já gera o esquema mais recente
+        banco_novo = not db.inspect(db.engine).has_table(ExecucaoTeste.__tablename__)
         db.create_all()
+        # Índice FTS e triggers são DDL nativo, fora do create_all
+        with db.engine.begin() as conexao:
+            criar_indice_busca(conexao)
+        # Backfills dos consolidados são migrações versionadas (migracoes.py)
+        aplicar_migracoes(banco_novo)
         inicializar_dados_exemplo()
     
     return app
@@ -93,15 +260,15 @@ def inicializar_dados_exemplo():
     
     # Criar resultados de teste
     for execucao in ExecucaoTeste.query.all():
-        for j in range(random.randint(5, 15)):
-            resultado = ResultadoTeste(
-                execucao_id=execucao.id,
-                nome_teste=f'Teste {j+1} - {execucao.tipo}',
-                status=random.choice(['passou', 'falhou', 'ignorado']),
-                tempo_execucao=random.randint(1, 30),
-                mensagem_erro='' if random.choice([True, False]) else 'Erro de validação'
-            )
-            db.session.add(resultado)
+        inserir_resultados(execucao.id, [
+            {
+                'nome_teste': f'Teste {j+1} - {execucao.tipo}',
+                'status': random.choice(['passou', 'falhou', 'ignorado']),
+                'tempo_execucao': random.randint(1, 30),
+                'mensagem_erro': '' if random.choice([True, False]) else 'Erro de validação'
+            }
+            for j in range(random.randint(5, 15))
+        ])
     
     # Criar configurações do sistema
     configuracao = ConfiguracaoSistema(
@@ -118,6 +285,10 @@ def inicializar_dados_exemplo():
     db.session.add(configuracao)
     
     db.session.commit()
+    # Os dados de exemplo não passam pelas rotas: consolidado diário e
+    # percentis das execuções vêm do histórico recém-criado
+    TendenciaDiaria.reconstruir()
+    HistogramaDuracao.reconstruir()
     print("Dados de exemplo criados com sucesso!")
 
 if __name__ == '__main__':
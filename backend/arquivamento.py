@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Arquivamento de Execuções Antigas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Execuções finalizadas mais antigas que a idade configurada saem do banco
+principal para arquivos mensais comprimidos (`AAAA-MM.ndjson.gz`). Cada
+execução é um membro gzip independente com NDJSON: a execução na primeira
+linha e um resultado por linha em seguida. Assim uma execução é lida com um
+único seek (`posicao`/`tamanho` em `execucoes_arquivadas`) sem descomprimir
+o mês inteiro, e arquivamentos posteriores só acrescentam membros ao fim.
+
+O resumo de cada execução fica em `execucoes_arquivadas`; os consolidados
+(TendenciaDiaria, EstatisticaTeste, HistogramaDuracao, FlakinessTeste) não
+são alterados. Saem junto com a execução as linhas que dependem dela:
+ocorrências de clusters, relatório em cache, jobs e referências de
+artefatos (os screenshots ficam sujeitos à coleta de artefatos).
+"""
+
+import gzip
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from itertools import islice
+from models import (
+    db, ExecucaoTeste, ResultadoTeste, ExecucaoArquivada, OcorrenciaCluster, RelatorioExecucao,
+    JobExecucao, ReferenciaArtefato
+)
+from paginacao import codificar_cursor, decodificar_cursor
+from relatorios import STATUS_FINALIZADOS
+
+# Execuções movidas por transação
+LOTE_ARQUIVAMENTO = 100
+
+# Resultados lidos do banco por vez durante o arquivamento
+TAMANHO_LOTE_LEITURA = 1000
+
+# Bytes comprimidos lidos do arquivo por vez ao ler uma execução arquivada
+TAMANHO_BLOCO_ARQUIVO = 64 * 1024
+
+# Jobs que ainda podem escrever na execução
+STATUS_JOBS_ATIVOS = ('pendente', 'executando')
+
+class ArquivoExecucoes:
+    """Arquivos mensais em `raiz` com um membro gzip por execução"""
+    
+    def __init__(self, raiz):
+        self.raiz = raiz
+    
+    @staticmethod
+    def nome_arquivo(data_criacao):
+        return f'{data_criacao:%Y-%m}.ndjson.gz'
+    
+    def caminho(self, nome_arquivo):
+        return os.path.join(self.raiz, nome_arquivo)
+    
+    def ler(self, registro):
+        """Gera as linhas (dicts) do membro de uma ExecucaoArquivada: execução e resultados
+        
+        Descomprime em blocos: quem para no meio (uma página) não lê o resto.
+        """
+        descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # formato gzip
+        restante = registro.tamanho
+        parcial = b''
+        with open(self.caminho(registro.arquivo), 'rb') as origem:
+            origem.seek(registro.posicao)
+            while restante > 0:
+                bloco = origem.read(min(TAMANHO_BLOCO_ARQUIVO, restante))
+                if not bloco:
+                    break
+                restante -= len(bloco)
+                *linhas, parcial = (parcial + descompressor.decompress(bloco)).split(b'\n')
+                for linha in linhas:
+                    if linha:
+                        yield json.loads(linha)
+        parcial += descompressor.flush()
+        if parcial.strip():
+            yield json.loads(parcial)
+
+def _linha(objeto):
+    return (json.dumps(objeto, ensure_ascii=False) + '\n').encode('utf-8')
+
+def _execucao_para_arquivo(execucao):
+    return {
+        'id': execucao.id,
+        'tipo': execucao.tipo,
+        'status': execucao.status,
+        'duracao': execucao.duracao,
+        'ambiente': execucao.ambiente,
+        'commit_hash': execucao.commit_hash,
+        'observacoes': execucao.observacoes,
+        'data_criacao': execucao.data_criacao.isoformat(),
+        'data_atualizacao': execucao.data_atualizacao.isoformat()
+    }
+
+def _candidatas(limite_data, maior_id, lote):
+    return ExecucaoTeste.query.filter(
+        ExecucaoTeste.data_criacao < limite_data,
+        ExecucaoTeste.status.in_(STATUS_FINALIZADOS),
+        # SQLite reutiliza ids acima do maior existente: a execução mais
+        # recente nunca sai, para que um id arquivado não volte a ser usado
+        ExecucaoTeste.id < maior_id,
+        ~db.exists().where(
+            JobExecucao.execucao_id == ExecucaoTeste.id, JobExecucao.status.in_(STATUS_JOBS_ATIVOS)
+        )
+    ).order_by(ExecucaoTeste.data_criacao, ExecucaoTeste.id).limit(lote).all()
+
+def _gravar_lote(arquivo, execucoes):
+    """Acrescenta as execuções aos arquivos mensais; retorna as linhas de ExecucaoArquivada"""
+    os.makedirs(arquivo.raiz, exist_ok=True)
+    por_id = {execucao.id: execucao for execucao in execucoes}
+    consulta = db.select(ResultadoTeste).where(
+        ResultadoTeste.execucao_id.in_(por_id)
+    ).order_by(ResultadoTeste.execucao_id, ResultadoTeste.id).execution_options(yield_per=TAMANHO_LOTE_LEITURA)
+    resultados = iter(db.session.scalars(consulta))
+    pendente = next(resultados, None)
+    
+    registros = []
+    destinos = {}
+    try:
+        for execucao in sorted(execucoes, key=lambda item: item.id):
+            nome = arquivo.nome_arquivo(execucao.data_criacao)
+            if nome not in destinos:
+                destinos[nome] = open(arquivo.caminho(nome), 'ab')
+            destino = destinos[nome]
+            posicao = destino.seek(0, os.SEEK_END)
+            contagem = {'passou': 0, 'falhou': 0, 'ignorado': 0}
+            total, tempo_total = 0, 0.0
+            
+            # Um membro gzip por execução, escrito em streaming
+            with gzip.GzipFile(fileobj=destino, mode='wb') as membro:
+                membro.write(_linha(_execucao_para_arquivo(execucao)))
+                while pendente is not None and pendente.execucao_id == execucao.id:
+                    membro.write(_linha(pendente.to_dict()))
+                    total += 1
+                    tempo_total += pendente.tempo_execucao or 0
+                    if pendente.status in contagem:
+                        contagem[pendente.status] += 1
+                    pendente = next(resultados, None)
+            
+            registros.append({
+                'id': execucao.id, 'tipo': execucao.tipo, 'status': execucao.status,
+                'duracao': execucao.duracao, 'ambiente': execucao.ambiente,
+                'commit_hash': execucao.commit_hash, 'observacoes': execucao.observacoes,
+                'data_criacao': execucao.data_criacao, 'data_atualizacao': execucao.data_atualizacao,
+                'total_testes': total, 'testes_passaram': contagem['passou'],
+                'testes_falharam': contagem['falhou'], 'testes_ignorados': contagem['ignorado'],
+                'tempo_total': tempo_total, 'arquivo': nome, 'posicao': posicao,
+                'tamanho': destino.tell() - posicao, 'arquivado_em': datetime.utcnow()
+            })
+        
+        # Os dados precisam estar em disco antes de sair do banco
+        for destino in destinos.values():
+            destino.flush()
+            os.fsync(destino.fileno())
+    finally:
+        for destino in destinos.values():
+            destino.close()
+    return registros
+
+def arquivar_execucoes(arquivo, idade_dias, lote=LOTE_ARQUIVAMENTO):
+    """Move para o arquivo frio as execuções finalizadas com mais de `idade_dias`
+    
+    Cada lote é gravado e sincronizado em disco antes da transação que remove
+    as linhas do banco; se o processo parar no meio, o lote continua no banco
+    e o trecho já escrito no arquivo fica sem referência (inofensivo).
+    """
+    limite_data = datetime.utcnow() - timedelta(days=idade_dias)
+    maior_id = db.session.query(db.func.max(ExecucaoTeste.id)).scalar() or 0
+    resumo = {'execucoes': 0, 'resultados': 0, 'arquivos': set()}
+    
+    while True:
+        execucoes = _candidatas(limite_data, maior_id, lote)
+        if not execucoes:
+            break
+        ids = [execucao.id for execucao in execucoes]
+        registros = _gravar_lote(arquivo, execucoes)
+        
+        db.session.execute(db.insert(ExecucaoArquivada), registros)
+        resultados_ids = db.select(ResultadoTeste.id).where(ResultadoTeste.execucao_id.in_(ids))
+        db.session.execute(db.delete(ReferenciaArtefato).where(ReferenciaArtefato.resultado_id.in_(resultados_ids)))
+        for modelo in (OcorrenciaCluster, RelatorioExecucao, JobExecucao, ResultadoTeste):
+            db.session.execute(db.delete(modelo).where(modelo.execucao_id.in_(ids)))
+        db.session.execute(db.delete(ExecucaoTeste).where(ExecucaoTeste.id.in_(ids)))
+        db.session.commit()
+        db.session.expunge_all()
+        
+        resumo['execucoes'] += len(registros)
+        resumo['resultados'] += sum(registro['total_testes'] for registro in registros)
+        resumo['arquivos'].update(registro['arquivo'] for registro in registros)
+    
+    resumo['arquivos'] = sorted(resumo['arquivos'])
+    return resumo
+
+def compactar_banco():
+    """Devolve ao sistema o espaço liberado (VACUUM no SQLite); retorna se compactou"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.exec_driver_sql('VACUUM')
+    return True
+
+def carregar_execucao_arquivada(arquivo, registro):
+    """(execução, iterador dos resultados) de uma execução arquivada, lidos do arquivo"""
+    linhas = arquivo.ler(registro)
+    return next(linhas), linhas
+
+def paginar_resultados_arquivados(resultados, cursor=None, limite=100):
+    """Mesma paginação de /execucoes/<id>/resultados (id crescente) sobre um iterador
+    
+    Os resultados estão gravados em ordem de id: a leitura para no primeiro
+    item depois da página.
+    """
+    if cursor:
+        ultimo_id, = decodificar_cursor(cursor, [ResultadoTeste.id])
+        resultados = (resultado for resultado in resultados if resultado['id'] > ultimo_id)
+    pagina = list(islice(resultados, limite + 1))
+    proximo_cursor = codificar_cursor([pagina[limite - 1]['id']]) if len(pagina) > limite else None
+    return pagina[:limite], proximo_cursor
+
+def relatorio_arquivado(arquivo, registro):
+    """Relatório de uma execução arquivada, no formato de `montar_relatorio`"""
+    _, resultados = carregar_execucao_arquivada(arquivo, registro)
+    return {
+        'execucao': registro.to_dict(),
+        'estatisticas': registro.get_estatisticas(),
+        'resultados': list(resultados),
+        # Fixo: o conteúdo (e o ETag) de um relatório arquivado não muda
+        'gerado_em': registro.arquivado_em.isoformat()
+    }
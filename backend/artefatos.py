@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Armazenamento de Artefatos
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Screenshots e logs endereçados pelo conteúdo: o nome de cada arquivo é o
+SHA-256 dos bytes, então uploads idênticos (ex.: o mesmo screenshot em
+retentativas) ocupam um único arquivo. Os arquivos ficam em subdiretórios
+pelos 4 primeiros caracteres do hash (`ab/cd/abcd...`) para que nenhum
+diretório cresça demais. O upload é lido em blocos, sem carregar o
+arquivo inteiro em memória.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+from models import db, Artefato, ReferenciaArtefato, ResultadoTeste
+
+# Bytes lidos por vez no upload
+TAMANHO_BLOCO = 1024 * 1024
+
+# Hashes consultados por vez na varredura de arquivos órfãos
+LOTE_VARREDURA = 500
+
+_HASH_VALIDO = re.compile(r'^[0-9a-f]{64}$')
+
+class ArtefatoMuitoGrande(ValueError):
+    """O upload excedeu o tamanho máximo configurado"""
+
+def hash_valido(valor):
+    return bool(_HASH_VALIDO.match(valor or ''))
+
+class ArmazemArtefatos:
+    """Blobs em disco sob `raiz`, nomeados pelo SHA-256 do conteúdo"""
+    
+    def __init__(self, raiz, tamanho_maximo=None):
+        self.raiz = raiz
+        self.tamanho_maximo = tamanho_maximo
+    
+    def caminho(self, hash_conteudo):
+        if not hash_valido(hash_conteudo):
+            raise ValueError('Hash de artefato inválido')
+        return os.path.join(self.raiz, hash_conteudo[:2], hash_conteudo[2:4], hash_conteudo)
+    
+    def existe(self, hash_conteudo):
+        return os.path.isfile(self.caminho(hash_conteudo))
+    
+    def gravar(self, origem):
+        """Grava o conteúdo de um stream; retorna (hash, tamanho, novo)
+        
+        O arquivo é escrito em um temporário no mesmo sistema de arquivos e
+        movido atomicamente para o caminho final, então leitores nunca veem
+        um blob parcial e uploads simultâneos do mesmo conteúdo não conflitam.
+        """
+        temporarios = os.path.join(self.raiz, 'tmp')
+        os.makedirs(temporarios, exist_ok=True)
+        resumo = hashlib.sha256()
+        tamanho = 0
+        
+        descritor, caminho_temporario = tempfile.mkstemp(dir=temporarios)
+        try:
+            with os.fdopen(descritor, 'wb') as destino:
+                while True:
+                    bloco = origem.read(TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    tamanho += len(bloco)
+                    if self.tamanho_maximo and tamanho > self.tamanho_maximo:
+                        raise ArtefatoMuitoGrande(f'Artefato maior que {self.tamanho_maximo} bytes')
+                    resumo.update(bloco)
+                    destino.write(bloco)
+            
+            hash_conteudo = resumo.hexdigest()
+            destino_final = self.caminho(hash_conteudo)
+            if os.path.isfile(destino_final):
+                # Renova o mtime: a coleta de arquivos órfãos respeita a carência
+                os.utime(destino_final)
+                return hash_conteudo, tamanho, False
+            
+            os.makedirs(os.path.dirname(destino_final), exist_ok=True)
+            os.replace(caminho_temporario, destino_final)
+            return hash_conteudo, tamanho, True
+        finally:
+            if os.path.exists(caminho_temporario):
+                os.remove(caminho_temporario)
+    
+    def remover(self, hash_conteudo):
+        try:
+            os.remove(self.caminho(hash_conteudo))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def listar(self, mais_antigos_que=None):
+        """Hashes dos blobs em disco (opcionalmente só os modificados antes de um timestamp)"""
+        for diretorio, _, arquivos in os.walk(self.raiz):
+            if os.path.basename(diretorio) == 'tmp':
+                continue
+            for nome in arquivos:
+                if not hash_valido(nome):
+                    continue
+                if mais_antigos_que is not None and os.path.getmtime(os.path.join(diretorio, nome)) >= mais_antigos_que:
+                    continue
+                yield nome
+    
+    def limpar_temporarios(self, carencia):
+        """Remove temporários abandonados (uploads interrompidos) mais antigos que `carencia` segundos"""
+        temporarios = os.path.join(self.raiz, 'tmp')
+        if not os.path.isdir(temporarios):
+            return 0
+        limite = time.time() - carencia
+        removidos = 0
+        for nome in os.listdir(temporarios):
+            caminho = os.path.join(temporarios, nome)
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+                removidos += 1
+        return removidos
+
+def coletar_artefatos(armazem, carencia):
+    """Remove artefatos sem referência há mais de `carencia` segundos
+    
+    Referências de resultados que não existem mais são descartadas antes.
+    Também remove arquivos em disco sem registro no banco (upload
+    interrompido entre a gravação e o commit) e temporários abandonados.
+    """
+    limite = datetime.utcnow() - timedelta(seconds=carencia)
+    db.session.execute(db.delete(ReferenciaArtefato).where(
+        ~db.exists().where(ResultadoTeste.id == ReferenciaArtefato.resultado_id)
+    ))
+    sem_uso = db.session.query(Artefato.id, Artefato.hash_conteudo, Artefato.tamanho).filter(
+        Artefato.ultimo_upload < limite,
+        ~db.exists().where(ReferenciaArtefato.artefato_id == Artefato.id)
+    ).all()
+    for inicio in range(0, len(sem_uso), LOTE_VARREDURA):
+        db.session.execute(db.delete(Artefato).where(
+            Artefato.id.in_([artefato.id for artefato in sem_uso[inicio:inicio + LOTE_VARREDURA]])
+        ))
+    db.session.commit()
+    
+    # Arquivos só são apagados depois do commit: um registro nunca aponta para blob ausente
+    for artefato in sem_uso:
+        armazem.remover(artefato.hash_conteudo)
+    
+    orfaos = 0
+    candidatos = list(armazem.listar(mais_antigos_que=time.time() - carencia))
+    for inicio in range(0, len(candidatos), LOTE_VARREDURA):
+        lote = candidatos[inicio:inicio + LOTE_VARREDURA]
+        registrados = {hash_conteudo for hash_conteudo, in db.session.query(Artefato.hash_conteudo).filter(
+            Artefato.hash_conteudo.in_(lote)
+        )}
+        for hash_conteudo in lote:
+            if hash_conteudo not in registrados and armazem.remover(hash_conteudo):
+                orfaos += 1
+    
+    return {
+        'artefatos_removidos': len(sem_uso),
+        'bytes_liberados': sum(artefato.tamanho for artefato in sem_uso),
+        'arquivos_orfaos': orfaos,
+        'temporarios_removidos': armazem.limpar_temporarios(carencia)
+    }
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Configuração do Banco de Dados
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Opções do engine a partir da configuração (DATABASE_URL, DB_*, SQLITE_*).
+No SQLite cada conexão nova recebe os pragmas: WAL deixa leitores
+trabalharem enquanto um escritor grava, `busy_timeout` faz um escritor
+esperar o lock em vez de falhar com `database is locked`, e `cache_size` e
+`mmap_size` mantêm as páginas quentes em memória. No PostgreSQL o pool é
+dimensionado para os workers do executor mais as requisições.
+
+Leituras de GET/HEAD podem ir para um engine separado (bind `leitura`): uma
+réplica em DATABASE_URL_LEITURA ou, no SQLite em arquivo, um segundo pool no
+mesmo arquivo com `query_only` (em WAL não disputa lock com a ingestão).
+SessaoRoteada envia ao bind de leitura apenas SELECTs de requisições
+marcadas por RoteadorLeituras; flush, DML e tudo que vem depois da primeira
+escrita da requisição continuam no primário. Um cliente que acabou de
+escrever lê do primário durante REPLICA_ATRASO_MAXIMO segundos
+(read-your-writes), e uma réplica atrasada além desse limite é ignorada.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from flask import request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, Select, TextualSelect
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+URI_PADRAO = 'sqlite:///qa_dashboard.db'
+
+# Chave do engine de leitura em SQLALCHEMY_BINDS / db.engines
+BIND_LEITURA = 'leitura'
+
+# Chave em Session.info com o engine de leitura da requisição
+CHAVE_ENGINE_LEITURA = 'engine_leitura'
+
+# Métodos atendidos pelo engine de leitura
+METODOS_LEITURA = ('GET', 'HEAD')
+
+# Cookie/cabeçalho com o instante (epoch) da última escrita do cliente
+COOKIE_ULTIMA_ESCRITA = 'qa_ultima_escrita'
+CABECALHO_ULTIMA_ESCRITA = 'X-Ultima-Escrita'
+
+# Chave do advisory lock do PostgreSQL que serializa a inicialização
+CHAVE_TRAVA_INICIALIZACAO = 7_406_110
+
+# Segundos entre medições do atraso da réplica
+INTERVALO_VERIFICACAO_ATRASO = 1.0
+
+# Atraso de uma réplica PostgreSQL em standby (0 quando aplicou todo o WAL recebido)
+SQL_ATRASO_POSTGRES = """
+SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+"""
+
+def normalizar_uri(uri):
+    """URI aceita pelo SQLAlchemy (provedores ainda exportam `postgres://`)"""
+    uri = uri or URI_PADRAO
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def _sqlite_em_memoria(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+def opcoes_engine(config):
+    """SQLALCHEMY_ENGINE_OPTIONS para a URI configurada
+    
+    `DB_ENGINE_OPTIONS` (dict) sobrescreve qualquer opção calculada.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    opcoes = {}
+    if uri.startswith('postgresql'):
+        opcoes = {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            # Conexões derrubadas por proxies/failover são descartadas antes do uso
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True
+        }
+    elif uri.startswith('sqlite') and not _sqlite_em_memoria(uri):
+        opcoes = {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT']
+        }
+    opcoes.update(config.get('DB_ENGINE_OPTIONS') or {})
+    return opcoes
+
+def uri_leitura(config):
+    """URI do engine de leitura, ou None quando as leituras ficam no primário"""
+    if not config['LEITURA_REPLICA_ATIVA']:
+        return None
+    if config['DATABASE_URL_LEITURA']:
+        return normalizar_uri(config['DATABASE_URL_LEITURA'])
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    # SQLite em memória: outro pool seria outro banco
+    if uri.startswith('sqlite') and not _sqlite_em_memoria(uri):
+        return uri
+    return None
+
+def configurar_binds(config):
+    """Acrescenta o bind de leitura a SQLALCHEMY_BINDS, com as mesmas opções de pool"""
+    uri = uri_leitura(config)
+    if uri:
+        opcoes = opcoes_engine({**config, 'SQLALCHEMY_DATABASE_URI': uri})
+        config.setdefault('SQLALCHEMY_BINDS', {})[BIND_LEITURA] = {'url': uri, **opcoes}
+
+def pragmas_sqlite(config, somente_leitura=False):
+    """Pragmas aplicados a cada conexão SQLite, na ordem de execução"""
+    pragmas = [
+        # Primeiro: os demais pragmas (journal_mode) também podem esperar por lock
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT_MS'])),
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('cache_size', -int(config['SQLITE_CACHE_KB'])),  # negativo: tamanho em KiB
+        ('mmap_size', int(config['SQLITE_MMAP_MB']) * 1024 * 1024),
+        ('temp_store', 'MEMORY')
+    ]
+    if somente_leitura:
+        pragmas.append(('query_only', 'ON'))
+    return pragmas
+
+def configurar_engine(engine, config, somente_leitura=False):
+    """Registra os pragmas por conexão quando o banco é SQLite"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = pragmas_sqlite(config, somente_leitura)
+    
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for nome, valor in pragmas:
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        finally:
+            cursor.close()
+
+@contextmanager
+def _trava_arquivo(caminho):
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'a') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+@contextmanager
+def _trava_postgres(engine):
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conexao:
+        conexao.exec_driver_sql(f'SELECT pg_advisory_lock({CHAVE_TRAVA_INICIALIZACAO})')
+        try:
+            yield
+        finally:
+            conexao.exec_driver_sql(f'SELECT pg_advisory_unlock({CHAVE_TRAVA_INICIALIZACAO})')
+
+def trava_inicializacao(engine):
+    """Exclusão mútua entre processos para criar esquema, migrar e fazer backfills
+    
+    PostgreSQL: advisory lock. SQLite em arquivo: flock em `<banco>.lock`.
+    SQLite em memória pertence a um único processo e dispensa trava.
+    """
+    if engine.dialect.name == 'postgresql':
+        return _trava_postgres(engine)
+    banco = engine.url.database
+    if engine.dialect.name == 'sqlite' and banco and banco != ':memory:' and fcntl is not None:
+        return _trava_arquivo(f'{banco}.lock')
+    return nullcontext()
+
+def ler_opcoes_ambiente(valor):
+    """DB_ENGINE_OPTIONS do ambiente (objeto JSON)"""
+    return json.loads(valor) if valor else {}
+
+class SessaoRoteada(Session):
+    """Sessão que envia SELECTs ao engine de leitura marcado em `info`"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        leitura = self.info.get(CHAVE_ENGINE_LEITURA)
+        if leitura is None or bind is not None or engine is not self._db.engines.get(None):
+            return engine
+        if (isinstance(clause, (Select, TextualSelect)) and not self._flushing
+                and getattr(clause, '_for_update_arg', None) is None):
+            return leitura
+        # Possível escrita: daqui em diante a requisição lê o que ela mesma gravou
+        self.info.pop(CHAVE_ENGINE_LEITURA, None)
+        return engine
+
+class RoteadorLeituras:
+    """Decide por requisição se as leituras vão para o engine de leitura"""
+    
+    def __init__(self, engine, atraso_maximo, mesmo_banco):
+        self.engine = engine
+        self.atraso_maximo = atraso_maximo
+        # Pool separado no mesmo arquivo SQLite: nunca está atrasado
+        self.mesmo_banco = mesmo_banco
+        self._atraso = 0.0
+        self._medido_em = 0.0
+        self._trava = threading.Lock()
+    
+    def _medir_atraso(self):
+        if self.engine.dialect.name != 'postgresql':
+            return 0.0
+        try:
+            with self.engine.connect() as conexao:
+                return float(conexao.exec_driver_sql(SQL_ATRASO_POSTGRES).scalar() or 0)
+        except Exception:
+            # Réplica indisponível: leituras voltam ao primário
+            return math.inf
+    
+    def atraso(self):
+        """Atraso da réplica em segundos, medido no máximo uma vez por intervalo"""
+        if self.mesmo_banco:
+            return 0.0
+        with self._trava:
+            if time.monotonic() - self._medido_em >= INTERVALO_VERIFICACAO_ATRASO:
+                self._atraso = self._medir_atraso()
+                self._medido_em = time.monotonic()
+            return self._atraso
+    
+    def escreveu_recentemente(self):
+        """Cliente escreveu há menos de `atraso_maximo` segundos (cookie ou cabeçalho)"""
+        valor = request.headers.get(CABECALHO_ULTIMA_ESCRITA) or request.cookies.get(COOKIE_ULTIMA_ESCRITA)
+        try:
+            return time.time() - float(valor) < self.atraso_maximo
+        except (TypeError, ValueError):
+            return False
+    
+    def usar_leitura(self):
+        return (
+            request.method in METODOS_LEITURA
+            and not self.escreveu_recentemente()
+            and self.atraso() <= self.atraso_maximo
+        )
+    
+    def marcar_escrita(self, resposta):
+        """Registra no cliente o instante de uma escrita bem-sucedida"""
+        if request.method not in METODOS_LEITURA + ('OPTIONS',) and resposta.status_code < 400:
+            agora = f'{time.time():.3f}'
+            resposta.headers[CABECALHO_ULTIMA_ESCRITA] = agora
+            resposta.set_cookie(
+                COOKIE_ULTIMA_ESCRITA, agora, max_age=math.ceil(self.atraso_maximo), httponly=True, samesite='Lax'
+            )
+        return resposta
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Busca Textual de Falhas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Índice de texto completo sobre `mensagem_erro` e `stack_trace` dos
+resultados. No SQLite é uma tabela FTS5 de conteúdo externo
+(`resultados_busca`, rowid = id do resultado) mantida por triggers em
+`resultados_teste`; só resultados com mensagem ou stack trace entram no
+índice. No PostgreSQL é um índice GIN sobre `to_tsvector`.
+"""
+
+from models import db
+
+TABELA_BUSCA = 'resultados_busca'
+
+# Limites de resultados por busca (parâmetro `limite`)
+LIMITE_PADRAO_BUSCA = 50
+LIMITE_MAXIMO_BUSCA = 200
+
+# Marcadores dos trechos encontrados em `destaque_*`
+MARCADOR_INICIO = '<mark>'
+MARCADOR_FIM = '</mark>'
+
+# Palavras de contexto no trecho do stack trace
+PALAVRAS_TRECHO = 24
+
+# A mensagem pesa mais que o stack trace no ranking (bm25)
+PESO_MENSAGEM = 4.0
+PESO_STACK_TRACE = 1.0
+
+_TEM_TEXTO = "(coalesce({0}.mensagem_erro, '') <> '' OR coalesce({0}.stack_trace, '') <> '')"
+
+# `_` faz parte dos tokens para que identificadores (test_login, assert_called) sejam buscáveis
+DDL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} USING fts5(
+        mensagem_erro, stack_trace,
+        content='resultados_teste', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2 tokenchars '_'"
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS resultados_teste_busca_ai AFTER INSERT ON resultados_teste
+        WHEN {_TEM_TEXTO.format('new')} BEGIN
+        INSERT INTO {TABELA_BUSCA}(rowid, mensagem_erro, stack_trace)
+        VALUES (new.id, new.mensagem_erro, new.stack_trace);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS resultados_teste_busca_ad AFTER DELETE ON resultados_teste
+        WHEN {_TEM_TEXTO.format('old')} BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, mensagem_erro, stack_trace)
+        VALUES ('delete', old.id, old.mensagem_erro, old.stack_trace);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS resultados_teste_busca_au
+    AFTER UPDATE OF mensagem_erro, stack_trace ON resultados_teste BEGIN
+        INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, mensagem_erro, stack_trace)
+        SELECT 'delete', old.id, old.mensagem_erro, old.stack_trace WHERE {_TEM_TEXTO.format('old')};
+        INSERT INTO {TABELA_BUSCA}(rowid, mensagem_erro, stack_trace)
+        SELECT new.id, new.mensagem_erro, new.stack_trace WHERE {_TEM_TEXTO.format('new')};
+    END"""
+]
+
+_DOCUMENTO_POSTGRES = "to_tsvector('simple', coalesce(r.mensagem_erro, '') || ' ' || coalesce(r.stack_trace, ''))"
+
+DDL_POSTGRES = [
+    "CREATE INDEX IF NOT EXISTS ix_resultados_teste_busca ON resultados_teste USING GIN ("
+    + _DOCUMENTO_POSTGRES.replace('r.', '') + ')'
+]
+
+class ConsultaInvalida(ValueError):
+    """Termo de busca vazio ou filtros malformados"""
+
+def _dialeto(conexao):
+    return conexao.dialect.name
+
+def criar_indice_busca(conexao):
+    """Cria o índice e as triggers se ainda não existirem (idempotente)"""
+    if _dialeto(conexao) == 'sqlite':
+        comandos = DDL_SQLITE
+    elif _dialeto(conexao) == 'postgresql':
+        comandos = DDL_POSTGRES
+    else:
+        return
+    for comando in comandos:
+        conexao.execute(db.text(comando))
+
+def reconstruir_indice_busca(conexao):
+    """Reindexa todos os resultados existentes; retorna quantos têm texto indexado"""
+    criar_indice_busca(conexao)
+    if _dialeto(conexao) == 'sqlite':
+        conexao.execute(db.text(f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('delete-all')"))
+        conexao.execute(db.text(
+            f"INSERT INTO {TABELA_BUSCA}(rowid, mensagem_erro, stack_trace) "
+            f"SELECT id, mensagem_erro, stack_trace FROM resultados_teste r WHERE {_TEM_TEXTO.format('r')}"
+        ))
+    elif _dialeto(conexao) == 'postgresql':
+        conexao.execute(db.text('REINDEX INDEX ix_resultados_teste_busca'))
+    return conexao.execute(db.text(
+        f"SELECT count(*) FROM resultados_teste r WHERE {_TEM_TEXTO.format('r')}"
+    )).scalar()
+
+def consulta_fts(termos):
+    """Converte o texto digitado em uma consulta FTS5 segura
+    
+    Cada palavra vira uma frase entre aspas (operadores e pontuação não
+    quebram a sintaxe) e todas precisam aparecer; `palavra*` busca por prefixo.
+    """
+    frases = []
+    for palavra in termos.split():
+        prefixo = palavra.endswith('*')
+        palavra = palavra.rstrip('*').replace('"', '""')
+        if palavra:
+            frases.append(f'"{palavra}"' + ('*' if prefixo else ''))
+    if not frases:
+        raise ConsultaInvalida("Parâmetro 'q' é obrigatório")
+    return ' '.join(frases)
+
+def buscar_resultados(termos, tipo=None, ambiente=None, status=None, inicio=None, fim=None,
+                      limite=LIMITE_PADRAO_BUSCA):
+    """Resultados cujo erro ou stack trace contém `termos`, do mais relevante ao menos"""
+    filtros = []
+    parametros = {'limite': limite}
+    for coluna, chave, valor in (
+        ('e.tipo', 'tipo', tipo), ('e.ambiente', 'ambiente', ambiente), ('r.status', 'status', status)
+    ):
+        if valor:
+            filtros.append(f'{coluna} = :{chave}')
+            parametros[chave] = valor
+    if inicio:
+        filtros.append('r.data_execucao >= :inicio')
+        parametros['inicio'] = inicio
+    if fim:
+        filtros.append('r.data_execucao < :fim')
+        parametros['fim'] = fim
+    
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        parametros['consulta'] = consulta_fts(termos)
+        sql = f"""
+            SELECT r.id, r.execucao_id, r.nome_teste, r.status, r.data_execucao, e.tipo, e.ambiente,
+                   -bm25({TABELA_BUSCA}, {PESO_MENSAGEM}, {PESO_STACK_TRACE}) AS relevancia,
+                   highlight({TABELA_BUSCA}, 0, :marcador_inicio, :marcador_fim) AS destaque_mensagem,
+                   snippet({TABELA_BUSCA}, 1, :marcador_inicio, :marcador_fim, '…', {PALAVRAS_TRECHO})
+                       AS destaque_stack_trace
+            FROM {TABELA_BUSCA}
+            JOIN resultados_teste r ON r.id = {TABELA_BUSCA}.rowid
+            JOIN execucoes_teste e ON e.id = r.execucao_id
+            WHERE {TABELA_BUSCA} MATCH :consulta {''.join(' AND ' + filtro for filtro in filtros)}
+            ORDER BY bm25({TABELA_BUSCA}, {PESO_MENSAGEM}, {PESO_STACK_TRACE}), r.id DESC
+            LIMIT :limite
+        """
+    elif dialeto == 'postgresql':
+        if not termos.strip():
+            raise ConsultaInvalida("Parâmetro 'q' é obrigatório")
+        parametros['consulta'] = termos
+        opcoes = f"StartSel={MARCADOR_INICIO}, StopSel={MARCADOR_FIM}, MaxWords={PALAVRAS_TRECHO}, MinWords=8"
+        sql = f"""
+            SELECT r.id, r.execucao_id, r.nome_teste, r.status, r.data_execucao, e.tipo, e.ambiente,
+                   ts_rank({_DOCUMENTO_POSTGRES}, q.consulta) AS relevancia,
+                   ts_headline('simple', coalesce(r.mensagem_erro, ''), q.consulta, 'HighlightAll=true, {opcoes}')
+                       AS destaque_mensagem,
+                   ts_headline('simple', coalesce(r.stack_trace, ''), q.consulta, '{opcoes}') AS destaque_stack_trace
+            FROM resultados_teste r
+            JOIN execucoes_teste e ON e.id = r.execucao_id
+            CROSS JOIN websearch_to_tsquery('simple', :consulta) AS q(consulta)
+            WHERE {_DOCUMENTO_POSTGRES} @@ q.consulta {''.join(' AND ' + filtro for filtro in filtros)}
+            ORDER BY relevancia DESC, r.id DESC
+            LIMIT :limite
+        """
+    else:
+        raise ConsultaInvalida(f"Busca textual não suportada no banco '{dialeto}'")
+    
+    parametros.update(marcador_inicio=MARCADOR_INICIO, marcador_fim=MARCADOR_FIM)
+    linhas = db.session.execute(db.text(sql).columns(data_execucao=db.DateTime), parametros).mappings()
+    return [
+        {
+            'id': linha['id'],
+            'execucao_id': linha['execucao_id'],
+            'nome_teste': linha['nome_teste'],
+            'status': linha['status'],
+            'tipo': linha['tipo'],
+            'ambiente': linha['ambiente'],
+            'data_execucao': linha['data_execucao'].isoformat() if linha['data_execucao'] else None,
+            'relevancia': round(linha['relevancia'], 6),
+            'destaque_mensagem': linha['destaque_mensagem'],
+            'destaque_stack_trace': linha['destaque_stack_trace']
+        }
+        for linha in linhas
+    ]
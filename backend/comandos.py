@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Comandos de Manutenção
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Comandos de linha de comando (Flask CLI) para tarefas administrativas.
+Uso: flask --app "app:criar_aplicacao()" <comando>
+"""
+
+import signal
+import threading
+import click
+from flask import current_app
+from models import (
+    db, TendenciaDiaria, MetricaSistemaAgregada, EstatisticaTeste, FlakinessTeste, HistogramaDuracao, ClusterFalha
+)
+from junit import importar_junit
+from busca import reconstruir_indice_busca
+from artefatos import coletar_artefatos
+from arquivamento import arquivar_execucoes, compactar_banco
+
+def registrar_comandos(app):
+    """Registra os comandos de manutenção na aplicação"""
+    
+    @app.cli.command('reconstruir-tendencias')
+    def reconstruir_tendencias():
+        """Recalcula o consolidado diário de execuções (backfill)"""
+        total = TendenciaDiaria.reconstruir()
+        click.echo(f'Consolidado diário reconstruído: {total} registros')
+    
+    @app.cli.command('reconstruir-estatisticas-testes')
+    def reconstruir_estatisticas_testes():
+        """Recalcula as estatísticas por teste a partir dos resultados (backfill)"""
+        total = EstatisticaTeste.reconstruir()
+        click.echo(f'Estatísticas por teste reconstruídas: {total} testes')
+    
+    @app.cli.command('reconstruir-flakiness')
+    def reconstruir_flakiness():
+        """Recalcula as alternâncias passou/falhou de todos os testes (backfill)"""
+        total = FlakinessTeste.reconstruir()
+        click.echo(f'Flakiness reconstruída: {total} testes com histórico comparável')
+    
+    @app.cli.command('reconstruir-histogramas')
+    def reconstruir_histogramas():
+        """Recalcula os histogramas diários de duração (percentis) a partir do histórico"""
+        total = HistogramaDuracao.reconstruir()
+        click.echo(f'Histogramas de duração reconstruídos: {total} buckets')
+    
+    @app.cli.command('reconstruir-clusters')
+    def reconstruir_clusters():
+        """Reagrupa todas as falhas por assinatura normalizada (backfill)"""
+        total = ClusterFalha.reconstruir()
+        click.echo(f'Clusters de falhas reconstruídos: {total} clusters')
+    
+    @app.cli.command('reconstruir-busca')
+    def reconstruir_busca():
+        """Reindexa mensagens de erro e stack traces para a busca textual"""
+        with db.engine.begin() as conexao:
+            total = reconstruir_indice_busca(conexao)
+        click.echo(f'Índice de busca reconstruído: {total} resultados com erro ou stack trace')
+    
+    @app.cli.command('manter-metricas-sistema')
+    def manter_metricas_sistema():
+        """Consolida o histórico de métricas do sistema e aplica a retenção"""
+        consolidados = MetricaSistemaAgregada.consolidar_todas()
+        removidos = MetricaSistemaAgregada.aplicar_retencao()
+        click.echo(f'Intervalos consolidados: {consolidados}')
+        click.echo(f'Registros removidos pela retenção: {removidos}')
+    
+    @app.cli.command('coletar-artefatos')
+    @click.option('--carencia', type=float, default=None,
+                  help='Segundos sem referência antes da remoção (padrão: ARTEFATOS_CARENCIA_GC)')
+    def coletar_artefatos_comando(carencia):
+        """Remove artefatos sem referência, arquivos órfãos e uploads interrompidos"""
+        if carencia is None:
+            carencia = current_app.config['ARTEFATOS_CARENCIA_GC']
+        resumo = coletar_artefatos(current_app.extensions['artefatos'], carencia)
+        click.echo(f"Artefatos removidos: {resumo['artefatos_removidos']} ({resumo['bytes_liberados']} bytes)")
+        click.echo(f"Arquivos órfãos removidos: {resumo['arquivos_orfaos']}")
+        click.echo(f"Temporários removidos: {resumo['temporarios_removidos']}")
+    
+    @app.cli.command('arquivar-execucoes')
+    @click.option('--idade-dias', type=int, default=None, help='Idade mínima em dias (padrão: ARQUIVAMENTO_IDADE_DIAS)')
+    @click.option('--vacuum', is_flag=True, help='Compacta o banco SQLite ao final')
+    def arquivar_execucoes_comando(idade_dias, vacuum):
+        """Move execuções finalizadas antigas para os arquivos mensais comprimidos"""
+        if idade_dias is None:
+            idade_dias = current_app.config['ARQUIVAMENTO_IDADE_DIAS']
+        resumo = arquivar_execucoes(current_app.extensions['arquivo'], idade_dias)
+        click.echo(f"Execuções arquivadas: {resumo['execucoes']} ({resumo['resultados']} resultados)")
+        if resumo['arquivos']:
+            click.echo(f"Arquivos: {', '.join(resumo['arquivos'])}")
+        if vacuum and compactar_banco():
+            click.echo('Banco compactado (VACUUM)')
+    
+    @app.cli.command('importar-junit')
+    @click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--tipo', default='completo', help='Tipo da execução (web, api, performance...)')
+    @click.option('--ambiente', default='desenvolvimento', help='Ambiente da execução')
+    @click.option('--commit', 'commit_hash', default=None, help='Commit testado (detecção de testes flaky)')
+    def importar_junit_comando(arquivo, tipo, ambiente, commit_hash):
+        """Importa um relatório JUnit XML como uma nova execução"""
+        with open(arquivo, 'rb') as origem:
+            resumo = importar_junit(origem, tipo, ambiente, f'Importação JUnit - {arquivo}', commit_hash)
+        click.echo(
+            f"Execução {resumo['execucao_id']} ({resumo['status']}): "
+            f"{resumo['inseridos']} resultados importados, {resumo['rejeitados']} rejeitados "
+            f"em {resumo['tempo_importacao']}s ({resumo['casos_por_segundo']} casos/s)"
+        )
+    
+    @app.cli.command('executar-jobs')
+    def executar_jobs():
+        """Processa a fila persistente de execuções até SIGINT/SIGTERM"""
+        executor = current_app.extensions['executor']
+        encerrar = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: encerrar.set())
+        
+        executor.iniciar(current_app._get_current_object())
+        click.echo(f'Worker {executor.dono} consumindo a fila com {executor.workers} workers')
+        try:
+            while not encerrar.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        
+        click.echo('Encerrando: aguardando jobs em andamento...')
+        executor.parar()
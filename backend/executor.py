@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Executor de Execuções de Teste
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Fila persistente (tabela `jobs_execucao`) consumida por um pool fixo de
+workers. Cada processo (gunicorn ou `flask executar-jobs`) reivindica jobs
+com um UPDATE condicional e mantém um lease renovado por heartbeat; se o
+processo morrer, o lease expira e o job volta para a fila; a nova tentativa
+começa removendo os resultados gravados pela anterior. Cada grupo
+(tipo, ambiente) tem um limite de execuções simultâneas e, quando a fila
+enche, novas submissões são recusadas (HTTP 429).
+"""
+
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from models import db, ExecucaoTeste, JobExecucao, contabilizar_conclusao_execucao
+from ingestao import remover_resultados
+
+# Jobs usados nas estatísticas de latência
+JANELA_LATENCIA = 200
+
+# Jobs pendentes avaliados a cada tentativa de reivindicação
+JANELA_CANDIDATOS = 50
+
+# Classe dos advisory locks do PostgreSQL que serializam a reivindicação por grupo
+CLASSE_TRAVA_GRUPO = 7_406_111
+
+class FilaCheia(Exception):
+    """A fila de execuções pendentes atingiu o tamanho máximo"""
+    
+    def __init__(self, retry_after):
+        super().__init__('Fila de execuções cheia')
+        self.retry_after = retry_after
+
+def interpretar_limites(texto):
+    """Converte 'performance=1,web:producao=2' em {'performance': 1, ('web', 'producao'): 2}"""
+    limites = {}
+    for item in filter(None, (parte.strip() for parte in (texto or '').split(','))):
+        chave, _, valor = item.partition('=')
+        tipo, _, ambiente = chave.strip().partition(':')
+        limites[(tipo, ambiente) if ambiente else tipo] = int(valor)
+    return limites
+
+def identificar_processo():
+    """Identificador do dono dos leases: host:pid:sufixo aleatório
+    
+    O sufixo evita confundir processos diferentes que reutilizam o mesmo pid
+    (ex.: containers reiniciados).
+    """
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+def processo_encerrado(dono):
+    """True se `dono` é um processo deste host que não existe mais"""
+    host, _, resto = (dono or '').partition(':')
+    pid = resto.partition(':')[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+class ExecutorExecucoes:
+    """Workers que consomem a fila persistente com limite de concorrência por grupo
+    
+    `tarefa(execucao_id, cancelado)` executa a execução; `cancelado` é um
+    threading.Event sinalizado quando o cancelamento é solicitado.
+    """
+    
+    def __init__(self, tarefa, workers=4, fila_maxima=100, limite_por_grupo=2, limites=None,
+                 lease=30, intervalo_poll=1.0, max_tentativas=3):
+        self.tarefa = tarefa
+        self.workers = workers
+        self.fila_maxima = fila_maxima
+        self.limite_por_grupo = limite_por_grupo
+        self.limites = limites or {}
+        self.lease = lease
+        self.intervalo_poll = intervalo_poll
+        self.max_tentativas = max_tentativas
+        self.dono = identificar_processo()
+        self.app = None
+        
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._threads = []
+        self._em_execucao_local = {}  # job_id -> evento de cancelamento
+        self._contadores = {'recusados': 0, 'recuperados': 0}
+    
+    @property
+    def ativo(self):
+        return bool(self._threads)
+    
+    def iniciar(self, app):
+        """Recupera leases expirados e inicia workers e heartbeat (idempotente)"""
+        with self._condicao:
+            self.app = app
+            if self._threads:
+                return
+            self._parar.clear()
+            
+            with app.app_context():
+                try:
+                    self.recuperar_leases_expirados(incluir_processos_encerrados=True)
+                finally:
+                    db.session.remove()
+            
+            alvos = [('executor-heartbeat', self._manter_leases)]
+            alvos += [(f'executor-{indice + 1}', self._executar) for indice in range(self.workers)]
+            for nome, alvo in alvos:
+                thread = threading.Thread(target=alvo, name=nome, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def parar(self, timeout=None):
+        """Sinaliza o fim dos workers e aguarda os jobs em andamento"""
+        with self._condicao:
+            self._parar.set()
+            self._condicao.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def limite(self, grupo):
+        """Limite de execuções simultâneas de um grupo (tipo, ambiente)"""
+        return self.limites.get(grupo, self.limites.get(grupo[0], self.limite_por_grupo))
+    
+    def verificar_capacidade(self):
+        """Levanta FilaCheia se a fila de pendentes atingiu o máximo"""
+        pendentes = JobExecucao.query.filter_by(status='pendente').count()
+        if pendentes >= self.fila_maxima:
+            self._contadores['recusados'] += 1
+            raise FilaCheia(self._estimar_espera(pendentes))
+    
+    def enfileirar(self, execucao):
+        """Adiciona o job da execução à sessão atual
+        
+        O commit fica com o chamador, na mesma transação que cria a execução;
+        depois dele, `notificar()` acorda os workers deste processo.
+        """
+        job = JobExecucao(execucao_id=execucao.id, tipo=execucao.tipo, ambiente=execucao.ambiente)
+        db.session.add(job)
+        db.session.flush()
+        return job
+    
+    def notificar(self):
+        """Acorda os workers locais sem esperar o próximo poll"""
+        with self._condicao:
+            self._condicao.notify_all()
+    
+    def obter(self, job_id):
+        """Retorna o job pelo id (ou None)"""
+        return db.session.get(JobExecucao, job_id)
+    
+    def cancelar(self, job_id):
+        """Cancela um job: pendente sai da fila; em execução recebe o sinal
+        
+        Retorna o job (ou None se não existir). O processo dono de um job em
+        execução observa `cancelamento_solicitado` no próximo heartbeat e o
+        encerra de forma cooperativa.
+        """
+        tabela = JobExecucao.__table__
+        agora = datetime.utcnow()
+        
+        cancelado = db.session.execute(
+            db.update(tabela)
+            .where(tabela.c.id == job_id, tabela.c.status == 'pendente')
+            .values(status='cancelado', finalizado_em=agora)
+        ).rowcount
+        if cancelado:
+            # Job que nem chegou a rodar: encerrar a execução aqui mesmo
+            db.session.execute(
+                db.update(ExecucaoTeste.__table__)
+                .where(
+                    ExecucaoTeste.id == db.select(tabela.c.execucao_id).where(tabela.c.id == job_id).scalar_subquery(),
+                    ExecucaoTeste.status == 'executando'
+                )
+                .values(status='cancelado', data_atualizacao=agora)
+            )
+        else:
+            db.session.execute(
+                db.update(tabela)
+                .where(tabela.c.id == job_id, tabela.c.status == 'executando')
+                .values(cancelamento_solicitado=True)
+            )
+        db.session.commit()
+        
+        job = db.session.get(JobExecucao, job_id)
+        evento = self._em_execucao_local.get(job_id)
+        if job is not None and evento is not None and job.cancelamento_solicitado:
+            evento.set()
+        return job
+    
+    def recuperar_leases_expirados(self, incluir_processos_encerrados=False):
+        """Devolve à fila os jobs cujo lease expirou (dono morto ou travado)
+        
+        Jobs que já esgotaram `max_tentativas` são marcados como 'falhou' e
+        a execução correspondente como 'falha'. Com
+        `incluir_processos_encerrados`, jobs de processos deste host que não
+        existem mais são recuperados sem esperar o lease expirar.
+        """
+        tabela = JobExecucao.__table__
+        agora = datetime.utcnow()
+        
+        abandonado = tabela.c.lease_expira_em < agora
+        if incluir_processos_encerrados:
+            donos = db.session.execute(
+                db.select(tabela.c.dono).where(tabela.c.status == 'executando').distinct()
+            ).scalars()
+            encerrados = [dono for dono in donos if processo_encerrado(dono)]
+            if encerrados:
+                abandonado = db.or_(abandonado, tabela.c.dono.in_(encerrados))
+        
+        em_execucao = db.and_(tabela.c.status == 'executando', abandonado)
+        esgotados = db.and_(em_execucao, tabela.c.tentativas >= self.max_tentativas)
+        
+        for execucao_id in db.session.execute(db.select(tabela.c.execucao_id).where(esgotados)).scalars().all():
+            self._marcar_execucao_falha(execucao_id, agora)
+        falhos = db.session.execute(
+            db.update(tabela).where(esgotados).values(
+                status='falhou', dono=None, lease_expira_em=None, finalizado_em=agora,
+                erro='Lease expirado: tentativas esgotadas'
+            )
+        ).rowcount
+        recolocados = db.session.execute(
+            db.update(tabela).where(em_execucao).values(status='pendente', dono=None, lease_expira_em=None)
+        ).rowcount
+        db.session.commit()
+        
+        self._contadores['recuperados'] += recolocados + falhos
+        if recolocados:
+            self.notificar()
+        return recolocados + falhos
+    
+    def estatisticas(self):
+        """Profundidade da fila, execuções por grupo e latências recentes"""
+        por_status = dict(
+            db.session.query(JobExecucao.status, db.func.count()).group_by(JobExecucao.status).all()
+        )
+        por_grupo = {'pendente': {}, 'executando': {}}
+        for tipo, ambiente, status, quantidade in (
+            db.session.query(JobExecucao.tipo, JobExecucao.ambiente, JobExecucao.status, db.func.count())
+            .filter(JobExecucao.status.in_(list(por_grupo)))
+            .group_by(JobExecucao.tipo, JobExecucao.ambiente, JobExecucao.status)
+        ):
+            por_grupo[status][f'{tipo}/{ambiente}'] = quantidade
+        
+        latencias, duracoes = self._amostras_recentes()
+        return {
+            'workers': self.workers,
+            'dono': self.dono,
+            'executando_neste_processo': len(self._em_execucao_local),
+            'fila': por_status.get('pendente', 0),
+            'fila_maxima': self.fila_maxima,
+            'executando': por_status.get('executando', 0),
+            'executando_por_grupo': por_grupo['executando'],
+            'pendentes_por_grupo': por_grupo['pendente'],
+            'latencia_fila': self._resumir(latencias),
+            'duracao': self._resumir(duracoes),
+            'submetidos': sum(por_status.values()),
+            'concluidos': por_status.get('concluido', 0),
+            'falhos': por_status.get('falhou', 0),
+            'cancelados': por_status.get('cancelado', 0),
+            **self._contadores
+        }
+    
+    # -------------------------------------------------------------------------
+    # Internos
+    # -------------------------------------------------------------------------
+    
+    def _amostras_recentes(self):
+        """Latência de fila e duração dos JANELA_LATENCIA jobs iniciados mais recentes"""
+        recentes = (
+            db.session.query(JobExecucao.criado_em, JobExecucao.iniciado_em, JobExecucao.finalizado_em)
+            .filter(JobExecucao.iniciado_em.isnot(None))
+            .order_by(JobExecucao.id.desc())
+            .limit(JANELA_LATENCIA)
+            .all()
+        )
+        latencias = [(iniciado - criado).total_seconds() for criado, iniciado, _ in recentes]
+        duracoes = [(finalizado - iniciado).total_seconds() for _, iniciado, finalizado in recentes if finalizado]
+        return latencias, duracoes
+    
+    def _estimar_espera(self, pendentes):
+        """Segundos sugeridos no Retry-After com base na duração média recente"""
+        _, duracoes = self._amostras_recentes()
+        if not duracoes or not self.workers:
+            return 30
+        media = sum(duracoes) / len(duracoes)
+        return max(1, int(media * (pendentes + 1) / self.workers))
+    
+    @staticmethod
+    def _resumir(valores):
+        if not valores:
+            return {'media': 0, 'maxima': 0}
+        return {'media': round(sum(valores) / len(valores), 3), 'maxima': round(max(valores), 3)}
+    
+    def _reivindicar(self):
+        """Reivindica o próximo job pendente (FIFO) cujo grupo ainda tem vaga
+        
+        O UPDATE só tem efeito se o job continua pendente e o grupo continua
+        abaixo do limite, então dois processos nunca ficam com o mesmo job.
+        No SQLite o UPDATE já roda sob o lock de escrita do banco; no
+        PostgreSQL (READ COMMITTED) dois UPDATEs de jobs diferentes do mesmo
+        grupo poderiam contar a ocupação antes de qualquer um confirmar, então
+        a transação primeiro toma um advisory lock do grupo.
+        Retorna (job_id, execucao_id, tentativa) ou None.
+        """
+        tabela = JobExecucao.__table__
+        em_execucao = dict(
+            ((tipo, ambiente), quantidade)
+            for tipo, ambiente, quantidade in db.session.execute(
+                db.select(tabela.c.tipo, tabela.c.ambiente, db.func.count())
+                .where(tabela.c.status == 'executando')
+                .group_by(tabela.c.tipo, tabela.c.ambiente)
+            )
+        )
+        candidatos = db.session.execute(
+            db.select(tabela.c.id, tabela.c.execucao_id, tabela.c.tipo, tabela.c.ambiente, tabela.c.tentativas)
+            .where(tabela.c.status == 'pendente')
+            .order_by(tabela.c.id)
+            .limit(JANELA_CANDIDATOS)
+        ).all()
+        db.session.rollback()
+        
+        outros = tabela.alias('em_execucao')
+        for job_id, execucao_id, tipo, ambiente, tentativas in candidatos:
+            limite = self.limite((tipo, ambiente))
+            if em_execucao.get((tipo, ambiente), 0) >= limite:
+                continue
+            
+            if db.session.get_bind().dialect.name == 'postgresql':
+                # Liberado no commit; o UPDATE seguinte já vê as reivindicações confirmadas
+                db.session.execute(db.select(db.func.pg_advisory_xact_lock(
+                    CLASSE_TRAVA_GRUPO, db.func.hashtext(f'{tipo}:{ambiente}')
+                )))
+            ocupacao = (
+                db.select(db.func.count()).select_from(outros)
+                .where(outros.c.status == 'executando', outros.c.tipo == tipo, outros.c.ambiente == ambiente)
+                .scalar_subquery()
+            )
+            agora = datetime.utcnow()
+            reivindicado = db.session.execute(
+                db.update(tabela)
+                .where(tabela.c.id == job_id, tabela.c.status == 'pendente', ocupacao < limite)
+                .values(
+                    status='executando', dono=self.dono, tentativas=tabela.c.tentativas + 1,
+                    lease_expira_em=agora + timedelta(seconds=self.lease),
+                    heartbeat_em=agora, iniciado_em=agora, cancelamento_solicitado=False
+                )
+            ).rowcount
+            db.session.commit()
+            if reivindicado:
+                return job_id, execucao_id, tentativas + 1
+        return None
+    
+    def _finalizar(self, job_id, execucao_id, status, erro=None):
+        """Grava o resultado do job, desde que o lease ainda seja deste processo"""
+        tabela = JobExecucao.__table__
+        agora = datetime.utcnow()
+        atualizado = db.session.execute(
+            db.update(tabela)
+            .where(tabela.c.id == job_id, tabela.c.dono == self.dono, tabela.c.status == 'executando')
+            .values(status=status, erro=erro, dono=None, lease_expira_em=None, finalizado_em=agora)
+        ).rowcount
+        if atualizado and status == 'falhou':
+            self._marcar_execucao_falha(execucao_id, agora)
+        db.session.commit()
+    
+    @staticmethod
+    def _marcar_execucao_falha(execucao_id, agora):
+        """Conclui como 'falha' uma execução que ainda está 'executando'
+        
+        O UPDATE condicional decide a corrida com quem mais possa concluí-la;
+        só quem mudou o status atualiza tendência diária e histograma.
+        """
+        tabela = ExecucaoTeste.__table__
+        alterada = db.session.execute(
+            db.update(tabela)
+            .where(tabela.c.id == execucao_id, tabela.c.status == 'executando')
+            .values(status='falha', data_atualizacao=agora)
+        ).rowcount
+        if alterada:
+            execucao = db.session.get(ExecucaoTeste, execucao_id, populate_existing=True)
+            contabilizar_conclusao_execucao(execucao, 'executando', execucao.duracao)
+    
+    def _executar(self):
+        """Laço de cada worker: reivindica o próximo job elegível e o executa"""
+        with self.app.app_context():
+            while not self._parar.is_set():
+                try:
+                    reivindicado = self._reivindicar()
+                except Exception as e:
+                    db.session.rollback()
+                    reivindicado = None
+                    print(f"Erro ao reivindicar job: {e}")
+                finally:
+                    db.session.remove()
+                
+                if reivindicado is None:
+                    with self._condicao:
+                        if not self._parar.is_set():
+                            self._condicao.wait(self.intervalo_poll)
+                    continue
+                
+                self._executar_job(*reivindicado)
+    
+    def _executar_job(self, job_id, execucao_id, tentativa):
+        cancelamento = threading.Event()
+        self._em_execucao_local[job_id] = cancelamento
+        erro = None
+        try:
+            if tentativa > 1:
+                # Job recuperado: descartar o que a tentativa anterior gravou
+                remover_resultados(execucao_id)
+                db.session.commit()
+            self.tarefa(execucao_id, cancelado=cancelamento)
+            status = 'cancelado' if cancelamento.is_set() else 'concluido'
+        except Exception as e:
+            db.session.rollback()
+            status = 'falhou'
+            erro = str(e)
+            print(f"Erro no job {job_id} (execução {execucao_id}): {e}")
+        finally:
+            db.session.remove()
+            del self._em_execucao_local[job_id]
+        
+        try:
+            self._finalizar(job_id, execucao_id, status, erro)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao finalizar job {job_id}: {e}")
+        finally:
+            db.session.remove()
+    
+    def _manter_leases(self):
+        """Heartbeat: renova os leases locais, repassa cancelamentos e recupera expirados"""
+        with self.app.app_context():
+            while not self._parar.wait(self.lease / 3):
+                try:
+                    self._renovar_leases()
+                    self.recuperar_leases_expirados()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Erro no heartbeat do executor: {e}")
+                finally:
+                    db.session.remove()
+    
+    def _renovar_leases(self):
+        locais = dict(self._em_execucao_local)
+        if not locais:
+            return
+        
+        tabela = JobExecucao.__table__
+        agora = datetime.utcnow()
+        db.session.execute(
+            db.update(tabela)
+            .where(tabela.c.id.in_(list(locais)), tabela.c.dono == self.dono, tabela.c.status == 'executando')
+            .values(lease_expira_em=agora + timedelta(seconds=self.lease), heartbeat_em=agora)
+        )
+        cancelados = db.session.execute(
+            db.select(tabela.c.id).where(tabela.c.id.in_(list(locais)), tabela.c.cancelamento_solicitado.is_(True))
+        ).scalars().all()
+        db.session.commit()
+        
+        for job_id in cancelados:
+            locais[job_id].set()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Exportação de Dados
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Exporta execuções e resultados em CSV, Parquet ou Arrow (IPC stream) a
+partir de um cursor no servidor. As linhas são lidas em lotes e cada lote
+vira um pedaço da resposta (CSV), um row group (Parquet) ou um record batch
+(Arrow), então a memória usada não depende do período exportado.
+Parquet e Arrow exigem o pacote opcional `pyarrow`.
+"""
+
+import csv
+import io
+from datetime import datetime
+from flask import Response, stream_with_context
+from models import db, ExecucaoTeste, ResultadoTeste, CONTAGEM_VAZIA
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow, apenas CSV
+    pa = pq = None
+
+# Linhas lidas do cursor por vez (= linhas por row group / record batch)
+TAMANHO_LOTE_EXPORTACAO = 50000
+
+# formato -> (mimetype, extensão do arquivo)
+FORMATOS_EXPORTACAO = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+# (nome da coluna, tipo no esquema Arrow)
+COLUNAS_EXECUCOES = [
+    ('id', 'int64'), ('tipo', 'string'), ('status', 'string'), ('duracao', 'int64'),
+    ('ambiente', 'string'), ('commit_hash', 'string'), ('observacoes', 'string'),
+    ('data_criacao', 'timestamp'), ('data_atualizacao', 'timestamp'),
+    ('total_testes', 'int64'), ('testes_passaram', 'int64'), ('testes_falharam', 'int64')
+]
+
+# Resultados levam tipo, ambiente e commit da execução para análise sem join
+COLUNAS_RESULTADOS = [
+    ('id', 'int64'), ('execucao_id', 'int64'), ('tipo', 'string'), ('ambiente', 'string'),
+    ('commit_hash', 'string'), ('nome_teste', 'string'), ('status', 'string'),
+    ('tempo_execucao', 'float64'), ('data_execucao', 'timestamp'), ('mensagem_erro', 'string'),
+    ('cluster_id', 'int64'), ('screenshot_path', 'string')
+]
+
+class FormatoIndisponivel(Exception):
+    """Formato conhecido, mas que depende de um pacote não instalado"""
+
+def validar_formato(formato):
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato inválido. Use: {', '.join(FORMATOS_EXPORTACAO)}")
+    if formato != 'csv' and pa is None:
+        raise FormatoIndisponivel(f"Exportação '{formato}' requer o pacote pyarrow")
+
+def _filtrar(consulta, tipo=None, ambiente=None, status=None, inicio=None, fim=None, coluna_status=ExecucaoTeste.status):
+    """Filtros comuns; o período é sempre o da criação da execução (indexado)"""
+    if tipo:
+        consulta = consulta.where(ExecucaoTeste.tipo == tipo)
+    if ambiente:
+        consulta = consulta.where(ExecucaoTeste.ambiente == ambiente)
+    if status:
+        consulta = consulta.where(coluna_status == status)
+    if inicio:
+        consulta = consulta.where(ExecucaoTeste.data_criacao >= inicio)
+    if fim:
+        consulta = consulta.where(ExecucaoTeste.data_criacao < fim)
+    return consulta
+
+def _lotes(consulta, tamanho_lote):
+    """Lotes de tuplas lidos com cursor no servidor"""
+    resultado = db.session.execute(consulta.execution_options(stream_results=True, yield_per=tamanho_lote))
+    for particao in resultado.partitions():
+        yield [tuple(linha) for linha in particao]
+
+def lotes_execucoes(tamanho_lote=TAMANHO_LOTE_EXPORTACAO, **filtros):
+    consulta = _filtrar(db.select(
+        ExecucaoTeste.id, ExecucaoTeste.tipo, ExecucaoTeste.status, ExecucaoTeste.duracao,
+        ExecucaoTeste.ambiente, ExecucaoTeste.commit_hash, ExecucaoTeste.observacoes,
+        ExecucaoTeste.data_criacao, ExecucaoTeste.data_atualizacao
+    ), **filtros).order_by(ExecucaoTeste.data_criacao, ExecucaoTeste.id)
+    
+    for lote in _lotes(consulta, tamanho_lote):
+        # Contadores do lote inteiro em uma consulta agrupada
+        contagens = ExecucaoTeste.contar_resultados([linha[0] for linha in lote])
+        yield [
+            linha + tuple(contagens.get(linha[0], CONTAGEM_VAZIA)[campo]
+                          for campo in ('total_testes', 'testes_passaram', 'testes_falharam'))
+            for linha in lote
+        ]
+
+def lotes_resultados(tamanho_lote=TAMANHO_LOTE_EXPORTACAO, **filtros):
+    consulta = _filtrar(db.select(
+        ResultadoTeste.id, ResultadoTeste.execucao_id, ExecucaoTeste.tipo, ExecucaoTeste.ambiente,
+        ExecucaoTeste.commit_hash, ResultadoTeste.nome_teste, ResultadoTeste.status,
+        ResultadoTeste.tempo_execucao, ResultadoTeste.data_execucao, ResultadoTeste.mensagem_erro,
+        ResultadoTeste.cluster_id, ResultadoTeste.screenshot_path
+    ).join(ExecucaoTeste, ExecucaoTeste.id == ResultadoTeste.execucao_id),
+        coluna_status=ResultadoTeste.status, **filtros
+    ).order_by(ExecucaoTeste.data_criacao, ExecucaoTeste.id, ResultadoTeste.id)
+    return _lotes(consulta, tamanho_lote)
+
+def _valor_csv(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+def gerar_csv(colunas, lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([nome for nome, _ in colunas])
+    yield buffer.getvalue()
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([_valor_csv(valor) for valor in linha] for linha in lote)
+        yield buffer.getvalue()
+
+class _SaidaEmPartes:
+    """Destino somente de escrita para o pyarrow; os bytes são retirados a cada lote"""
+    
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+        self.closed = False
+    
+    def write(self, dados):
+        dados = bytes(dados)
+        self.partes.append(dados)
+        self.posicao += len(dados)
+        return len(dados)
+    
+    def tell(self):
+        return self.posicao
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def writable(self):
+        return True
+    
+    def seekable(self):
+        return False
+    
+    def retirar(self):
+        dados = b''.join(self.partes)
+        self.partes.clear()
+        return dados
+
+def _esquema(colunas):
+    tipos = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in colunas])
+
+def _lote_arrow(esquema, lote):
+    valores = list(zip(*lote))
+    return pa.record_batch(
+        [pa.array(valores[indice], type=campo.type) for indice, campo in enumerate(esquema)], schema=esquema
+    )
+
+def gerar_parquet(colunas, lotes):
+    esquema = _esquema(colunas)
+    saida = _SaidaEmPartes()
+    with pq.ParquetWriter(saida, esquema, compression='snappy') as escritor:
+        for lote in lotes:
+            escritor.write_batch(_lote_arrow(esquema, lote), row_group_size=len(lote))
+            yield saida.retirar()
+    yield saida.retirar()
+
+def gerar_arrow(colunas, lotes):
+    esquema = _esquema(colunas)
+    saida = _SaidaEmPartes()
+    with pa.ipc.new_stream(saida, esquema) as escritor:
+        for lote in lotes:
+            escritor.write_batch(_lote_arrow(esquema, lote))
+            yield saida.retirar()
+    yield saida.retirar()
+
+GERADORES = {'csv': gerar_csv, 'parquet': gerar_parquet, 'arrow': gerar_arrow}
+
+def resposta_exportacao(nome, formato, colunas, lotes):
+    """Resposta em streaming com o arquivo `nome.<extensão>` para download"""
+    mimetype, extensao = FORMATOS_EXPORTACAO[formato]
+    resposta = Response(stream_with_context(GERADORES[formato](colunas, lotes)), mimetype=mimetype)
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{nome}.{extensao}"'
+    return resposta
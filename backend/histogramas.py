@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Histogramas de Duração
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Sketch de quantis com buckets logarítmicos (estilo HDR/DDSketch): cada
+duração cai no bucket `ceil(log_gamma(valor))`, e qualquer quantil é
+estimado com erro relativo de no máximo PRECISAO_RELATIVA. Como um sketch
+é só uma contagem por bucket, sketches de dias diferentes se combinam
+somando as contagens (ver `HistogramaDuracao` em models.py).
+"""
+
+import math
+
+# Erro relativo máximo dos quantis estimados
+PRECISAO_RELATIVA = 0.01
+GAMMA = (1 + PRECISAO_RELATIVA) / (1 - PRECISAO_RELATIVA)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Durações abaixo deste valor (segundos) contam como zero
+VALOR_MINIMO = 0.001
+INDICE_ZERO = -(2 ** 31)
+
+# Percentis publicados
+PERCENTIS = (50, 90, 95, 99)
+
+def indice_bucket(valor):
+    """Bucket de uma duração em segundos"""
+    if valor < VALOR_MINIMO:
+        return INDICE_ZERO
+    return math.ceil(math.log(valor) / _LOG_GAMMA)
+
+def valor_bucket(indice):
+    """Valor representativo do bucket (erro relativo <= PRECISAO_RELATIVA)"""
+    if indice == INDICE_ZERO:
+        return 0.0
+    return 2 * GAMMA ** indice / (GAMMA + 1)
+
+def quantis(contagens, percentis=PERCENTIS):
+    """{'amostras': n, 'p50': ..., ...} a partir de [(indice, contagem)]; None se vazio"""
+    buckets = sorted((indice, contagem) for indice, contagem in contagens if contagem)
+    total = sum(contagem for _, contagem in buckets)
+    if not total:
+        return None
+    
+    resumo = {'amostras': total}
+    pendentes = sorted(percentis)
+    acumulado = 0
+    for indice, contagem in buckets:
+        acumulado += contagem
+        # Posição (0-based) do quantil entre as amostras ordenadas
+        while pendentes and pendentes[0] / 100 * (total - 1) < acumulado:
+            resumo[f'p{pendentes.pop(0)}'] = round(valor_bucket(indice), 3)
+    return resumo
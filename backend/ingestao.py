@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Ingestão de Resultados em Lote
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Validação e gravação de grandes volumes de `ResultadoTeste` com INSERTs em
+lote (executemany) por blocos, dentro da transação da sessão atual.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from models import (
+    db, ExecucaoTeste, ResultadoTeste, EstatisticaTeste, FlakinessTeste, HistogramaDuracao, ClusterFalha,
+    ReferenciaArtefato, RelatorioExecucao, OcorrenciaCluster
+)
+
+# Status aceitos para um resultado de teste
+STATUS_RESULTADO = ('passou', 'falhou', 'ignorado')
+
+# Linhas por INSERT em lote
+TAMANHO_LOTE_INGESTAO = 1000
+
+# Quantidade máxima de erros de validação detalhados na resposta
+MAX_ERROS_DETALHADOS = 20
+
+# Folga para relógios adiantados em `data_execucao` (datas além disso são rejeitadas)
+TOLERANCIA_DATA_FUTURA = timedelta(days=1)
+
+class ErroValidacao(ValueError):
+    """Registro de resultado inválido"""
+
+def _texto_opcional(dados, campo, tamanho_maximo=None):
+    valor = dados.get(campo)
+    if valor is None:
+        return None
+    if not isinstance(valor, str):
+        raise ErroValidacao(f"'{campo}' deve ser texto")
+    if tamanho_maximo and len(valor) > tamanho_maximo:
+        raise ErroValidacao(f"'{campo}' excede {tamanho_maximo} caracteres")
+    return valor
+
+def validar_resultado(dados, execucao_id):
+    """Valida um registro recebido e o converte em colunas de ResultadoTeste"""
+    if not isinstance(dados, dict):
+        raise ErroValidacao('registro deve ser um objeto JSON')
+    
+    nome_teste = dados.get('nome_teste')
+    if not isinstance(nome_teste, str) or not nome_teste.strip():
+        raise ErroValidacao("'nome_teste' é obrigatório")
+    if len(nome_teste) > 200:
+        raise ErroValidacao("'nome_teste' excede 200 caracteres")
+    
+    status = dados.get('status')
+    if status not in STATUS_RESULTADO:
+        raise ErroValidacao(f"'status' deve ser um de {', '.join(STATUS_RESULTADO)}")
+    
+    tempo_execucao = dados.get('tempo_execucao')
+    if isinstance(tempo_execucao, bool) or not isinstance(tempo_execucao, (int, float)) or tempo_execucao < 0:
+        raise ErroValidacao("'tempo_execucao' deve ser um número não negativo")
+    
+    registro = {
+        'execucao_id': execucao_id,
+        'nome_teste': nome_teste,
+        'status': status,
+        'tempo_execucao': float(tempo_execucao),
+        'mensagem_erro': _texto_opcional(dados, 'mensagem_erro'),
+        'stack_trace': _texto_opcional(dados, 'stack_trace'),
+        'screenshot_path': _texto_opcional(dados, 'screenshot_path', 500)
+    }
+    
+    data_execucao = _texto_opcional(dados, 'data_execucao')
+    if data_execucao:
+        try:
+            valor = datetime.fromisoformat(data_execucao.replace('Z', '+00:00'))
+        except ValueError:
+            raise ErroValidacao("'data_execucao' deve estar em formato ISO 8601")
+        if valor.tzinfo:
+            valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+        if valor > datetime.utcnow() + TOLERANCIA_DATA_FUTURA:
+            raise ErroValidacao("'data_execucao' não pode estar no futuro")
+        registro['data_execucao'] = valor
+    else:
+        registro['data_execucao'] = datetime.utcnow()
+    
+    return registro
+
+def ler_ndjson(linhas):
+    """Itera objetos de um corpo NDJSON (linhas em bytes ou texto)"""
+    for numero, linha in enumerate(linhas, start=1):
+        if isinstance(linha, bytes):
+            linha = linha.decode('utf-8')
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError:
+            yield ErroValidacao(f'linha {numero}: JSON inválido')
+
+def inserir_resultados(execucao_id, registros, tamanho_lote=TAMANHO_LOTE_INGESTAO):
+    """Valida e insere resultados em blocos, sem confirmar a transação
+    
+    `registros` pode ser qualquer iterável (lista ou gerador de NDJSON);
+    apenas um bloco fica em memória por vez. Registros inválidos são
+    ignorados e contabilizados. Cabe ao chamador fazer commit ou rollback.
+    As estatísticas por teste (EstatisticaTeste, FlakinessTeste e
+    HistogramaDuracao) e os clusters de falhas (ClusterFalha) são
+    atualizados na mesma transação.
+    """
+    execucao = db.session.query(
+        ExecucaoTeste.id, ExecucaoTeste.tipo, ExecucaoTeste.ambiente, ExecucaoTeste.commit_hash
+    ).filter(ExecucaoTeste.id == execucao_id).first()
+    inseridos = 0
+    rejeitados = 0
+    erros = []
+    bloco = []
+    
+    for indice, dados in enumerate(registros):
+        try:
+            if isinstance(dados, ErroValidacao):
+                raise dados
+            bloco.append(validar_resultado(dados, execucao_id))
+        except ErroValidacao as e:
+            rejeitados += 1
+            if len(erros) < MAX_ERROS_DETALHADOS:
+                erros.append({'indice': indice, 'erro': str(e)})
+            continue
+        
+        if len(bloco) >= tamanho_lote:
+            inseridos += _gravar_bloco(bloco, execucao)
+            bloco = []
+    
+    if bloco:
+        inseridos += _gravar_bloco(bloco, execucao)
+    
+    return {'inseridos': inseridos, 'rejeitados': rejeitados, 'erros': erros}
+
+def remover_resultados(execucao_id):
+    """Remove os resultados de uma execução e o que depende deles, sem confirmar
+    
+    Usado antes de repetir uma execução cujo job foi recuperado após o lease
+    expirar, para que a nova tentativa não duplique os resultados gravados
+    pela anterior. Os consolidados por teste (EstatisticaTeste,
+    FlakinessTeste, HistogramaDuracao) dos testes removidos são refeitos a
+    partir dos resultados restantes na mesma transação, então a nova
+    tentativa é contabilizada como se fosse a única.
+    """
+    execucao = db.session.query(ExecucaoTeste.tipo, ExecucaoTeste.ambiente).filter(
+        ExecucaoTeste.id == execucao_id
+    ).first()
+    nomes = db.session.execute(
+        db.select(ResultadoTeste.nome_teste).where(ResultadoTeste.execucao_id == execucao_id).distinct()
+    ).scalars().all()
+    
+    resultados_ids = db.select(ResultadoTeste.id).where(ResultadoTeste.execucao_id == execucao_id)
+    db.session.execute(db.delete(ReferenciaArtefato).where(ReferenciaArtefato.resultado_id.in_(resultados_ids)))
+    for modelo in (OcorrenciaCluster, ResultadoTeste):
+        db.session.execute(db.delete(modelo).where(modelo.execucao_id == execucao_id))
+    RelatorioExecucao.invalidar(execucao_id)
+    
+    if execucao is not None and nomes:
+        EstatisticaTeste.recalcular_testes(execucao.tipo, nomes)
+        HistogramaDuracao.recalcular_testes(execucao.tipo, nomes)
+        FlakinessTeste.recalcular_testes(execucao.tipo, execucao.ambiente, nomes)
+
+def _gravar_bloco(bloco, execucao):
+    """Grava um bloco de resultados com um único INSERT em lote"""
+    if execucao is not None:
+        ClusterFalha.classificar(execucao.id, bloco)
+    db.session.execute(db.insert(ResultadoTeste), bloco)
+    if execucao is not None:
+        RelatorioExecucao.invalidar(execucao.id)
+        ReferenciaArtefato.registrar_screenshots(execucao.id, bloco)
+        EstatisticaTeste.registrar(execucao.tipo, bloco)
+        HistogramaDuracao.registrar_testes(execucao.tipo, bloco)
+        FlakinessTeste.registrar(execucao.id, execucao.tipo, execucao.ambiente, execucao.commit_hash, bloco)
+    return len(bloco)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Importação de Relatórios JUnit XML
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Leitura incremental de arquivos JUnit XML (pytest, Selenium, JMeter) com
+`iterparse`: cada <testcase> é convertido em ResultadoTeste e descartado da
+árvore logo em seguida, então a memória não cresce com o tamanho do arquivo.
+O parser é o do defusedxml: relatórios vêm de fora (upload na API), então
+expansão de entidades e referências externas são recusadas.
+"""
+
+import time
+from datetime import datetime
+from defusedxml.ElementTree import iterparse
+from models import db, ExecucaoTeste, contabilizar_criacao_execucao, contabilizar_conclusao_execucao
+from ingestao import inserir_resultados
+
+def _tag(elemento):
+    """Nome da tag sem namespace"""
+    return elemento.tag.rsplit('}', 1)[-1]
+
+def _caso_para_resultado(caso):
+    """Converte um elemento <testcase> no formato aceito pela ingestão"""
+    nome = caso.get('name', '')
+    classe = caso.get('classname')
+    nome_teste = f'{classe}::{nome}' if classe else nome
+    
+    try:
+        tempo_execucao = max(float(caso.get('time') or 0), 0.0)
+    except ValueError:
+        tempo_execucao = 0.0
+    
+    resultado = {
+        'nome_teste': nome_teste[:200],
+        'status': 'passou',
+        'tempo_execucao': tempo_execucao
+    }
+    
+    for filho in caso:
+        tag = _tag(filho)
+        if tag in ('failure', 'error'):
+            resultado['status'] = 'falhou'
+            texto = (filho.text or '').strip()
+            resultado['mensagem_erro'] = filho.get('message') or (texto.splitlines()[0] if texto else tag)
+            resultado['stack_trace'] = texto or None
+            break
+        if tag == 'skipped':
+            resultado['status'] = 'ignorado'
+            resultado['mensagem_erro'] = filho.get('message')
+    
+    return resultado
+
+def iterar_casos_junit(origem):
+    """Itera os <testcase> de um arquivo/stream JUnit XML com memória limitada
+    
+    Cada caso processado é limpo e removido do elemento pai, de modo que a
+    árvore parcial mantida pelo iterparse contém apenas o caminho atual. O
+    mesmo vale para <system-out>/<system-err> da suíte, que podem conter o
+    log inteiro da execução.
+    """
+    pilha = []
+    for evento, elemento in iterparse(origem, events=('start', 'end')):
+        if evento == 'start':
+            pilha.append(elemento)
+            continue
+        
+        pilha.pop()
+        tag = _tag(elemento)
+        pai = pilha[-1] if pilha else None
+        if tag == 'testcase':
+            yield _caso_para_resultado(elemento)
+        # Saídas de um testcase saem junto com ele; as da suíte, sozinhas
+        elif tag not in ('system-out', 'system-err') or pai is None or _tag(pai) == 'testcase':
+            continue
+        elemento.clear()
+        if pai is not None:
+            pai.remove(elemento)
+
+class ResumoCasos:
+    """Acumula duração e falhas enquanto os casos passam para a ingestão"""
+    
+    def __init__(self, casos):
+        self.casos = casos
+        self.duracao = 0.0
+        self.falhas = 0
+    
+    def __iter__(self):
+        for caso in self.casos:
+            self.duracao += caso['tempo_execucao']
+            if caso['status'] == 'falhou':
+                self.falhas += 1
+            yield caso
+
+def importar_junit(origem, tipo, ambiente, observacoes=None, commit_hash=None):
+    """Cria uma execução e importa os casos de um JUnit XML em uma transação
+    
+    Retorna o resumo da ingestão com o id da execução e a vazão (casos/s).
+    """
+    inicio = time.perf_counter()
+    
+    execucao = ExecucaoTeste(
+        tipo=tipo,
+        status='executando',
+        duracao=0,
+        ambiente=ambiente,
+        commit_hash=commit_hash,
+        observacoes=observacoes or f'Importação JUnit - {datetime.now().strftime("%d/%m/%Y %H:%M")}'
+    )
+    
+    try:
+        db.session.add(execucao)
+        db.session.flush()
+        contabilizar_criacao_execucao(execucao)
+        
+        casos = ResumoCasos(iterar_casos_junit(origem))
+        resumo = inserir_resultados(execucao.id, casos)
+        
+        status_anterior, duracao_anterior = execucao.status, execucao.duracao
+        execucao.duracao = int(round(casos.duracao))
+        execucao.status = 'falha' if casos.falhas else 'sucesso'
+        execucao.data_atualizacao = datetime.utcnow()
+        contabilizar_conclusao_execucao(execucao, status_anterior, duracao_anterior)
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    segundos = time.perf_counter() - inicio
+    processados = resumo['inseridos'] + resumo['rejeitados']
+    
+    return {
+        'execucao_id': execucao.id,
+        'status': execucao.status,
+        'duracao': execucao.duracao,
+        **resumo,
+        'tempo_importacao': round(segundos, 3),
+        'casos_por_segundo': round(processados / segundos, 1) if segundos > 0 else None
+    }
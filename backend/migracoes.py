@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Migrações de Esquema
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+`db.create_all()` cria apenas tabelas inexistentes e nunca altera as já
+criadas. As migrações abaixo atualizam bancos existentes na inicialização;
+cada uma é registrada em `versao_esquema` e deve ser idempotente.
+
+Backfills dos consolidados (reconstrução a partir do histórico) também são
+migrações: rodam uma única vez em bancos existentes, e não a cada boot. A
+inicialização roda sob `trava_inicializacao` (banco.py), então workers que
+sobem juntos não aplicam a mesma versão em paralelo.
+"""
+
+from sqlalchemy import inspect
+from models import (
+    db, VersaoEsquema, TendenciaDiaria, EstatisticaTeste, FlakinessTeste, HistogramaDuracao, ClusterFalha
+)
+from busca import reconstruir_indice_busca
+
+# Migrações registradas: (versao, descricao, funcao, usa_sessao)
+MIGRACOES = []
+
+def migracao(versao, descricao, sessao=False):
+    """Registra uma função de migração para a versão informada
+    
+    Com `sessao=True` a função não recebe conexão: usa `db.session` e faz o
+    próprio commit (backfills via `reconstruir()` dos modelos).
+    """
+    def decorador(funcao):
+        MIGRACOES.append((versao, descricao, funcao, sessao))
+        return funcao
+    return decorador
+
+def criar_indices(conexao, *nomes_tabelas):
+    """Cria os índices declarados nos modelos que ainda não existem
+    
+    Índices sobre colunas ainda não adicionadas ficam para a migração que
+    cria essas colunas.
+    """
+    for nome_tabela in nomes_tabelas:
+        tabela = db.metadata.tables[nome_tabela]
+        existentes = {indice['name'] for indice in inspect(conexao).get_indexes(nome_tabela)}
+        colunas = {coluna['name'] for coluna in inspect(conexao).get_columns(nome_tabela)}
+        for indice in tabela.indexes:
+            if indice.name not in existentes and all(coluna.name in colunas for coluna in indice.columns):
+                indice.create(conexao)
+
+def adicionar_colunas(conexao, nome_tabela, *nomes_colunas):
+    """Adiciona colunas declaradas no modelo que ainda não existem na tabela"""
+    existentes = {coluna['name'] for coluna in inspect(conexao).get_columns(nome_tabela)}
+    tabela = db.metadata.tables[nome_tabela]
+    for nome_coluna in nomes_colunas:
+        if nome_coluna in existentes:
+            continue
+        coluna = tabela.c[nome_coluna]
+        definicao = f'{coluna.name} {coluna.type.compile(dialect=conexao.dialect)}'
+        if not coluna.nullable:
+            definicao += f' NOT NULL DEFAULT {coluna.default.arg}'
+        conexao.execute(db.text(f'ALTER TABLE {nome_tabela} ADD COLUMN {definicao}'))
+
+def versao_atual():
+    """Retorna a maior versão de esquema aplicada (0 se nenhuma)"""
+    return db.session.query(db.func.max(VersaoEsquema.versao)).scalar() or 0
+
+def aplicar_migracoes(banco_novo=False):
+    """Aplica as migrações pendentes, cada uma em sua própria transação
+    
+    Em um banco recém-criado por `db.create_all()` o esquema já está na
+    versão mais recente, então as migrações são apenas registradas.
+    """
+    atual = versao_atual()
+    aplicadas = []
+    
+    for versao, descricao, funcao, sessao in sorted(MIGRACOES, key=lambda item: item[0]):
+        if versao <= atual:
+            continue
+        
+        if sessao:
+            if not banco_novo:
+                funcao()
+            db.session.add(VersaoEsquema(versao=versao, descricao=descricao))
+            db.session.commit()
+            aplicadas.append(versao)
+            continue
+        
+        with db.engine.begin() as conexao:
+            if not banco_novo:
+                funcao(conexao)
+            conexao.execute(
+                db.insert(VersaoEsquema).values(versao=versao, descricao=descricao)
+            )
+        aplicadas.append(versao)
+    
+    return aplicadas
+
+# =============================================================================
+# MIGRAÇÕES
+# =============================================================================
+
+@migracao(1, 'Índices compostos para listagens, resultados e histórico do sistema')
+def migracao_0001_indices(conexao):
+    criar_indices(conexao, 'execucoes_teste', 'resultados_teste', 'metricas_sistema')
+
+@migracao(2, 'Índice (execucao_id, id) para paginação por cursor dos resultados')
+def migracao_0002_indice_paginacao_resultados(conexao):
+    criar_indices(conexao, 'resultados_teste')
+
+@migracao(3, 'Contadores de falha com decaimento em estatisticas_testes')
+def migracao_0003_falhas_estatisticas_testes(conexao):
+    adicionar_colunas(conexao, 'estatisticas_testes', 'falhas', 'peso_execucoes', 'peso_falhas')
+    # Esvaziar: o backfill da versão 8 reconstrói as estatísticas já com os pesos
+    conexao.execute(db.delete(db.metadata.tables['estatisticas_testes']))
+
+@migracao(4, 'Commit testado em execucoes_teste (detecção de testes flaky)')
+def migracao_0004_commit_execucoes(conexao):
+    adicionar_colunas(conexao, 'execucoes_teste', 'commit_hash')
+
+@migracao(5, 'Índice de busca textual em mensagens de erro e stack traces')
+def migracao_0005_indice_busca_resultados(conexao):
+    reconstruir_indice_busca(conexao)
+
+@migracao(6, 'Cluster de falha em resultados_teste')
+def migracao_0006_cluster_resultados(conexao):
+    adicionar_colunas(conexao, 'resultados_teste', 'cluster_id')
+    criar_indices(conexao, 'resultados_teste')
+
+# Backfills: bancos criados antes de cada consolidado (ou da regra atual)
+
+@migracao(7, 'Backfill do consolidado diário de execuções', sessao=True)
+def migracao_0007_backfill_tendencias():
+    TendenciaDiaria.reconstruir()
+
+@migracao(8, 'Backfill das estatísticas por teste (duração e falhas com decaimento)', sessao=True)
+def migracao_0008_backfill_estatisticas_testes():
+    EstatisticaTeste.reconstruir()
+
+@migracao(9, 'Backfill da flakiness (apenas execuções com commit)', sessao=True)
+def migracao_0009_backfill_flakiness():
+    FlakinessTeste.reconstruir()
+
+@migracao(10, 'Backfill dos histogramas de duração', sessao=True)
+def migracao_0010_backfill_histogramas():
+    HistogramaDuracao.reconstruir()
+
+@migracao(11, 'Backfill dos clusters de falhas', sessao=True)
+def migracao_0011_backfill_clusters():
+    ClusterFalha.reconstruir()
+
+@migracao(12, 'Flakiness e sequências por (tipo, ambiente) em vez de nome global')
+def migracao_0012_flakiness_por_tipo_ambiente(conexao):
+    # O SQLite não altera restrições únicas: as tabelas são recriadas vazias
+    # e o backfill da versão 13 as preenche com a chave nova
+    for nome_tabela in ('flakiness_testes', 'sequencias_testes'):
+        tabela = db.metadata.tables[nome_tabela]
+        tabela.drop(conexao, checkfirst=True)
+        tabela.create(conexao)
+
+@migracao(13, 'Backfill da flakiness por (tipo, ambiente)', sessao=True)
+def migracao_0013_backfill_flakiness_por_tipo_ambiente():
+    FlakinessTeste.reconstruir()
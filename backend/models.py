@@ -8,21 +8,65 @@ Modelos SQLAlchemy para gerenciamento de dados do dashboard.
 """
 
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
 import json
 import psutil
+from histogramas import indice_bucket, quantis
+from banco import SessaoRoteada
+from agrupamento import assinatura_falha, hash_assinatura, minhash, bandas, similaridade, LIMIAR_SIMILARIDADE
 
-db = SQLAlchemy()
+# Sessão que envia os SELECTs de GET/HEAD ao engine de leitura (banco.py)
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+# Contadores de uma execução sem resultados registrados
+CONTAGEM_VAZIA = {'total_testes': 0, 'testes_passaram': 0, 'testes_falharam': 0}
+
+# Prefixo das URLs de download de artefatos (screenshot_path de resultados)
+URL_ARTEFATOS = '/api/artefatos/'
+
+# Decaimento das estatísticas de falha por teste: um resultado vale metade
+# a cada MEIA_VIDA_FALHAS_DIAS. Os pesos crescem a partir de uma época em vez
+# de decair, então o acumulado é uma simples soma (upsert aditivo) e a razão
+# peso_falhas / peso_execucoes já é a taxa ponderada pela recência. A época
+# inicial é EPOCA_DECAIMENTO; EpocaDecaimento a avança antes que os pesos
+# se aproximem do limite do float (2 ** 1024).
+EPOCA_DECAIMENTO = date(2024, 1, 1)
+MEIA_VIDA_FALHAS_DIAS = 14
+
+# Dias máximos entre a época e hoje (peso ~2 ** 520)
+LIMITE_EPOCA_DIAS = 20 * 365
+
+def peso_recencia(dia, epoca=EPOCA_DECAIMENTO):
+    """Peso de um resultado do dia (date ou datetime) no acumulado com decaimento"""
+    if isinstance(dia, datetime):
+        dia = dia.date()
+    return 2.0 ** ((dia - epoca).days / MEIA_VIDA_FALHAS_DIAS)
+
+def insert_com_upsert():
+    """Retorna o `insert` do dialeto atual, que suporta on_conflict_do_update"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
 
 class ExecucaoTeste(db.Model):
     """Modelo para execuções de testes"""
     __tablename__ = 'execucoes_teste'
+    __table_args__ = (
+        # listar_execucoes: filtros por tipo/status ordenados por data_criacao
+        db.Index('ix_execucoes_teste_data_criacao', 'data_criacao'),
+        db.Index('ix_execucoes_teste_tipo_data_criacao', 'tipo', 'data_criacao'),
+        db.Index('ix_execucoes_teste_status_data_criacao', 'status', 'data_criacao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(50), nullable=False)  # web, api, performance, integracao
     status = db.Column(db.String(20), nullable=False)  # sucesso, falha, executando, pendente
     duracao = db.Column(db.Integer, nullable=False)  # em segundos
     ambiente = db.Column(db.String(50), nullable=False)  # desenvolvimento, homologacao, producao
+    commit_hash = db.Column(db.String(40))  # commit testado (agrupa a detecção de flaky)
     observacoes = db.Column(db.Text)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -30,70 +74,149 @@ class ExecucaoTeste(db.Model):
     # Relacionamento com resultados
     resultados = db.relationship('ResultadoTeste', backref='execucao', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Converte o objeto para dicionário"""
+    def to_dict(self, contagens=None):
+        """Converte o objeto para dicionário
+        
+        `contagens` recebe os contadores já agregados (ver `contar_resultados`);
+        se omitido, eles são obtidos com uma única consulta agregada.
+        """
+        if contagens is None:
+            contagens = self.contar_resultados([self.id]).get(self.id, CONTAGEM_VAZIA)
+        
         return {
             'id': self.id,
             'tipo': self.tipo,
             'status': self.status,
             'duracao': self.duracao,
             'ambiente': self.ambiente,
+            'commit_hash': self.commit_hash,
             'observacoes': self.observacoes,
             'data_criacao': self.data_criacao.isoformat(),
             'data_atualizacao': self.data_atualizacao.isoformat(),
-            'total_testes': len(self.resultados),
-            'testes_passaram': len([r for r in self.resultados if r.status == 'passou']),
-            'testes_falharam': len([r for r in self.resultados if r.status == 'falhou'])
+            'total_testes': contagens['total_testes'],
+            'testes_passaram': contagens['testes_passaram'],
+            'testes_falharam': contagens['testes_falharam']
         }
     
+    @staticmethod
+    def contar_resultados(execucao_ids):
+        """Retorna {execucao_id: contadores} com uma única consulta agrupada"""
+        if not execucao_ids:
+            return {}
+        
+        linhas = db.session.query(
+            ResultadoTeste.execucao_id,
+            db.func.count(ResultadoTeste.id).label('total_testes'),
+            db.func.sum(db.case((ResultadoTeste.status == 'passou', 1), else_=0)).label('testes_passaram'),
+            db.func.sum(db.case((ResultadoTeste.status == 'falhou', 1), else_=0)).label('testes_falharam')
+        ).filter(
+            ResultadoTeste.execucao_id.in_(execucao_ids)
+        ).group_by(ResultadoTeste.execucao_id).all()
+        
+        return {
+            linha.execucao_id: {
+                'total_testes': linha.total_testes,
+                'testes_passaram': linha.testes_passaram or 0,
+                'testes_falharam': linha.testes_falharam or 0
+            }
+            for linha in linhas
+        }
+    
+    @classmethod
+    def serializar_lista(cls, execucoes):
+        """Serializa uma página de execuções sem carregar os resultados (evita N+1)"""
+        contagens = cls.contar_resultados([execucao.id for execucao in execucoes])
+        return [
+            execucao.to_dict(contagens.get(execucao.id, CONTAGEM_VAZIA))
+            for execucao in execucoes
+        ]
+    
     @classmethod
     def get_metricas_gerais(cls):
         """Retorna métricas gerais das execuções"""
-        total_execucoes = cls.query.count()
-        execucoes_sucesso = cls.query.filter_by(status='sucesso').count()
-        execucoes_falha = cls.query.filter_by(status='falha').count()
+        return cls.get_metricas_agrupadas()['gerais']
+    
+    @classmethod
+    def get_metricas_agrupadas(cls):
+        """Retorna todas as métricas agregadas do dashboard em uma única varredura
         
-        taxa_sucesso = (execucoes_sucesso / total_execucoes * 100) if total_execucoes > 0 else 0
+        Uma só consulta agrupada por (tipo, status, ambiente) alimenta as
+        métricas gerais e as distribuições por status, ambiente e tipo.
+        """
+        linhas = db.session.query(
+            cls.tipo,
+            cls.status,
+            cls.ambiente,
+            db.func.count(cls.id).label('quantidade'),
+            db.func.coalesce(db.func.sum(cls.duracao), 0).label('duracao_total')
+        ).group_by(cls.tipo, cls.status, cls.ambiente).all()
+        
+        por_status = {}
+        por_ambiente = {}
+        por_tipo = {}
+        for linha in linhas:
+            por_status[linha.status] = por_status.get(linha.status, 0) + linha.quantidade
+            por_ambiente[linha.ambiente] = por_ambiente.get(linha.ambiente, 0) + linha.quantidade
+            
+            tipo = por_tipo.setdefault(linha.tipo, {'quantidade': 0, 'duracao_total': 0})
+            tipo['quantidade'] += linha.quantidade
+            tipo['duracao_total'] += linha.duracao_total
         
-        # Tempo médio de execução
-        tempo_medio = db.session.query(db.func.avg(cls.duracao)).scalar() or 0
+        total_execucoes = sum(por_status.values())
+        execucoes_sucesso = por_status.get('sucesso', 0)
+        execucoes_falha = por_status.get('falha', 0)
+        duracao_total = sum(tipo['duracao_total'] for tipo in por_tipo.values())
+        
+        taxa_sucesso = (execucoes_sucesso / total_execucoes * 100) if total_execucoes > 0 else 0
+        tempo_medio = (duracao_total / total_execucoes) if total_execucoes > 0 else 0
         
         return {
-            'total_execucoes': total_execucoes,
-            'taxa_sucesso': round(taxa_sucesso, 2),
-            'execucoes_sucesso': execucoes_sucesso,
-            'execucoes_falha': execucoes_falha,
-            'tempo_medio': round(tempo_medio, 2)
+            'gerais': {
+                'total_execucoes': total_execucoes,
+                'taxa_sucesso': round(taxa_sucesso, 2),
+                'execucoes_sucesso': execucoes_sucesso,
+                'execucoes_falha': execucoes_falha,
+                'tempo_medio': round(tempo_medio, 2)
+            },
+            'por_status': por_status,
+            'por_ambiente': por_ambiente,
+            'por_tipo': {
+                nome: {
+                    'quantidade': dados['quantidade'],
+                    'tempo_medio': round(dados['duracao_total'] / dados['quantidade'], 2)
+                }
+                for nome, dados in sorted(por_tipo.items())
+            }
         }
     
     @classmethod
     def get_tendencias(cls, dias=30):
-        """Retorna dados de tendências dos últimos N dias"""
-        data_inicio = datetime.utcnow() - timedelta(days=dias)
-        execucoes = cls.query.filter(cls.data_criacao >= data_inicio).all()
-        
-        # Agrupar por data
-        dados_por_data = {}
-        for execucao in execucoes:
-            data = execucao.data_criacao.date()
-            if data not in dados_por_data:
-                dados_por_data[data] = {'total': 0, 'sucesso': 0, 'tempo_total': 0}
-            
-            dados_por_data[data]['total'] += 1
-            if execucao.status == 'sucesso':
-                dados_por_data[data]['sucesso'] += 1
-            dados_por_data[data]['tempo_total'] += execucao.duracao
+        """Retorna dados de tendências dos últimos N dias
+        
+        Lê o consolidado diário (`TendenciaDiaria`), portanto o custo depende
+        do número de dias e não do número de execuções.
+        """
+        data_inicio = (datetime.utcnow() - timedelta(days=dias)).date()
+        
+        dados_por_data = db.session.query(
+            TendenciaDiaria.data,
+            db.func.sum(TendenciaDiaria.total).label('total'),
+            db.func.sum(TendenciaDiaria.sucesso).label('sucesso'),
+            db.func.sum(TendenciaDiaria.duracao_total).label('tempo_total')
+        ).filter(
+            TendenciaDiaria.data >= data_inicio
+        ).group_by(TendenciaDiaria.data).order_by(TendenciaDiaria.data).all()
         
         # Preparar dados para o gráfico
-        datas = sorted(dados_por_data.keys())
+        datas = []
         sucesso_rates = []
         tempos_medios = []
         
-        for data in datas:
-            dados = dados_por_data[data]
-            sucesso_rate = (dados['sucesso'] / dados['total'] * 100) if dados['total'] > 0 else 0
-            tempo_medio = dados['tempo_total'] / dados['total'] if dados['total'] > 0 else 0
+        for dados in dados_por_data:
+            sucesso_rate = (dados.sucesso / dados.total * 100) if dados.total > 0 else 0
+            tempo_medio = dados.tempo_total / dados.total if dados.total > 0 else 0
             
+            datas.append(dados.data)
             sucesso_rates.append(round(sucesso_rate, 2))
             tempos_medios.append(round(tempo_medio, 2))
         
@@ -103,9 +226,103 @@ class ExecucaoTeste(db.Model):
             'tempo': tempos_medios
         }
 
+class TendenciaDiaria(db.Model):
+    """Consolidado diário de execuções por tipo e ambiente
+    
+    Mantido incrementalmente na mesma transação que cria ou finaliza a
+    execução; `reconstruir` recalcula tudo a partir de `execucoes_teste`.
+    Quem cria ou finaliza execuções usa `contabilizar_criacao_execucao` e
+    `contabilizar_conclusao_execucao`, que também atualizam o histograma de
+    duração (HistogramaDuracao).
+    """
+    __tablename__ = 'tendencias_diarias'
+    __table_args__ = (
+        db.UniqueConstraint('data', 'tipo', 'ambiente', name='uq_tendencias_diarias_data_tipo_ambiente'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    ambiente = db.Column(db.String(50), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sucesso = db.Column(db.Integer, nullable=False, default=0)
+    duracao_total = db.Column(db.BigInteger, nullable=False, default=0)  # em segundos
+    
+    @classmethod
+    def registrar_criacao(cls, execucao):
+        """Contabiliza uma execução recém-criada (chamar após o flush)"""
+        cls._incrementar(
+            execucao,
+            total=1,
+            sucesso=1 if execucao.status == 'sucesso' else 0,
+            duracao=execucao.duracao or 0
+        )
+    
+    @classmethod
+    def registrar_conclusao(cls, execucao, status_anterior, duracao_anterior):
+        """Aplica a diferença entre o estado anterior e o final de uma execução"""
+        sucesso = (1 if execucao.status == 'sucesso' else 0) - (1 if status_anterior == 'sucesso' else 0)
+        duracao = (execucao.duracao or 0) - (duracao_anterior or 0)
+        if sucesso or duracao:
+            cls._incrementar(execucao, sucesso=sucesso, duracao=duracao)
+    
+    @classmethod
+    def _incrementar(cls, execucao, total=0, sucesso=0, duracao=0):
+        """Upsert atômico do contador do dia/tipo/ambiente da execução"""
+        insert = insert_com_upsert()
+        tabela = cls.__table__
+        comando = insert(tabela).values(
+            data=execucao.data_criacao.date(),
+            tipo=execucao.tipo,
+            ambiente=execucao.ambiente,
+            total=total,
+            sucesso=sucesso,
+            duracao_total=duracao
+        )
+        comando = comando.on_conflict_do_update(
+            index_elements=['data', 'tipo', 'ambiente'],
+            set_={
+                'total': tabela.c.total + comando.excluded.total,
+                'sucesso': tabela.c.sucesso + comando.excluded.sucesso,
+                'duracao_total': tabela.c.duracao_total + comando.excluded.duracao_total
+            }
+        )
+        db.session.execute(comando)
+    
+    @classmethod
+    def reconstruir(cls):
+        """Recalcula todo o consolidado a partir das execuções (backfill)"""
+        data = db.func.date(ExecucaoTeste.data_criacao)
+        origem = db.select(
+            data,
+            ExecucaoTeste.tipo,
+            ExecucaoTeste.ambiente,
+            db.func.count(ExecucaoTeste.id),
+            db.func.sum(db.case((ExecucaoTeste.status == 'sucesso', 1), else_=0)),
+            db.func.coalesce(db.func.sum(ExecucaoTeste.duracao), 0)
+        ).group_by(data, ExecucaoTeste.tipo, ExecucaoTeste.ambiente)
+        
+        db.session.execute(db.delete(cls))
+        db.session.execute(
+            db.insert(cls).from_select(
+                ['data', 'tipo', 'ambiente', 'total', 'sucesso', 'duracao_total'],
+                origem
+            )
+        )
+        db.session.commit()
+        return cls.query.count()
+
 class ResultadoTeste(db.Model):
     """Modelo para resultados individuais de testes"""
     __tablename__ = 'resultados_teste'
+    __table_args__ = (
+        # Resultados por execução; inclui status para contar sem ler a tabela
+        db.Index('ix_resultados_teste_execucao_status', 'execucao_id', 'status'),
+        # Paginação por cursor dos resultados de uma execução
+        db.Index('ix_resultados_teste_execucao_id', 'execucao_id', 'id'),
+        # Resultados de um cluster de falhas (mais recentes primeiro)
+        db.Index('ix_resultados_teste_cluster_id', 'cluster_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     execucao_id = db.Column(db.Integer, db.ForeignKey('execucoes_teste.id'), nullable=False)
@@ -116,6 +333,7 @@ class ResultadoTeste(db.Model):
     stack_trace = db.Column(db.Text)
     screenshot_path = db.Column(db.String(500))
     data_execucao = db.Column(db.DateTime, default=datetime.utcnow)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters_falhas.id'))  # falhas com erro (ver ClusterFalha)
     
     def to_dict(self):
         """Converte o objeto para dicionário"""
@@ -128,9 +346,1073 @@ class ResultadoTeste(db.Model):
             'mensagem_erro': self.mensagem_erro,
             'stack_trace': self.stack_trace,
             'screenshot_path': self.screenshot_path,
-            'data_execucao': self.data_execucao.isoformat()
+            'data_execucao': self.data_execucao.isoformat(),
+            'cluster_id': self.cluster_id
+        }
+    
+    @classmethod
+    def get_estatisticas(cls, execucao_id):
+        """Estatísticas dos resultados de uma execução em uma única consulta agregada"""
+        linha = db.session.query(
+            db.func.count(cls.id).label('total_testes'),
+            db.func.sum(db.case((cls.status == 'passou', 1), else_=0)).label('testes_passaram'),
+            db.func.sum(db.case((cls.status == 'falhou', 1), else_=0)).label('testes_falharam'),
+            db.func.sum(db.case((cls.status == 'ignorado', 1), else_=0)).label('testes_ignorados'),
+            db.func.coalesce(db.func.sum(cls.tempo_execucao), 0).label('tempo_total')
+        ).filter(cls.execucao_id == execucao_id).one()
+        
+        total_testes = linha.total_testes
+        testes_passaram = linha.testes_passaram or 0
+        
+        return {
+            'total_testes': total_testes,
+            'testes_passaram': testes_passaram,
+            'testes_falharam': linha.testes_falharam or 0,
+            'testes_ignorados': linha.testes_ignorados or 0,
+            'taxa_sucesso': (testes_passaram / total_testes * 100) if total_testes > 0 else 0,
+            'tempo_total': round(linha.tempo_total, 2)
+        }
+
+class EstatisticaTeste(db.Model):
+    """Estatísticas históricas por teste (tipo da execução, nome_teste)
+    
+    Atualizadas incrementalmente a cada bloco de resultados ingerido (ver
+    ingestao.py); `reconstruir` recalcula tudo a partir de `resultados_teste`.
+    Testes ignorados contam em `execucoes`, mas não entram na duração nem nas
+    taxas de falha. `peso_*` são somas ponderadas por `peso_recencia`.
+    """
+    __tablename__ = 'estatisticas_testes'
+    __table_args__ = (
+        db.UniqueConstraint('tipo', 'nome_teste', name='uq_estatisticas_testes_tipo_nome'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    nome_teste = db.Column(db.String(200), nullable=False)
+    execucoes = db.Column(db.Integer, nullable=False, default=0)
+    execucoes_cronometradas = db.Column(db.Integer, nullable=False, default=0)
+    tempo_total = db.Column(db.Float, nullable=False, default=0)  # em segundos
+    falhas = db.Column(db.Integer, nullable=False, default=0)
+    peso_execucoes = db.Column(db.Float, nullable=False, default=0)
+    peso_falhas = db.Column(db.Float, nullable=False, default=0)
+    ultima_execucao = db.Column(db.DateTime)
+    
+    # Colunas acumuladas pelo upsert (somadas ao valor existente)
+    ACUMULADAS = ('execucoes', 'execucoes_cronometradas', 'tempo_total', 'falhas', 'peso_execucoes', 'peso_falhas')
+    
+    @property
+    def tempo_medio(self):
+        if not self.execucoes_cronometradas:
+            return None
+        return self.tempo_total / self.execucoes_cronometradas
+    
+    @property
+    def taxa_falha_recente(self):
+        """Taxa de falha ponderada pela recência (None sem execuções)"""
+        if not self.peso_execucoes:
+            return None
+        return self.peso_falhas / self.peso_execucoes
+    
+    @classmethod
+    def registrar(cls, tipo, resultados):
+        """Acumula um bloco de resultados validados (um upsert por teste)"""
+        epoca = EpocaDecaimento.para_gravacao()
+        acumulado = {}
+        for resultado in resultados:
+            linha = acumulado.get(resultado['nome_teste'])
+            if linha is None:
+                linha = acumulado[resultado['nome_teste']] = cls._linha_vazia(tipo, resultado['nome_teste'])
+            
+            cls._acumular(
+                linha,
+                execucoes=1,
+                cronometradas=0 if resultado['status'] == 'ignorado' else 1,
+                tempo=0 if resultado['status'] == 'ignorado' else resultado['tempo_execucao'],
+                falhas=1 if resultado['status'] == 'falhou' else 0,
+                peso=peso_recencia(resultado['data_execucao'], epoca),
+                ultima_execucao=resultado['data_execucao']
+            )
+        
+        cls._gravar(acumulado.values())
+    
+    @staticmethod
+    def _linha_vazia(tipo, nome_teste):
+        return {
+            'tipo': tipo,
+            'nome_teste': nome_teste,
+            'execucoes': 0,
+            'execucoes_cronometradas': 0,
+            'tempo_total': 0.0,
+            'falhas': 0,
+            'peso_execucoes': 0.0,
+            'peso_falhas': 0.0,
+            'ultima_execucao': None
+        }
+    
+    @staticmethod
+    def _acumular(linha, execucoes, cronometradas, tempo, falhas, peso, ultima_execucao):
+        linha['execucoes'] += execucoes
+        linha['execucoes_cronometradas'] += cronometradas
+        linha['tempo_total'] += tempo
+        linha['falhas'] += falhas
+        linha['peso_execucoes'] += cronometradas * peso
+        linha['peso_falhas'] += falhas * peso
+        if linha['ultima_execucao'] is None or ultima_execucao > linha['ultima_execucao']:
+            linha['ultima_execucao'] = ultima_execucao
+    
+    @classmethod
+    def _gravar(cls, linhas):
+        """Upsert em lote somando os acumulados às linhas existentes"""
+        linhas = list(linhas)
+        if not linhas:
+            return
+        
+        insert = insert_com_upsert()
+        tabela = cls.__table__
+        comando = insert(tabela)
+        comando = comando.on_conflict_do_update(
+            index_elements=['tipo', 'nome_teste'],
+            set_={
+                **{coluna: tabela.c[coluna] + comando.excluded[coluna] for coluna in cls.ACUMULADAS},
+                'ultima_execucao': db.case(
+                    (db.or_(
+                        tabela.c.ultima_execucao.is_(None),
+                        comando.excluded.ultima_execucao > tabela.c.ultima_execucao
+                    ), comando.excluded.ultima_execucao),
+                    else_=tabela.c.ultima_execucao
+                )
+            }
+        )
+        db.session.execute(comando, linhas)
+    
+    @classmethod
+    def reconstruir(cls):
+        """Recalcula todas as estatísticas a partir dos resultados (backfill)
+        
+        Agrega por teste e dia no banco; os pesos de recência são aplicados
+        por dia, como na atualização incremental.
+        """
+        db.session.execute(db.delete(cls))
+        # Tabela vazia: a época pode ir para hoje sem reescalar nada
+        epoca = datetime.utcnow().date()
+        EpocaDecaimento.definir(epoca)
+        linhas = cls._agregar_historico(epoca)
+        for inicio in range(0, len(linhas), 1000):
+            db.session.execute(db.insert(cls), linhas[inicio:inicio + 1000])
+        db.session.commit()
+        return len(linhas)
+    
+    @classmethod
+    def recalcular_testes(cls, tipo, nomes, tamanho_lote=500):
+        """Refaz, sem confirmar, as linhas de `nomes` a partir dos resultados atuais
+        
+        Usado quando resultados já contabilizados são removidos. Os pesos usam
+        a época vigente, a mesma das demais linhas da tabela.
+        """
+        epoca = EpocaDecaimento.atual()
+        nomes = list(nomes)
+        for inicio in range(0, len(nomes), tamanho_lote):
+            lote = nomes[inicio:inicio + tamanho_lote]
+            db.session.execute(db.delete(cls).where(cls.tipo == tipo, cls.nome_teste.in_(lote)))
+            linhas = cls._agregar_historico(
+                epoca, ExecucaoTeste.tipo == tipo, ResultadoTeste.nome_teste.in_(lote)
+            )
+            if linhas:
+                db.session.execute(db.insert(cls), linhas)
+    
+    @classmethod
+    def _agregar_historico(cls, epoca, *filtros):
+        """Linhas agregadas dos resultados gravados (por teste e dia no banco)"""
+        cronometrado = ResultadoTeste.status != 'ignorado'
+        dia = db.func.date(ResultadoTeste.data_execucao)
+        consulta = db.select(
+            ExecucaoTeste.tipo,
+            ResultadoTeste.nome_teste,
+            dia,
+            db.func.count(ResultadoTeste.id),
+            db.func.sum(db.case((cronometrado, 1), else_=0)),
+            db.func.coalesce(db.func.sum(db.case((cronometrado, ResultadoTeste.tempo_execucao), else_=0)), 0),
+            db.func.sum(db.case((ResultadoTeste.status == 'falhou', 1), else_=0)),
+            db.func.max(ResultadoTeste.data_execucao)
+        ).join(ExecucaoTeste, ExecucaoTeste.id == ResultadoTeste.execucao_id).where(*filtros).group_by(
+            ExecucaoTeste.tipo, ResultadoTeste.nome_teste, dia
+        )
+        
+        acumulado = {}
+        for tipo, nome_teste, dia_execucao, execucoes, cronometradas, tempo, falhas, ultima in db.session.execute(consulta):
+            linha = acumulado.get((tipo, nome_teste))
+            if linha is None:
+                linha = acumulado[(tipo, nome_teste)] = cls._linha_vazia(tipo, nome_teste)
+            if isinstance(dia_execucao, str):
+                dia_execucao = date.fromisoformat(dia_execucao)
+            if isinstance(ultima, str):
+                ultima = datetime.fromisoformat(ultima)
+            cls._acumular(linha, execucoes, cronometradas, tempo, falhas, peso_recencia(dia_execucao, epoca), ultima)
+        return list(acumulado.values())
+
+class EpocaDecaimento(db.Model):
+    """Época dos pesos de recência de `estatisticas_testes` (linha única)
+    
+    Sem linha, a época é EPOCA_DECAIMENTO. Quando hoje passa de
+    LIMITE_EPOCA_DIAS após a época, `para_gravacao` a move para hoje e
+    reescala os pesos gravados; as razões entre eles não mudam.
+    """
+    __tablename__ = 'epoca_decaimento'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    epoca = db.Column(db.Date, nullable=False)
+    
+    @classmethod
+    def atual(cls):
+        epoca = db.session.scalar(db.select(cls.epoca).where(cls.id == 1))
+        return epoca or EPOCA_DECAIMENTO
+    
+    @classmethod
+    def definir(cls, epoca):
+        comando = insert_com_upsert()(cls.__table__).values(id=1, epoca=epoca)
+        db.session.execute(comando.on_conflict_do_update(index_elements=['id'], set_={'epoca': epoca}))
+    
+    @classmethod
+    def para_gravacao(cls):
+        """Época para novos pesos, avançada (com os acumulados reescalados) se antiga demais"""
+        epoca = cls.atual()
+        hoje = datetime.utcnow().date()
+        dias = (hoje - epoca).days
+        if dias > LIMITE_EPOCA_DIAS:
+            fator = 2.0 ** (-dias / MEIA_VIDA_FALHAS_DIAS)
+            db.session.execute(db.update(EstatisticaTeste).values(
+                peso_execucoes=EstatisticaTeste.peso_execucoes * fator,
+                peso_falhas=EstatisticaTeste.peso_falhas * fator
+            ))
+            cls.definir(hoje)
+            epoca = hoje
+        return epoca
+
+class SequenciaTeste(db.Model):
+    """Último status de cada teste por (tipo, ambiente, commit) para detectar alternâncias
+    
+    Execuções sem commit informado não entram: sem commit não há como saber
+    se uma mudança de status é instabilidade ou uma correção/regressão.
+    """
+    __tablename__ = 'sequencias_testes'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'tipo', 'ambiente', 'commit_hash', 'nome_teste', name='uq_sequencias_testes_tipo_ambiente_commit_nome'
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nome_teste = db.Column(db.String(200), nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    ambiente = db.Column(db.String(50), nullable=False)
+    commit_hash = db.Column(db.String(40), nullable=False, default='')
+    ultimo_status = db.Column(db.String(20), nullable=False)
+    ultima_execucao_id = db.Column(db.Integer)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+class FlakinessTeste(db.Model):
+    """Alternâncias passou/falhou de cada teste entre execuções consecutivas
+    
+    Cada resultado (exceto ignorado) é comparado com o anterior do mesmo
+    teste no mesmo tipo, ambiente e commit; `score` é a taxa de alternância
+    (transicoes / comparacoes). Uma linha por (tipo, ambiente, nome_teste),
+    com a mesma chave das sequências sem o commit: um teste instável só em
+    homologação não contamina o score de produção. Atualizado
+    incrementalmente na ingestão. Execuções sem commit_hash são ignoradas.
+    """
+    __tablename__ = 'flakiness_testes'
+    __table_args__ = (
+        db.UniqueConstraint('tipo', 'ambiente', 'nome_teste', name='uq_flakiness_testes_tipo_ambiente_nome'),
+        # Ranking do /analytics/flaky (paginação por score, id)
+        db.Index('ix_flakiness_testes_score_id', 'score', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nome_teste = db.Column(db.String(200), nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    ambiente = db.Column(db.String(50), nullable=False)
+    comparacoes = db.Column(db.Integer, nullable=False, default=0)
+    transicoes = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Float, nullable=False, default=0)
+    ultima_transicao = db.Column(db.DateTime)
+    
+    # Nomes consultados por vez na tabela de sequências
+    LOTE_CONSULTA = 500
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'nome_teste': self.nome_teste,
+            'tipo': self.tipo,
+            'ambiente': self.ambiente,
+            'score': round(self.score, 4),
+            'comparacoes': self.comparacoes,
+            'transicoes': self.transicoes,
+            'ultima_transicao': self.ultima_transicao.isoformat() if self.ultima_transicao else None
+        }
+    
+    @classmethod
+    def registrar(cls, execucao_id, tipo, ambiente, commit_hash, resultados):
+        """Compara um bloco de resultados de uma execução com a sequência anterior"""
+        if not commit_hash:
+            return
+        por_teste = {}
+        for resultado in resultados:
+            if resultado['status'] != 'ignorado':
+                por_teste.setdefault(resultado['nome_teste'], []).append(resultado)
+        if not por_teste:
+            return
+        
+        nomes = list(por_teste)
+        anteriores = {}
+        for inicio in range(0, len(nomes), cls.LOTE_CONSULTA):
+            anteriores.update(db.session.query(SequenciaTeste.nome_teste, SequenciaTeste.ultimo_status).filter(
+                SequenciaTeste.tipo == tipo,
+                SequenciaTeste.ambiente == ambiente,
+                SequenciaTeste.commit_hash == commit_hash,
+                SequenciaTeste.nome_teste.in_(nomes[inicio:inicio + cls.LOTE_CONSULTA])
+            ).all())
+        
+        agora = datetime.utcnow()
+        sequencias = []
+        contagens = []
+        for nome, resultados_teste in por_teste.items():
+            anterior = anteriores.get(nome)
+            comparacoes = transicoes = 0
+            ultima_transicao = None
+            for resultado in resultados_teste:
+                if anterior is not None:
+                    comparacoes += 1
+                    if resultado['status'] != anterior:
+                        transicoes += 1
+                        ultima_transicao = resultado['data_execucao']
+                anterior = resultado['status']
+            
+            sequencias.append({
+                'nome_teste': nome, 'tipo': tipo, 'ambiente': ambiente, 'commit_hash': commit_hash,
+                'ultimo_status': anterior, 'ultima_execucao_id': execucao_id, 'atualizado_em': agora
+            })
+            if comparacoes:
+                contagens.append({
+                    'nome_teste': nome, 'tipo': tipo, 'ambiente': ambiente,
+                    'comparacoes': comparacoes, 'transicoes': transicoes,
+                    'score': transicoes / comparacoes, 'ultima_transicao': ultima_transicao
+                })
+        
+        insert = insert_com_upsert()
+        comando = insert(SequenciaTeste.__table__)
+        comando = comando.on_conflict_do_update(
+            index_elements=['tipo', 'ambiente', 'commit_hash', 'nome_teste'],
+            set_={coluna: comando.excluded[coluna] for coluna in ('ultimo_status', 'ultima_execucao_id', 'atualizado_em')}
+        )
+        db.session.execute(comando, sequencias)
+        
+        if contagens:
+            tabela = cls.__table__
+            comando = insert(tabela)
+            comando = comando.on_conflict_do_update(
+                index_elements=['tipo', 'ambiente', 'nome_teste'],
+                set_={
+                    'comparacoes': tabela.c.comparacoes + comando.excluded.comparacoes,
+                    'transicoes': tabela.c.transicoes + comando.excluded.transicoes,
+                    'score': db.cast(tabela.c.transicoes + comando.excluded.transicoes, db.Float)
+                             / (tabela.c.comparacoes + comando.excluded.comparacoes),
+                    'ultima_transicao': db.func.coalesce(comando.excluded.ultima_transicao, tabela.c.ultima_transicao)
+                }
+            )
+            db.session.execute(comando, contagens)
+    
+    @classmethod
+    def reconstruir(cls, tamanho_lote=1000):
+        """Recalcula sequências e alternâncias reprocessando todos os resultados em ordem"""
+        db.session.execute(db.delete(SequenciaTeste))
+        db.session.execute(db.delete(cls))
+        cls._reprocessar(tamanho_lote)
+        db.session.commit()
+        return cls.query.count()
+    
+    @classmethod
+    def recalcular_testes(cls, tipo, ambiente, nomes, tamanho_lote=500):
+        """Refaz, sem confirmar, sequências e alternâncias de `nomes` em (tipo, ambiente)
+        
+        Usado quando resultados já contabilizados são removidos: os
+        resultados restantes desses testes são reprocessados em ordem.
+        """
+        nomes = list(nomes)
+        for inicio in range(0, len(nomes), tamanho_lote):
+            lote = nomes[inicio:inicio + tamanho_lote]
+            for modelo in (SequenciaTeste, cls):
+                db.session.execute(db.delete(modelo).where(
+                    modelo.tipo == tipo, modelo.ambiente == ambiente, modelo.nome_teste.in_(lote)
+                ))
+            cls._reprocessar(
+                tamanho_lote, ExecucaoTeste.tipo == tipo, ExecucaoTeste.ambiente == ambiente,
+                ResultadoTeste.nome_teste.in_(lote)
+            )
+    
+    @classmethod
+    def _reprocessar(cls, tamanho_lote, *filtros):
+        """Registra os resultados com commit que atendem `filtros`, na ordem de gravação"""
+        consulta = db.select(
+            ResultadoTeste.execucao_id, ExecucaoTeste.tipo, ExecucaoTeste.ambiente, ExecucaoTeste.commit_hash,
+            ResultadoTeste.nome_teste, ResultadoTeste.status, ResultadoTeste.data_execucao
+        ).join(ExecucaoTeste, ExecucaoTeste.id == ResultadoTeste.execucao_id).where(
+            ExecucaoTeste.commit_hash.is_not(None), ExecucaoTeste.commit_hash != '', *filtros
+        ).order_by(ResultadoTeste.id)
+        
+        # Resultados lidos em lotes e registrados por execução, na ordem de gravação
+        linhas = db.session.execute(consulta.execution_options(yield_per=tamanho_lote))
+        chave_atual, bloco = None, []
+        for execucao_id, tipo, ambiente, commit_hash, nome_teste, status, data_execucao in linhas:
+            chave = (execucao_id, tipo, ambiente, commit_hash)
+            if chave != chave_atual or len(bloco) >= tamanho_lote:
+                if bloco:
+                    cls.registrar(*chave_atual, bloco)
+                chave_atual, bloco = chave, []
+            bloco.append({'nome_teste': nome_teste, 'status': status, 'data_execucao': data_execucao})
+        if bloco:
+            cls.registrar(*chave_atual, bloco)
+
+class HistogramaDuracao(db.Model):
+    """Sketch de quantis das durações por dia (ver histogramas.py)
+    
+    Uma linha por bucket: escopo 'execucao' guarda `ExecucaoTeste.duracao`
+    por tipo (nome_teste = ''), escopo 'teste' guarda `tempo_execucao` de cada
+    teste. Contagens são somadas por upsert, então qualquer janela de dias é
+    respondida somando os buckets, sem ler as linhas brutas.
+    """
+    __tablename__ = 'histogramas_duracao'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'escopo', 'nome_teste', 'tipo', 'data', 'indice', name='uq_histogramas_duracao_chave'
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    escopo = db.Column(db.String(20), nullable=False)  # execucao, teste
+    nome_teste = db.Column(db.String(200), nullable=False, default='')
+    tipo = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    indice = db.Column(db.Integer, nullable=False)
+    contagem = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Execuções com duração final (canceladas e em andamento não entram)
+    STATUS_CRONOMETRADOS = ('sucesso', 'falha')
+    
+    @classmethod
+    def registrar_execucao(cls, execucao):
+        """Conta a duração de uma execução concluída"""
+        cls._gravar(Counter({
+            ('execucao', '', execucao.tipo, execucao.data_criacao.date(), indice_bucket(execucao.duracao or 0)): 1
+        }))
+    
+    @classmethod
+    def registrar_testes(cls, tipo, resultados):
+        """Conta as durações de um bloco de resultados (ignorados não entram)"""
+        cls._gravar(Counter(
+            ('teste', resultado['nome_teste'], tipo, resultado['data_execucao'].date(),
+             indice_bucket(resultado['tempo_execucao']))
+            for resultado in resultados if resultado['status'] != 'ignorado'
+        ))
+    
+    @classmethod
+    def _gravar(cls, contagens, tamanho_lote=1000):
+        """Upsert em lote somando as contagens por (escopo, nome, tipo, dia, bucket)"""
+        linhas = [
+            {'escopo': escopo, 'nome_teste': nome_teste, 'tipo': tipo, 'data': dia, 'indice': indice, 'contagem': contagem}
+            for (escopo, nome_teste, tipo, dia, indice), contagem in contagens.items()
+        ]
+        if not linhas:
+            return
+        
+        insert = insert_com_upsert()
+        tabela = cls.__table__
+        comando = insert(tabela)
+        comando = comando.on_conflict_do_update(
+            index_elements=['escopo', 'nome_teste', 'tipo', 'data', 'indice'],
+            set_={'contagem': tabela.c.contagem + comando.excluded.contagem}
+        )
+        for inicio in range(0, len(linhas), tamanho_lote):
+            db.session.execute(comando, linhas[inicio:inicio + tamanho_lote])
+    
+    @classmethod
+    def percentis_execucoes(cls, desde):
+        """{tipo: quantis da duração} das execuções a partir da data `desde`"""
+        linhas = db.session.query(cls.tipo, cls.indice, db.func.sum(cls.contagem)).filter(
+            cls.escopo == 'execucao', cls.nome_teste == '', cls.data >= desde
+        ).group_by(cls.tipo, cls.indice).all()
+        return cls._por_chave(linhas)
+    
+    @classmethod
+    def percentis_testes(cls, nomes, desde, tipo=None):
+        """{nome_teste: quantis do tempo de execução} a partir da data `desde`"""
+        query = db.session.query(cls.nome_teste, cls.indice, db.func.sum(cls.contagem)).filter(
+            cls.escopo == 'teste', cls.nome_teste.in_(nomes), cls.data >= desde
+        )
+        if tipo:
+            query = query.filter(cls.tipo == tipo)
+        return cls._por_chave(query.group_by(cls.nome_teste, cls.indice).all())
+    
+    @staticmethod
+    def _por_chave(linhas):
+        buckets = {}
+        for chave, indice, contagem in linhas:
+            buckets.setdefault(chave, []).append((indice, contagem))
+        return {chave: quantis(contagens) for chave, contagens in buckets.items()}
+    
+    @classmethod
+    def reconstruir(cls, tamanho_lote=1000):
+        """Recalcula todos os histogramas a partir de execuções e resultados (backfill)"""
+        db.session.execute(db.delete(cls))
+        
+        contagens = Counter()
+        execucoes = db.select(ExecucaoTeste.tipo, ExecucaoTeste.data_criacao, ExecucaoTeste.duracao).filter(
+            ExecucaoTeste.status.in_(cls.STATUS_CRONOMETRADOS)
+        )
+        for tipo, data_criacao, duracao in db.session.execute(execucoes.execution_options(yield_per=tamanho_lote)):
+            contagens[('execucao', '', tipo, data_criacao.date(), indice_bucket(duracao or 0))] += 1
+        
+        cls._contar_testes(contagens, tamanho_lote)
+        
+        cls._gravar(contagens, tamanho_lote)
+        db.session.commit()
+        return cls.query.count()
+    
+    @classmethod
+    def recalcular_testes(cls, tipo, nomes, tamanho_lote=500):
+        """Refaz, sem confirmar, os buckets de `nomes` a partir dos resultados atuais
+        
+        Usado quando resultados já contabilizados são removidos.
+        """
+        nomes = list(nomes)
+        for inicio in range(0, len(nomes), tamanho_lote):
+            lote = nomes[inicio:inicio + tamanho_lote]
+            db.session.execute(db.delete(cls).where(
+                cls.escopo == 'teste', cls.tipo == tipo, cls.nome_teste.in_(lote)
+            ))
+            contagens = Counter()
+            cls._contar_testes(contagens, tamanho_lote, ExecucaoTeste.tipo == tipo, ResultadoTeste.nome_teste.in_(lote))
+            cls._gravar(contagens, tamanho_lote)
+    
+    @staticmethod
+    def _contar_testes(contagens, tamanho_lote, *filtros):
+        """Soma em `contagens` os buckets dos resultados gravados que atendem `filtros`"""
+        resultados = db.select(
+            ExecucaoTeste.tipo, ResultadoTeste.nome_teste, ResultadoTeste.data_execucao, ResultadoTeste.tempo_execucao
+        ).join(ExecucaoTeste, ExecucaoTeste.id == ResultadoTeste.execucao_id).filter(
+            ResultadoTeste.status != 'ignorado', *filtros
+        )
+        for tipo, nome_teste, data_execucao, tempo in db.session.execute(resultados.execution_options(yield_per=tamanho_lote)):
+            contagens[('teste', nome_teste, tipo, data_execucao.date(), indice_bucket(tempo))] += 1
+
+def contabilizar_criacao_execucao(execucao):
+    """Consolidados de uma execução recém-criada (chamar após o flush)
+    
+    Tendência diária e, se já nasce concluída, histograma de duração.
+    """
+    TendenciaDiaria.registrar_criacao(execucao)
+    if execucao.status in HistogramaDuracao.STATUS_CRONOMETRADOS:
+        HistogramaDuracao.registrar_execucao(execucao)
+
+def contabilizar_conclusao_execucao(execucao, status_anterior, duracao_anterior):
+    """Consolidados de uma mudança de status/duração de uma execução
+    
+    Todo caminho que finaliza uma execução passa por aqui, para que
+    tendência diária e histograma de duração acompanhem `execucoes_teste`.
+    """
+    TendenciaDiaria.registrar_conclusao(execucao, status_anterior, duracao_anterior)
+    if (execucao.status in HistogramaDuracao.STATUS_CRONOMETRADOS
+            and status_anterior not in HistogramaDuracao.STATUS_CRONOMETRADOS):
+        HistogramaDuracao.registrar_execucao(execucao)
+
+class ClusterFalha(db.Model):
+    """Grupo de falhas com a mesma causa provável (ver agrupamento.py)
+    
+    Cada assinatura normalizada distinta é mapeada para um cluster
+    (AssinaturaFalha); uma assinatura nova entra no cluster mais parecido
+    encontrado pelas bandas LSH do MinHash (BandaCluster) ou cria um novo.
+    As contagens ficam em OcorrenciaCluster, por execução e dia.
+    """
+    __tablename__ = 'clusters_falhas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    assinatura = db.Column(db.Text, nullable=False)  # assinatura que originou o cluster
+    mensagem_exemplo = db.Column(db.String(500))
+    minhash = db.Column(db.Text, nullable=False)  # JSON com os valores do MinHash
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'id': self.id,
+            'assinatura': self.assinatura,
+            'mensagem_exemplo': self.mensagem_exemplo,
+            'criado_em': self.criado_em.isoformat()
+        }
+    
+    @classmethod
+    def classificar(cls, execucao_id, resultados):
+        """Preenche `cluster_id` das falhas de um bloco e soma as ocorrências
+        
+        Chamar antes de inserir o bloco; resultados sem falha ou sem texto de
+        erro ficam com cluster_id = None.
+        """
+        por_hash = {}
+        for resultado in resultados:
+            resultado['cluster_id'] = None
+            if resultado['status'] != 'falhou':
+                continue
+            assinatura = assinatura_falha(resultado.get('mensagem_erro'), resultado.get('stack_trace'))
+            if assinatura:
+                por_hash.setdefault(hash_assinatura(assinatura), (assinatura, []))[1].append(resultado)
+        if not por_hash:
+            return
+        
+        conhecidos = dict(db.session.query(AssinaturaFalha.hash_assinatura, AssinaturaFalha.cluster_id).filter(
+            AssinaturaFalha.hash_assinatura.in_(list(por_hash))
+        ).all())
+        ocorrencias = Counter()
+        for hash_falha, (assinatura, falhas) in por_hash.items():
+            cluster_id = conhecidos.get(hash_falha) or cls._registrar_assinatura(hash_falha, assinatura, falhas[0])
+            for falha in falhas:
+                falha['cluster_id'] = cluster_id
+                ocorrencias[(cluster_id, falha['data_execucao'].date())] += 1
+        
+        OcorrenciaCluster.registrar(execucao_id, ocorrencias)
+    
+    @classmethod
+    def _registrar_assinatura(cls, hash_falha, assinatura, exemplo):
+        """Cluster de uma assinatura ainda não vista (existente parecido ou novo)"""
+        valores = minhash(assinatura)
+        chaves = bandas(valores)
+        candidatos = db.session.query(cls.id, cls.minhash).join(BandaCluster, BandaCluster.cluster_id == cls.id).filter(
+            db.tuple_(BandaCluster.banda, BandaCluster.valor).in_(chaves)
+        ).distinct().all()
+        
+        cluster_id, melhor = None, LIMIAR_SIMILARIDADE
+        for candidato_id, minhash_candidato in candidatos:
+            semelhanca = similaridade(valores, json.loads(minhash_candidato))
+            if semelhanca >= melhor:
+                cluster_id, melhor = candidato_id, semelhanca
+        
+        if cluster_id is None:
+            cluster = cls(
+                assinatura=assinatura,
+                mensagem_exemplo=((exemplo.get('mensagem_erro') or '').strip().splitlines() or [''])[0][:500],
+                minhash=json.dumps(valores)
+            )
+            db.session.add(cluster)
+            db.session.flush()
+            cluster_id = cluster.id
+            db.session.execute(db.insert(BandaCluster), [
+                {'banda': banda, 'valor': valor, 'cluster_id': cluster_id} for banda, valor in chaves
+            ])
+        
+        # Outro processo pode ter registrado a mesma assinatura: vale a primeira
+        comando = insert_com_upsert()(AssinaturaFalha.__table__).values(
+            hash_assinatura=hash_falha, cluster_id=cluster_id
+        ).on_conflict_do_nothing(index_elements=['hash_assinatura'])
+        db.session.execute(comando)
+        return db.session.query(AssinaturaFalha.cluster_id).filter(
+            AssinaturaFalha.hash_assinatura == hash_falha
+        ).scalar()
+    
+    @classmethod
+    def _clusters_em_cache(cls):
+        """(resultado, cluster) das falhas de cada execução com relatório em cache"""
+        consulta = db.select(ResultadoTeste.execucao_id, ResultadoTeste.id, ResultadoTeste.cluster_id).join(
+            RelatorioExecucao, RelatorioExecucao.execucao_id == ResultadoTeste.execucao_id
+        ).filter(ResultadoTeste.status == 'falhou').order_by(ResultadoTeste.execucao_id, ResultadoTeste.id)
+        clusters = defaultdict(list)
+        for execucao_id, resultado_id, cluster_id in db.session.execute(consulta):
+            clusters[execucao_id].append((resultado_id, cluster_id))
+        return clusters
+    
+    @classmethod
+    def reconstruir(cls, tamanho_lote=1000):
+        """Reagrupa todas as falhas já gravadas (backfill)"""
+        # `cluster_id` aparece nos relatórios: só os que mudarem saem do cache
+        anteriores = cls._clusters_em_cache()
+        db.session.execute(db.update(ResultadoTeste).where(ResultadoTeste.cluster_id.isnot(None)).values(cluster_id=None))
+        for modelo in (OcorrenciaCluster, AssinaturaFalha, BandaCluster, cls):
+            db.session.execute(db.delete(modelo))
+        
+        consulta = db.select(
+            ResultadoTeste.id, ResultadoTeste.execucao_id, ResultadoTeste.status, ResultadoTeste.mensagem_erro,
+            ResultadoTeste.stack_trace, ResultadoTeste.data_execucao
+        ).filter(ResultadoTeste.status == 'falhou').order_by(ResultadoTeste.id)
+        
+        def gravar(execucao_id, bloco):
+            cls.classificar(execucao_id, bloco)
+            atualizacoes = [{'id': item['id'], 'cluster_id': item['cluster_id']} for item in bloco if item['cluster_id']]
+            if atualizacoes:
+                db.session.execute(db.update(ResultadoTeste), atualizacoes)
+        
+        execucao_atual, bloco = None, []
+        for linha in db.session.execute(consulta.execution_options(yield_per=tamanho_lote)).mappings():
+            if linha['execucao_id'] != execucao_atual or len(bloco) >= tamanho_lote:
+                if bloco:
+                    gravar(execucao_atual, bloco)
+                execucao_atual, bloco = linha['execucao_id'], []
+            bloco.append(dict(linha))
+        if bloco:
+            gravar(execucao_atual, bloco)
+        
+        atuais = cls._clusters_em_cache()
+        for execucao_id in anteriores.keys() | atuais.keys():
+            if anteriores.get(execucao_id) != atuais.get(execucao_id):
+                RelatorioExecucao.invalidar(execucao_id)
+        
+        db.session.commit()
+        return cls.query.count()
+
+class AssinaturaFalha(db.Model):
+    """Cluster de cada assinatura normalizada já vista (hash SHA-1)"""
+    __tablename__ = 'assinaturas_falhas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hash_assinatura = db.Column(db.String(40), nullable=False, unique=True)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters_falhas.id'), nullable=False)
+
+class BandaCluster(db.Model):
+    """Bandas LSH do MinHash de cada cluster, para achar clusters parecidos"""
+    __tablename__ = 'bandas_clusters'
+    __table_args__ = (
+        db.Index('ix_bandas_clusters_banda_valor', 'banda', 'valor'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    banda = db.Column(db.Integer, nullable=False)
+    valor = db.Column(db.String(16), nullable=False)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters_falhas.id'), nullable=False)
+
+class OcorrenciaCluster(db.Model):
+    """Falhas de cada cluster por execução e dia
+    
+    O ranking de clusters lê só esta tabela: o custo depende do número de
+    clusters na janela, não do número de resultados.
+    """
+    __tablename__ = 'ocorrencias_clusters'
+    __table_args__ = (
+        db.UniqueConstraint('execucao_id', 'cluster_id', 'data', name='uq_ocorrencias_clusters_execucao_cluster_data'),
+        db.Index('ix_ocorrencias_clusters_data_cluster', 'data', 'cluster_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    execucao_id = db.Column(db.Integer, db.ForeignKey('execucoes_teste.id'), nullable=False)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('clusters_falhas.id'), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    ocorrencias = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def registrar(cls, execucao_id, ocorrencias):
+        """Soma {(cluster_id, dia): quantidade} às ocorrências da execução"""
+        insert = insert_com_upsert()
+        tabela = cls.__table__
+        comando = insert(tabela)
+        comando = comando.on_conflict_do_update(
+            index_elements=['execucao_id', 'cluster_id', 'data'],
+            set_={'ocorrencias': tabela.c.ocorrencias + comando.excluded.ocorrencias}
+        )
+        db.session.execute(comando, [
+            {'execucao_id': execucao_id, 'cluster_id': cluster_id, 'data': dia, 'ocorrencias': quantidade}
+            for (cluster_id, dia), quantidade in ocorrencias.items()
+        ])
+    
+    @classmethod
+    def ranking(cls, limite, execucao_id=None, desde=None):
+        """Clusters com mais falhas em uma execução ou a partir de uma data"""
+        total = db.func.sum(cls.ocorrencias).label('ocorrencias')
+        query = db.session.query(
+            cls.cluster_id,
+            total,
+            db.func.count(db.distinct(cls.execucao_id)).label('execucoes'),
+            db.func.min(cls.data).label('primeiro_dia'),
+            db.func.max(cls.data).label('ultimo_dia')
+        )
+        if execucao_id is not None:
+            query = query.filter(cls.execucao_id == execucao_id)
+        if desde is not None:
+            query = query.filter(cls.data >= desde)
+        linhas = query.group_by(cls.cluster_id).order_by(total.desc(), cls.cluster_id).limit(limite).all()
+        
+        clusters = {cluster.id: cluster for cluster in ClusterFalha.query.filter(
+            ClusterFalha.id.in_([linha.cluster_id for linha in linhas])
+        )}
+        return [
+            {
+                **clusters[linha.cluster_id].to_dict(),
+                'ocorrencias': linha.ocorrencias,
+                'execucoes': linha.execucoes,
+                'primeiro_dia': linha.primeiro_dia.isoformat(),
+                'ultimo_dia': linha.ultimo_dia.isoformat()
+            }
+            for linha in linhas
+        ]
+
+class Artefato(db.Model):
+    """Blob (screenshot, log) guardado pelo SHA-256 do conteúdo (ver artefatos.py)"""
+    __tablename__ = 'artefatos'
+    __table_args__ = (
+        # Coleta de lixo: artefatos sem uso há mais que a carência
+        db.Index('ix_artefatos_ultimo_upload', 'ultimo_upload'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hash_conteudo = db.Column(db.String(64), nullable=False, unique=True)
+    tamanho = db.Column(db.BigInteger, nullable=False)
+    tipo_conteudo = db.Column(db.String(100), nullable=False, default='application/octet-stream')
+    nome_original = db.Column(db.String(255))
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    ultimo_upload = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @property
+    def url(self):
+        return URL_ARTEFATOS + self.hash_conteudo
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'hash': self.hash_conteudo,
+            'tamanho': self.tamanho,
+            'tipo_conteudo': self.tipo_conteudo,
+            'nome_original': self.nome_original,
+            'url': self.url,
+            'criado_em': self.criado_em.isoformat()
+        }
+    
+    @classmethod
+    def registrar(cls, hash_conteudo, tamanho, tipo_conteudo, nome_original=None):
+        """Cria o registro do blob ou, se já existe, renova `ultimo_upload`"""
+        agora = datetime.utcnow()
+        comando = insert_com_upsert()(cls.__table__).values(
+            hash_conteudo=hash_conteudo, tamanho=tamanho, tipo_conteudo=tipo_conteudo,
+            nome_original=nome_original, criado_em=agora, ultimo_upload=agora
+        )
+        comando = comando.on_conflict_do_update(
+            index_elements=['hash_conteudo'], set_={'ultimo_upload': agora}
+        )
+        db.session.execute(comando)
+        return cls.query.filter_by(hash_conteudo=hash_conteudo).one()
+
+class ReferenciaArtefato(db.Model):
+    """Uso de um artefato por um resultado; blobs sem referência são coletados"""
+    __tablename__ = 'referencias_artefatos'
+    __table_args__ = (
+        db.UniqueConstraint('artefato_id', 'resultado_id', 'tipo', name='uq_referencias_artefatos'),
+        db.Index('ix_referencias_artefatos_resultado', 'resultado_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    artefato_id = db.Column(db.Integer, db.ForeignKey('artefatos.id'), nullable=False)
+    resultado_id = db.Column(db.Integer, db.ForeignKey('resultados_teste.id'), nullable=False)
+    tipo = db.Column(db.String(20), nullable=False, default='screenshot')  # screenshot, log, outro
+    
+    @classmethod
+    def vincular(cls, linhas):
+        """Cria referências [{'artefato_id', 'resultado_id', 'tipo'}] ignorando as existentes"""
+        if linhas:
+            comando = insert_com_upsert()(cls.__table__).on_conflict_do_nothing(
+                index_elements=['artefato_id', 'resultado_id', 'tipo']
+            )
+            db.session.execute(comando, linhas)
+    
+    @classmethod
+    def registrar_screenshots(cls, execucao_id, resultados):
+        """Referencia os artefatos apontados por `screenshot_path` de um bloco recém-inserido"""
+        hashes = {
+            resultado['screenshot_path'][len(URL_ARTEFATOS):]
+            for resultado in resultados
+            if (resultado.get('screenshot_path') or '').startswith(URL_ARTEFATOS)
+        }
+        if not hashes:
+            return
+        
+        artefatos = dict(db.session.query(Artefato.hash_conteudo, Artefato.id).filter(Artefato.hash_conteudo.in_(hashes)))
+        urls = [URL_ARTEFATOS + hash_conteudo for hash_conteudo in artefatos]
+        if not urls:
+            return
+        cls.vincular([
+            {'artefato_id': artefatos[screenshot_path[len(URL_ARTEFATOS):]], 'resultado_id': resultado_id,
+             'tipo': 'screenshot'}
+            for resultado_id, screenshot_path in db.session.query(ResultadoTeste.id, ResultadoTeste.screenshot_path).filter(
+                ResultadoTeste.execucao_id == execucao_id, ResultadoTeste.screenshot_path.in_(urls)
+            )
+        ])
+
+class RelatorioExecucao(db.Model):
+    """Relatório JSON de uma execução finalizada, comprimido com gzip (ver relatorios.py)
+    
+    Válido enquanto o maior id de resultado e a `data_atualizacao` da
+    execução forem os mesmos da geração; a ingestão de novos resultados
+    também remove a entrada.
+    """
+    __tablename__ = 'relatorios_execucoes'
+    
+    execucao_id = db.Column(db.Integer, db.ForeignKey('execucoes_teste.id'), primary_key=True)
+    ultimo_resultado_id = db.Column(db.Integer)
+    data_atualizacao_execucao = db.Column(db.DateTime, nullable=False)
+    etag = db.Column(db.String(64), nullable=False)  # SHA-256 do JSON sem compressão
+    tamanho = db.Column(db.Integer, nullable=False)  # bytes do JSON sem compressão
+    # Só carregado quando o corpo é enviado (respostas 304 não leem o blob)
+    conteudo = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    gerado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def invalidar(cls, execucao_id):
+        db.session.execute(db.delete(cls).where(cls.execucao_id == execucao_id))
+
+class ExecucaoArquivada(db.Model):
+    """Resumo de uma execução movida para o arquivo frio (ver arquivamento.py)
+    
+    O `id` é o da execução original. `arquivo`, `posicao` e `tamanho`
+    localizam o membro gzip com a execução e seus resultados.
+    """
+    __tablename__ = 'execucoes_arquivadas'
+    __table_args__ = (
+        db.Index('ix_execucoes_arquivadas_data_criacao', 'data_criacao'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    duracao = db.Column(db.Integer, nullable=False)
+    ambiente = db.Column(db.String(50), nullable=False)
+    commit_hash = db.Column(db.String(40))
+    observacoes = db.Column(db.Text)
+    data_criacao = db.Column(db.DateTime, nullable=False)
+    data_atualizacao = db.Column(db.DateTime, nullable=False)
+    total_testes = db.Column(db.Integer, nullable=False, default=0)
+    testes_passaram = db.Column(db.Integer, nullable=False, default=0)
+    testes_falharam = db.Column(db.Integer, nullable=False, default=0)
+    testes_ignorados = db.Column(db.Integer, nullable=False, default=0)
+    tempo_total = db.Column(db.Float, nullable=False, default=0)
+    arquivo = db.Column(db.String(50), nullable=False)  # AAAA-MM.ndjson.gz
+    posicao = db.Column(db.BigInteger, nullable=False)
+    tamanho = db.Column(db.BigInteger, nullable=False)
+    arquivado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Mesmo formato de `ExecucaoTeste.to_dict`, com `arquivada`"""
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'status': self.status,
+            'duracao': self.duracao,
+            'ambiente': self.ambiente,
+            'commit_hash': self.commit_hash,
+            'observacoes': self.observacoes,
+            'data_criacao': self.data_criacao.isoformat(),
+            'data_atualizacao': self.data_atualizacao.isoformat(),
+            'total_testes': self.total_testes,
+            'testes_passaram': self.testes_passaram,
+            'testes_falharam': self.testes_falharam,
+            'arquivada': True
+        }
+    
+    def get_estatisticas(self):
+        """Mesmo formato de `ResultadoTeste.get_estatisticas`"""
+        return {
+            'total_testes': self.total_testes,
+            'testes_passaram': self.testes_passaram,
+            'testes_falharam': self.testes_falharam,
+            'testes_ignorados': self.testes_ignorados,
+            'taxa_sucesso': (self.testes_passaram / self.total_testes * 100) if self.total_testes > 0 else 0,
+            'tempo_total': round(self.tempo_total, 2)
+        }
+
+class JobExecucao(db.Model):
+    """Fila persistente de execuções de teste (ver executor.py)
+    
+    Um job é reivindicado por um processo com lease: o dono renova
+    `lease_expira_em` periodicamente e, se o processo morrer, o lease expira
+    e o job volta para a fila.
+    """
+    __tablename__ = 'jobs_execucao'
+    __table_args__ = (
+        db.Index('ix_jobs_execucao_status_id', 'status', 'id'),
+        db.Index('ix_jobs_execucao_status_lease', 'status', 'lease_expira_em'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    execucao_id = db.Column(db.Integer, db.ForeignKey('execucoes_teste.id'), nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    ambiente = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, executando, concluido, falhou, cancelado
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    dono = db.Column(db.String(100))  # host:pid do processo que detém o lease
+    lease_expira_em = db.Column(db.DateTime)
+    heartbeat_em = db.Column(db.DateTime)
+    cancelamento_solicitado = db.Column(db.Boolean, nullable=False, default=False)
+    erro = db.Column(db.Text)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime)
+    finalizado_em = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'id': self.id,
+            'execucao_id': self.execucao_id,
+            'tipo': self.tipo,
+            'ambiente': self.ambiente,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'dono': self.dono,
+            'erro': self.erro,
+            'cancelamento_solicitado': self.cancelamento_solicitado,
+            'criado_em': self.criado_em.isoformat(),
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'heartbeat_em': self.heartbeat_em.isoformat() if self.heartbeat_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None
         }
 
+class LiderancaProcesso(db.Model):
+    """Lease de uma tarefa periódica que deve rodar em um único processo
+    
+    Workers do gunicorn compartilham o banco: o dono renova o lease a cada
+    uso e, se o processo morrer, ele expira e outro processo assume.
+    """
+    __tablename__ = 'liderancas_processos'
+    
+    nome = db.Column(db.String(50), primary_key=True)
+    dono = db.Column(db.String(100), nullable=False)  # host:pid:sufixo (ver executor.identificar_processo)
+    expira_em = db.Column(db.DateTime, nullable=False)
+    
+    @classmethod
+    def adquirir(cls, nome, dono, duracao):
+        """Assume ou renova o lease por `duracao` segundos; True se `dono` é o líder"""
+        tabela = cls.__table__
+        agora = datetime.utcnow()
+        valores = {'dono': dono, 'expira_em': agora + timedelta(seconds=duracao)}
+        lider = db.session.execute(
+            db.update(tabela)
+            .where(tabela.c.nome == nome, db.or_(tabela.c.dono == dono, tabela.c.expira_em < agora))
+            .values(**valores)
+        ).rowcount
+        if not lider:
+            insert = insert_com_upsert()
+            lider = db.session.execute(
+                insert(tabela).values(nome=nome, **valores).on_conflict_do_nothing(index_elements=['nome'])
+            ).rowcount
+        db.session.commit()
+        return bool(lider)
+    
+    @classmethod
+    def liberar(cls, nome, dono):
+        """Devolve o lease, se ainda for de `dono`"""
+        tabela = cls.__table__
+        db.session.execute(db.delete(tabela).where(tabela.c.nome == nome, tabela.c.dono == dono))
+        db.session.commit()
+
+class VersaoEsquema(db.Model):
+    """Migrações de esquema já aplicadas ao banco (ver migracoes.py)"""
+    __tablename__ = 'versao_esquema'
+    
+    versao = db.Column(db.Integer, primary_key=True)
+    descricao = db.Column(db.String(200), nullable=False)
+    data_aplicacao = db.Column(db.DateTime, default=datetime.utcnow)
+
 class ConfiguracaoSistema(db.Model):
     """Modelo para configurações do sistema"""
     __tablename__ = 'configuracoes_sistema'
@@ -154,6 +1436,20 @@ class ConfiguracaoSistema(db.Model):
         """Define a configuração a partir de um dicionário"""
         self.configuracao = json.dumps(config_dict)
     
+    @classmethod
+    def get_retencao_metricas(cls):
+        """Retenção em dias de cada nível do histórico de métricas do sistema
+        
+        Lida de `retencao_metricas` na configuração; o nível horário usa
+        `retencao_logs` quando não configurado explicitamente.
+        """
+        configuracao = cls.query.first()
+        config = configuracao.get_configuracao_dict() if configuracao else {}
+        
+        retencao = {'bruto': 1, 'minuto': 7, 'hora': config.get('retencao_logs', 30)}
+        retencao.update(config.get('retencao_metricas') or {})
+        return retencao
+    
     def to_dict(self):
         """Converte o objeto para dicionário"""
         return {
@@ -207,6 +1503,9 @@ class PipelineCI(db.Model):
 class MetricaSistema(db.Model):
     """Modelo para métricas do sistema"""
     __tablename__ = 'metricas_sistema'
+    __table_args__ = (
+        db.Index('ix_metricas_sistema_data_coleta', 'data_coleta'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cpu_percent = db.Column(db.Float, nullable=False)
@@ -228,44 +1527,49 @@ class MetricaSistema(db.Model):
             'data_coleta': self.data_coleta.isoformat()
         }
     
+    @staticmethod
+    def coletar():
+        """Coleta uma amostra das métricas do sistema sem bloquear
+        
+        `cpu_percent(interval=None)` compara com a chamada anterior, então o
+        valor reflete o intervalo entre amostras do amostrador.
+        """
+        disco = psutil.disk_usage('/')
+        rede = psutil.net_io_counters()
+        
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memoria_percent': psutil.virtual_memory().percent,
+            'disco_percent': (disco.used / disco.total) * 100,
+            'rede_bytes_enviados': rede.bytes_sent,
+            'rede_bytes_recebidos': rede.bytes_recv,
+            'data_coleta': datetime.utcnow()
+        }
+    
+    @staticmethod
+    def resumir(amostra):
+        """Converte uma amostra bruta no formato de /api/sistema"""
+        return {
+            'cpu': round(amostra['cpu_percent'], 2),
+            'memoria': round(amostra['memoria_percent'], 2),
+            'disco': round(amostra['disco_percent'], 2),
+            'rede': round((amostra['rede_bytes_enviados'] + amostra['rede_bytes_recebidos']) / 1024 / 1024, 2)  # MB
+        }
+    
+    @classmethod
+    def salvar_lote(cls, amostras):
+        """Persiste várias amostras com um único INSERT em lote"""
+        if not amostras:
+            return
+        db.session.execute(db.insert(cls), amostras)
+        db.session.commit()
+    
     @classmethod
     def get_metricas_atuais(cls):
-        """Coleta e retorna métricas atuais do sistema"""
+        """Coleta e retorna métricas atuais do sistema (sem persistir)"""
         try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memória
-            memoria = psutil.virtual_memory()
-            memoria_percent = memoria.percent
-            
-            # Disco
-            disco = psutil.disk_usage('/')
-            disco_percent = (disco.used / disco.total) * 100
-            
-            # Rede
-            rede = psutil.net_io_counters()
-            rede_bytes_enviados = rede.bytes_sent
-            rede_bytes_recebidos = rede.bytes_recv
-            
-            # Salvar métricas
-            metrica = cls(
-                cpu_percent=cpu_percent,
-                memoria_percent=memoria_percent,
-                disco_percent=disco_percent,
-                rede_bytes_enviados=rede_bytes_enviados,
-                rede_bytes_recebidos=rede_bytes_recebidos
-            )
-            db.session.add(metrica)
-            db.session.commit()
-            
-            return {
-                'cpu': round(cpu_percent, 2),
-                'memoria': round(memoria_percent, 2),
-                'disco': round(disco_percent, 2),
-                'rede': round((rede_bytes_enviados + rede_bytes_recebidos) / 1024 / 1024, 2)  # MB
-            }
-            
+            return cls.resumir(cls.coletar())
+        
         except Exception as e:
             print(f"Erro ao coletar métricas do sistema: {e}")
             return {
@@ -274,3 +1578,167 @@ class MetricaSistema(db.Model):
                 'disco': 0,
                 'rede': 0
             }
+
+class MetricaSistemaAgregada(db.Model):
+    """Histórico de métricas do sistema consolidado por minuto ou por hora
+    
+    Níveis: amostras brutas (`metricas_sistema`) → 1 minuto → 1 hora, cada
+    um com mínimo, média e máximo, e retenção própria (ver
+    `ConfiguracaoSistema.get_retencao_metricas`).
+    """
+    __tablename__ = 'metricas_sistema_agregadas'
+    __table_args__ = (
+        db.UniqueConstraint('resolucao', 'inicio', name='uq_metricas_sistema_agregadas_resolucao_inicio'),
+    )
+    
+    # Resolução de cada nível consolidado, em segundos
+    RESOLUCOES = {'minuto': 60, 'hora': 3600}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    resolucao = db.Column(db.Integer, nullable=False)  # em segundos
+    inicio = db.Column(db.DateTime, nullable=False)  # início do intervalo
+    amostras = db.Column(db.Integer, nullable=False)
+    cpu_min = db.Column(db.Float, nullable=False)
+    cpu_media = db.Column(db.Float, nullable=False)
+    cpu_max = db.Column(db.Float, nullable=False)
+    memoria_min = db.Column(db.Float, nullable=False)
+    memoria_media = db.Column(db.Float, nullable=False)
+    memoria_max = db.Column(db.Float, nullable=False)
+    disco_min = db.Column(db.Float, nullable=False)
+    disco_media = db.Column(db.Float, nullable=False)
+    disco_max = db.Column(db.Float, nullable=False)
+    rede_bytes_enviados = db.Column(db.BigInteger, default=0)  # contador no fim do intervalo
+    rede_bytes_recebidos = db.Column(db.BigInteger, default=0)
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário (mesmos campos das amostras brutas)"""
+        return {
+            'id': self.id,
+            'resolucao': self.resolucao,
+            'amostras': self.amostras,
+            'cpu_percent': round(self.cpu_media, 2),
+            'cpu_percent_min': self.cpu_min,
+            'cpu_percent_max': self.cpu_max,
+            'memoria_percent': round(self.memoria_media, 2),
+            'memoria_percent_min': self.memoria_min,
+            'memoria_percent_max': self.memoria_max,
+            'disco_percent': round(self.disco_media, 2),
+            'disco_percent_min': self.disco_min,
+            'disco_percent_max': self.disco_max,
+            'rede_bytes_enviados': self.rede_bytes_enviados,
+            'rede_bytes_recebidos': self.rede_bytes_recebidos,
+            'data_coleta': self.inicio.isoformat()
+        }
+    
+    @staticmethod
+    def _intervalo(coluna, resolucao):
+        """Expressão SQL que trunca `coluna` no início do intervalo"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return db.func.date_trunc('minute' if resolucao == 60 else 'hour', coluna)
+        return db.func.strftime('%Y-%m-%d %H:%M:00' if resolucao == 60 else '%Y-%m-%d %H:00:00', coluna)
+    
+    @classmethod
+    def consolidar(cls, resolucao):
+        """Recalcula os intervalos recentes de um nível e grava com upsert
+        
+        Só relê a origem a partir do último intervalo já consolidado (menos
+        um, para absorver amostras gravadas com atraso pelo amostrador).
+        """
+        ultimo = db.session.query(db.func.max(cls.inicio)).filter(cls.resolucao == resolucao).scalar()
+        desde = ultimo - timedelta(seconds=resolucao) if ultimo else None
+        
+        if resolucao == cls.RESOLUCOES['minuto']:
+            origem = MetricaSistema
+            intervalo = cls._intervalo(origem.data_coleta, resolucao)
+            colunas = [
+                db.func.count(origem.id),
+                db.func.min(origem.cpu_percent), db.func.avg(origem.cpu_percent), db.func.max(origem.cpu_percent),
+                db.func.min(origem.memoria_percent), db.func.avg(origem.memoria_percent), db.func.max(origem.memoria_percent),
+                db.func.min(origem.disco_percent), db.func.avg(origem.disco_percent), db.func.max(origem.disco_percent)
+            ]
+            query = db.session.query(intervalo, *colunas)
+            if desde:
+                query = query.filter(origem.data_coleta >= desde)
+        else:
+            origem = cls
+            intervalo = cls._intervalo(origem.inicio, resolucao)
+            peso = origem.amostras
+            total = db.func.sum(peso)
+            colunas = [
+                total,
+                db.func.min(origem.cpu_min), db.func.sum(origem.cpu_media * peso) / total, db.func.max(origem.cpu_max),
+                db.func.min(origem.memoria_min), db.func.sum(origem.memoria_media * peso) / total,
+                db.func.max(origem.memoria_max),
+                db.func.min(origem.disco_min), db.func.sum(origem.disco_media * peso) / total, db.func.max(origem.disco_max)
+            ]
+            query = db.session.query(intervalo, *colunas).filter(origem.resolucao == cls.RESOLUCOES['minuto'])
+            if desde:
+                query = query.filter(origem.inicio >= desde)
+        
+        linhas = query.add_columns(
+            db.func.max(origem.rede_bytes_enviados), db.func.max(origem.rede_bytes_recebidos)
+        ).group_by(intervalo).all()
+        
+        if not linhas:
+            return 0
+        
+        campos = [
+            'amostras', 'cpu_min', 'cpu_media', 'cpu_max', 'memoria_min', 'memoria_media', 'memoria_max',
+            'disco_min', 'disco_media', 'disco_max', 'rede_bytes_enviados', 'rede_bytes_recebidos'
+        ]
+        registros = []
+        for linha in linhas:
+            inicio = linha[0] if isinstance(linha[0], datetime) else datetime.strptime(linha[0], '%Y-%m-%d %H:%M:%S')
+            registro = dict(zip(campos, linha[1:]))
+            registro.update(resolucao=resolucao, inicio=inicio)
+            registros.append(registro)
+        
+        insert = insert_com_upsert()
+        comando = insert(cls.__table__)
+        comando = comando.on_conflict_do_update(
+            index_elements=['resolucao', 'inicio'],
+            set_={campo: comando.excluded[campo] for campo in campos}
+        )
+        db.session.execute(comando, registros)
+        db.session.commit()
+        return len(registros)
+    
+    @classmethod
+    def consolidar_todas(cls):
+        """Consolida o nível de minutos e, a partir dele, o de horas"""
+        return {nome: cls.consolidar(resolucao) for nome, resolucao in cls.RESOLUCOES.items()}
+    
+    @classmethod
+    def aplicar_retencao(cls, agora=None):
+        """Remove de cada nível os dados mais antigos que a retenção configurada"""
+        agora = agora or datetime.utcnow()
+        retencao = ConfiguracaoSistema.get_retencao_metricas()
+        
+        removidos = {
+            'bruto': MetricaSistema.query.filter(
+                MetricaSistema.data_coleta < agora - timedelta(days=retencao['bruto'])
+            ).delete(synchronize_session=False)
+        }
+        for nome, resolucao in cls.RESOLUCOES.items():
+            removidos[nome] = cls.query.filter(
+                cls.resolucao == resolucao,
+                cls.inicio < agora - timedelta(days=retencao[nome])
+            ).delete(synchronize_session=False)
+        
+        db.session.commit()
+        return removidos
+    
+    @classmethod
+    def selecionar_nivel(cls, horas, max_pontos, intervalo_bruto):
+        """Escolhe o nível mais detalhado que cobre a janela com até `max_pontos`
+        
+        Considera a retenção de cada nível; se nenhum couber, usa o horário.
+        """
+        retencao = ConfiguracaoSistema.get_retencao_metricas()
+        niveis = [('bruto', intervalo_bruto)] + list(cls.RESOLUCOES.items())
+        
+        for nome, resolucao in niveis:
+            pontos = horas * 3600 / resolucao
+            if pontos <= max_pontos and horas <= retencao[nome] * 24:
+                return nome
+        return 'hora'
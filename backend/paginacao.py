@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Paginação por Cursor
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Paginação keyset: o cursor guarda a chave de ordenação do último item da
+página, e a próxima página é obtida com `WHERE (colunas) < (cursor)` sobre
+um índice, com custo proporcional ao tamanho da página (sem OFFSET).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from models import db
+
+class CursorInvalido(ValueError):
+    """Cursor malformado ou incompatível com o endpoint"""
+
+def codificar_cursor(valores):
+    """Codifica os valores da chave de ordenação em um cursor opaco"""
+    serializados = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores]
+    return base64.urlsafe_b64encode(json.dumps(serializados).encode('utf-8')).decode('ascii')
+
+def decodificar_cursor(cursor, colunas):
+    """Decodifica um cursor opaco de acordo com os tipos das colunas"""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise CursorInvalido('Cursor inválido')
+    
+    if not isinstance(valores, list) or len(valores) != len(colunas):
+        raise CursorInvalido('Cursor inválido')
+    
+    try:
+        return [
+            datetime.fromisoformat(valor) if isinstance(coluna.type, db.DateTime) else coluna.type.python_type(valor)
+            for coluna, valor in zip(colunas, valores)
+        ]
+    except (TypeError, ValueError):
+        raise CursorInvalido('Cursor inválido')
+
+def paginar(query, colunas, cursor=None, limite=100, descendente=True):
+    """Retorna (itens, proximo_cursor) de uma página ordenada por `colunas`
+    
+    `colunas` deve identificar cada linha de forma única (ex.: data, id) e
+    ser coberta por um índice para que a busca não percorra a tabela.
+    """
+    chave = db.tuple_(*colunas) if len(colunas) > 1 else colunas[0]
+    
+    if cursor:
+        valores = decodificar_cursor(cursor, colunas)
+        limite_chave = db.tuple_(*valores) if len(valores) > 1 else valores[0]
+        query = query.filter(chave < limite_chave if descendente else chave > limite_chave)
+    
+    ordem = [coluna.desc() if descendente else coluna.asc() for coluna in colunas]
+    itens = query.order_by(*ordem).limit(limite + 1).all()
+    
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo_cursor = codificar_cursor([getattr(itens[-1], coluna.key) for coluna in colunas])
+    
+    return itens, proximo_cursor
+
+def obter_limite(valor, padrao, maximo):
+    """Normaliza o parâmetro `limite` para o intervalo [1, maximo]"""
+    if valor is None:
+        return padrao
+    return max(1, min(valor, maximo))
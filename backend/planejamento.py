@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Planejamento de Shards
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Divide uma suíte em shards de duração equilibrada com o algoritmo LPT
+(longest processing time): testes em ordem decrescente de duração, cada um
+no shard de menor carga. As durações vêm de `estatisticas_testes` e ficam
+em cache por processo; testes sem histórico recebem a mediana do tipo.
+
+A priorização ordena testes pela probabilidade de falha (taxa recente com
+decaimento, ver `peso_recencia`) por segundo de execução, o que minimiza o
+tempo esperado até a primeira falha.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime
+from statistics import median
+from models import db, EstatisticaTeste, EpocaDecaimento, peso_recencia
+
+# Validade (segundos) das durações e planos em cache
+TTL_CACHE_PLANEJAMENTO = 60
+
+# Estimativa para testes sem histórico quando o tipo não tem nenhum
+DURACAO_PADRAO_TESTE = 1.0
+
+# Limite de shards por plano
+MAX_SHARDS = 1000
+
+# Quantas execuções de hoje a taxa de falha do tipo vale como prior de cada
+# teste (suaviza testes com pouco histórico)
+PESO_PRIOR_FALHA = 2.0
+
+# Duração mínima considerada na prioridade (evita divisão por ~0)
+TEMPO_MINIMO_TESTE = 0.01
+
+_cache = {}
+_lock_cache = threading.Lock()
+
+def _em_cache(chave, calcular):
+    """Valor de `chave` no cache do processo, recalculado após o TTL"""
+    agora = time.monotonic()
+    with _lock_cache:
+        entrada = _cache.get(chave)
+        if entrada and entrada[0] > agora:
+            return entrada[1]
+    valor = calcular()
+    with _lock_cache:
+        _cache[chave] = (agora + TTL_CACHE_PLANEJAMENTO, valor)
+    return valor
+
+def limpar_cache():
+    with _lock_cache:
+        _cache.clear()
+
+def duracoes_conhecidas(tipo):
+    """({nome_teste: duração média}, estimativa para testes desconhecidos)"""
+    def carregar():
+        linhas = db.session.query(
+            EstatisticaTeste.nome_teste,
+            EstatisticaTeste.tempo_total / EstatisticaTeste.execucoes_cronometradas
+        ).filter(
+            EstatisticaTeste.tipo == tipo,
+            EstatisticaTeste.execucoes_cronometradas > 0
+        ).all()
+        duracoes = dict(linhas)
+        estimativa = median(duracoes.values()) if duracoes else DURACAO_PADRAO_TESTE
+        return duracoes, estimativa
+    return _em_cache(('duracoes', tipo), carregar)
+
+def estatisticas_falha(tipo):
+    """({nome_teste: (peso_falhas, peso_execucoes)}, taxa de falha recente do tipo)"""
+    def carregar():
+        pesos = {
+            nome: (peso_falhas, peso_execucoes)
+            for nome, peso_falhas, peso_execucoes in db.session.query(
+                EstatisticaTeste.nome_teste, EstatisticaTeste.peso_falhas, EstatisticaTeste.peso_execucoes
+            ).filter(EstatisticaTeste.tipo == tipo, EstatisticaTeste.peso_execucoes > 0)
+        }
+        total_execucoes = sum(peso_execucoes for _, peso_execucoes in pesos.values())
+        taxa_tipo = sum(peso_falhas for peso_falhas, _ in pesos.values()) / total_execucoes if total_execucoes else 0.0
+        return pesos, taxa_tipo
+    return _em_cache(('falhas', tipo), carregar)
+
+def distribuir_lpt(duracoes, quantidade):
+    """Distribui {item: duração} em `quantidade` shards pelo algoritmo LPT
+    
+    Retorna uma lista de (carga, [itens]) na ordem dos shards; empates são
+    resolvidos pelo nome para que o plano seja determinístico.
+    """
+    quantidade = max(1, quantidade)
+    cargas = [(0.0, indice) for indice in range(quantidade)]
+    shards = [[] for _ in range(quantidade)]
+    totais = [0.0] * quantidade
+    
+    for item, duracao in sorted(duracoes.items(), key=lambda par: (-par[1], par[0])):
+        carga, indice = heapq.heappop(cargas)
+        shards[indice].append(item)
+        totais[indice] = carga + duracao
+        heapq.heappush(cargas, (totais[indice], indice))
+    
+    return list(zip(totais, shards))
+
+def planejar_shards(tipo, quantidade, testes=None):
+    """Plano de `quantidade` shards para `testes` (ou todos os conhecidos do tipo)"""
+    conhecidas, estimativa = duracoes_conhecidas(tipo)
+    if testes is None:
+        return _em_cache(
+            ('plano', tipo, quantidade), lambda: _montar_plano(tipo, quantidade, conhecidas, estimativa, conhecidas)
+        )
+    
+    duracoes = {nome: conhecidas.get(nome, estimativa) for nome in testes}
+    return _montar_plano(tipo, quantidade, duracoes, estimativa, conhecidas)
+
+def _montar_plano(tipo, quantidade, duracoes, estimativa, conhecidas):
+    shards = distribuir_lpt(duracoes, quantidade)
+    total = sum(duracoes.values())
+    makespan = max((carga for carga, _ in shards), default=0.0)
+    # Nenhuma divisão termina antes da média por shard ou do teste mais longo
+    limite_inferior = max(total / quantidade, max(duracoes.values(), default=0.0))
+    
+    return {
+        'tipo': tipo,
+        'n': quantidade,
+        'total_testes': len(duracoes),
+        'testes_estimados': sum(1 for nome in duracoes if nome not in conhecidas),
+        'estimativa_desconhecidos': round(estimativa, 3),
+        'duracao_total': round(total, 3),
+        'makespan_previsto': round(makespan, 3),
+        'limite_inferior': round(limite_inferior, 3),
+        'shards': [
+            {
+                'indice': indice,
+                'duracao_prevista': round(carga, 3),
+                'quantidade': len(itens),
+                'testes': itens
+            }
+            for indice, (carga, itens) in enumerate(shards)
+        ]
+    }
+
+def tempo_ate_primeira_falha(testes):
+    """Tempo esperado até a primeira falha (ou o fim) para [(duração, probabilidade)] em ordem"""
+    esperado = 0.0
+    sem_falha = 1.0
+    for duracao, probabilidade in testes:
+        esperado += duracao * sem_falha
+        sem_falha *= 1 - probabilidade
+    return esperado
+
+def priorizar(tipo, testes=None):
+    """Ordena `testes` (ou todos os conhecidos do tipo) pela chance de falha por segundo"""
+    duracoes, estimativa = duracoes_conhecidas(tipo)
+    pesos, taxa_tipo = estatisticas_falha(tipo)
+    if testes is None:
+        testes = sorted(duracoes.keys() | pesos.keys())
+    
+    peso_prior = PESO_PRIOR_FALHA * peso_recencia(datetime.utcnow(), EpocaDecaimento.atual())
+    itens = []
+    for nome in dict.fromkeys(testes):
+        peso_falhas, peso_execucoes = pesos.get(nome, (0.0, 0.0))
+        probabilidade = (peso_falhas + peso_prior * taxa_tipo) / (peso_execucoes + peso_prior)
+        duracao = duracoes.get(nome, estimativa)
+        itens.append({
+            'nome_teste': nome,
+            'probabilidade_falha': probabilidade,
+            'tempo_estimado': duracao,
+            'prioridade': probabilidade / max(duracao, TEMPO_MINIMO_TESTE),
+            'com_historico': nome in pesos
+        })
+    
+    ordenados = sorted(itens, key=lambda item: (-item['prioridade'], item['nome_teste']))
+    return {
+        'tipo': tipo,
+        'total_testes': len(itens),
+        'testes_sem_historico': sum(1 for item in itens if not item['com_historico']),
+        'taxa_falha_tipo': round(taxa_tipo, 4),
+        'tempo_esperado_primeira_falha': {
+            'priorizado': round(tempo_ate_primeira_falha(
+                (item['tempo_estimado'], item['probabilidade_falha']) for item in ordenados), 3),
+            'ordem_original': round(tempo_ate_primeira_falha(
+                (item['tempo_estimado'], item['probabilidade_falha']) for item in itens), 3)
+        },
+        'testes': [
+            {
+                'nome_teste': item['nome_teste'],
+                'probabilidade_falha': round(item['probabilidade_falha'], 4),
+                'tempo_estimado': round(item['tempo_estimado'], 3),
+                'prioridade': round(item['prioridade'], 6),
+                'com_historico': item['com_historico']
+            }
+            for item in ordenados
+        ]
+    }
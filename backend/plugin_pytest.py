@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Plugin pytest de Resultados
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Carregado pelo executor de suítes (`pytest -p plugin_pytest`): ao fim de
+cada teste grava o resultado como uma linha JSON (formato da ingestão em
+lote) no descritor de arquivo indicado em QA_DASHBOARD_RESULTADOS_FD.
+"""
+
+import json
+import os
+
+# Descritor de arquivo herdado do processo pai
+VARIAVEL_DESCRITOR = 'QA_DASHBOARD_RESULTADOS_FD'
+
+# Tamanho máximo do stack trace enviado por teste
+MAX_STACK_TRACE = 20000
+
+_saida = None
+_fases = {}
+
+def pytest_configure(config):
+    global _saida
+    descritor = os.environ.get(VARIAVEL_DESCRITOR)
+    if descritor and _saida is None:
+        _saida = os.fdopen(int(descritor), 'w', buffering=1, encoding='utf-8')
+
+def pytest_unconfigure(config):
+    global _saida
+    if _saida is not None:
+        _saida.close()
+        _saida = None
+
+def _mensagem(relatorio):
+    crash = getattr(relatorio.longrepr, 'reprcrash', None)
+    if crash is not None:
+        return crash.message.splitlines()[0] if crash.message else ''
+    if isinstance(relatorio.longrepr, tuple):  # skip: (arquivo, linha, motivo)
+        return relatorio.longrepr[2]
+    return relatorio.longreprtext.splitlines()[-1] if relatorio.longreprtext else ''
+
+def pytest_runtest_logreport(report):
+    """Consolida setup/call/teardown e emite um registro por teste no teardown"""
+    if _saida is None:
+        return
+    
+    _fases.setdefault(report.nodeid, []).append(report)
+    if report.when != 'teardown':
+        return
+    
+    fases = _fases.pop(report.nodeid)
+    falha = next((fase for fase in fases if fase.failed), None)
+    ignorado = next((fase for fase in fases if fase.skipped), None)
+    
+    registro = {
+        'nome_teste': report.nodeid[:200],
+        'status': 'falhou' if falha else ('ignorado' if ignorado else 'passou'),
+        'tempo_execucao': round(sum(fase.duration for fase in fases), 6)
+    }
+    if falha:
+        registro['mensagem_erro'] = _mensagem(falha)
+        registro['stack_trace'] = falha.longreprtext[-MAX_STACK_TRACE:]
+    elif ignorado:
+        registro['mensagem_erro'] = _mensagem(ignorado)
+    
+    _saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Cache de Relatórios
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+O relatório de uma execução finalizada não muda: ele é gerado uma vez,
+guardado comprimido com gzip em `relatorios_execucoes` e servido com ETag
+forte e `Cache-Control: immutable`. Clientes que aceitam gzip recebem os
+bytes guardados sem descompressão; os demais recebem o JSON descomprimido.
+"""
+
+import gzip
+import hashlib
+from datetime import datetime
+from flask import Response, current_app, jsonify, request
+from models import db, ResultadoTeste, RelatorioExecucao, insert_com_upsert
+from streaming import iterar_query
+
+# Execuções que não recebem mais resultados do executor
+STATUS_FINALIZADOS = ('sucesso', 'falha', 'cancelado')
+
+# Validade no cache do cliente; novos resultados (raros após o fim) aparecem após esse prazo
+CACHE_RELATORIOS_SEGUNDOS = 24 * 3600
+
+NIVEL_COMPRESSAO = 6
+
+def montar_relatorio(execucao):
+    """Relatório completo: execução, estatísticas agregadas e todos os resultados"""
+    query_resultados = ResultadoTeste.query.filter_by(execucao_id=execucao.id).order_by(ResultadoTeste.id)
+    return {
+        'execucao': execucao.to_dict(),
+        'estatisticas': ResultadoTeste.get_estatisticas(execucao.id),
+        'resultados': [resultado.to_dict() for resultado in iterar_query(query_resultados)],
+        'gerado_em': datetime.now().isoformat()
+    }
+
+def relatorio_em_cache(execucao):
+    """Entrada do cache para uma execução finalizada, gerada se ausente ou desatualizada"""
+    ultimo_resultado_id = db.session.query(db.func.max(ResultadoTeste.id)).filter(
+        ResultadoTeste.execucao_id == execucao.id
+    ).scalar()
+    entrada = db.session.get(RelatorioExecucao, execucao.id)
+    if (entrada and entrada.ultimo_resultado_id == ultimo_resultado_id
+            and entrada.data_atualizacao_execucao == execucao.data_atualizacao):
+        return entrada
+    
+    # Mesmos bytes que o jsonify produziria para o relatório
+    corpo = (current_app.json.dumps(montar_relatorio(execucao)) + '\n').encode('utf-8')
+    valores = {
+        'execucao_id': execucao.id,
+        'ultimo_resultado_id': ultimo_resultado_id,
+        'data_atualizacao_execucao': execucao.data_atualizacao,
+        'etag': hashlib.sha256(corpo).hexdigest(),
+        'tamanho': len(corpo),
+        'conteudo': gzip.compress(corpo, compresslevel=NIVEL_COMPRESSAO),
+        'gerado_em': datetime.utcnow()
+    }
+    comando = insert_com_upsert()(RelatorioExecucao.__table__).values(**valores)
+    comando = comando.on_conflict_do_update(
+        index_elements=['execucao_id'],
+        set_={coluna: valor for coluna, valor in valores.items() if coluna != 'execucao_id'}
+    )
+    db.session.execute(comando)
+    db.session.commit()
+    return RelatorioExecucao(**valores)
+
+def _marcar_imutavel(resposta):
+    resposta.cache_control.public = True
+    resposta.cache_control.max_age = CACHE_RELATORIOS_SEGUNDOS
+    resposta.cache_control.immutable = True
+
+def resposta_relatorio_imutavel(relatorio):
+    """Relatório montado na hora, mas que não muda (execução arquivada): ETag do conteúdo e 304"""
+    resposta = jsonify(relatorio)
+    resposta.add_etag()
+    _marcar_imutavel(resposta)
+    return resposta.make_conditional(request)
+
+def resposta_relatorio(entrada):
+    """Resposta com o relatório em cache, 304 se o cliente já tem essa versão
+    
+    As versões gzip e sem compressão têm ETags diferentes (bytes diferentes).
+    """
+    aceita_gzip = request.accept_encodings['gzip'] > 0
+    etag = entrada.etag + ('-gzip' if aceita_gzip else '')
+    
+    resposta = Response(mimetype='application/json')
+    resposta.set_etag(etag)
+    resposta.vary.add('Accept-Encoding')
+    _marcar_imutavel(resposta)
+    
+    if request.if_none_match.contains(etag):
+        resposta.status_code = 304
+        return resposta
+    
+    if aceita_gzip:
+        resposta.set_data(entrada.conteudo)
+        resposta.headers['Content-Encoding'] = 'gzip'
+    else:
+        resposta.set_data(gzip.decompress(entrada.conteudo))
+    return resposta
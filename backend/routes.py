@@ -7,16 +7,74 @@ Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
 Endpoints REST para o dashboard de automação de testes.
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request, send_file
 from datetime import datetime, timedelta
 import random
-from models import db, ExecucaoTeste, ResultadoTeste, ConfiguracaoSistema, PipelineCI, MetricaSistema
+import threading
+from models import (
+    db, ExecucaoTeste, ResultadoTeste, ConfiguracaoSistema, PipelineCI, MetricaSistema,
+    MetricaSistemaAgregada, FlakinessTeste, HistogramaDuracao, ClusterFalha, OcorrenciaCluster,
+    Artefato, ReferenciaArtefato, RelatorioExecucao, ExecucaoArquivada, contabilizar_criacao_execucao,
+    contabilizar_conclusao_execucao
+)
+from paginacao import paginar, obter_limite, CursorInvalido
+from streaming import quer_ndjson, resposta_ndjson, resposta_ndjson_itens, MIMETYPE_NDJSON
+from ingestao import inserir_resultados, ler_ndjson
+from busca import buscar_resultados, ConsultaInvalida, LIMITE_PADRAO_BUSCA, LIMITE_MAXIMO_BUSCA
+from artefatos import ArtefatoMuitoGrande, hash_valido
+from exportacao import (
+    lotes_execucoes, lotes_resultados, resposta_exportacao, validar_formato, FormatoIndisponivel,
+    COLUNAS_EXECUCOES, COLUNAS_RESULTADOS
+)
+from relatorios import (
+    montar_relatorio, relatorio_em_cache, resposta_relatorio, resposta_relatorio_imutavel, STATUS_FINALIZADOS
+)
+from arquivamento import carregar_execucao_arquivada, paginar_resultados_arquivados, relatorio_arquivado
+from junit import importar_junit
+from defusedxml import DefusedXmlException
+from defusedxml.ElementTree import ParseError
+from executor import FilaCheia
+from planejamento import planejar_shards, priorizar, MAX_SHARDS
 
 # Blueprints para organização das rotas
 metricas_bp = Blueprint('metricas', __name__)
 execucoes_bp = Blueprint('execucoes', __name__)
 sistema_bp = Blueprint('sistema', __name__)
 pipelines_bp = Blueprint('pipelines', __name__)
+planejamento_bp = Blueprint('planejamento', __name__)
+analytics_bp = Blueprint('analytics', __name__)
+artefatos_bp = Blueprint('artefatos', __name__)
+exportacao_bp = Blueprint('exportacao', __name__)
+
+# Limites de página (parâmetro `limite`)
+LIMITE_MAXIMO_EXECUCOES = 1000
+LIMITE_PADRAO_RESULTADOS = 1000
+LIMITE_MAXIMO_RESULTADOS = 5000
+LIMITE_PADRAO_HISTORICO = 1000
+LIMITE_MAXIMO_HISTORICO = 5000
+MAX_PONTOS_PADRAO_HISTORICO = 500
+LIMITE_PADRAO_FLAKY = 50
+LIMITE_MAXIMO_FLAKY = 1000
+MIN_COMPARACOES_PADRAO_FLAKY = 3
+LIMITE_PADRAO_CLUSTERS = 20
+LIMITE_MAXIMO_CLUSTERS = 200
+JANELA_PADRAO_CLUSTERS = 7
+
+# Janela (dias) dos percentis de duração em /metricas/detalhadas
+JANELA_PADRAO_PERCENTIS = 30
+JANELA_MAXIMA_PERCENTIS = 3650
+MAX_TESTES_PERCENTIS = 100
+
+# Artefatos: tipos de vínculo com um resultado e cache do download (conteúdo imutável)
+TIPOS_ARTEFATO = ('screenshot', 'log', 'outro')
+CACHE_ARTEFATOS_SEGUNDOS = 365 * 24 * 3600
+
+def resposta_lista_paginada(itens, proximo_cursor):
+    """Lista JSON com o cursor da próxima página no header X-Next-Cursor"""
+    resposta = jsonify(itens)
+    if proximo_cursor:
+        resposta.headers['X-Next-Cursor'] = proximo_cursor
+    return resposta
 
 # =============================================================================
 # ROTAS DE MÉTRICAS
@@ -26,21 +84,17 @@ pipelines_bp = Blueprint('pipelines', __name__)
 def obter_metricas():
     """Retorna métricas gerais do dashboard"""
     try:
-        # Métricas gerais
-        metricas_gerais = ExecucaoTeste.get_metricas_gerais()
+        # Métricas gerais e distribuição por tipo (uma única varredura)
+        metricas = ExecucaoTeste.get_metricas_agrupadas()
+        metricas_gerais = metricas['gerais']
         
         # Tendências dos últimos 30 dias
         tendencias = ExecucaoTeste.get_tendencias(30)
         
         # Distribuição por tipo de teste
-        distribuicao = db.session.query(
-            ExecucaoTeste.tipo,
-            db.func.count(ExecucaoTeste.id).label('quantidade')
-        ).group_by(ExecucaoTeste.tipo).all()
-        
         distribuicao_dict = {
-            'tipos': [item.tipo for item in distribuicao],
-            'quantidades': [item.quantidade for item in distribuicao]
+            'tipos': list(metricas['por_tipo'].keys()),
+            'quantidades': [dados['quantidade'] for dados in metricas['por_tipo'].values()]
         }
         
         # Performance dos testes (dados simulados para demonstração)
@@ -66,39 +120,39 @@ def obter_metricas():
             'performance': performance,
             'timestamp': datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 @metricas_bp.route('/metricas/detalhadas', methods=['GET'])
 def obter_metricas_detalhadas():
-    """Retorna métricas detalhadas com mais informações"""
+    """Retorna métricas detalhadas com mais informações
+    
+    Os percentis de duração cobrem os últimos `dias` (padrão: 30) e vêm dos
+    histogramas diários; `teste` (repetível) inclui os percentis de testes
+    específicos.
+    """
     try:
-        # Execuções por status
-        execucoes_por_status = db.session.query(
-            ExecucaoTeste.status,
-            db.func.count(ExecucaoTeste.id).label('quantidade')
-        ).group_by(ExecucaoTeste.status).all()
-        
-        # Execuções por ambiente
-        execucoes_por_ambiente = db.session.query(
-            ExecucaoTeste.ambiente,
-            db.func.count(ExecucaoTeste.id).label('quantidade')
-        ).group_by(ExecucaoTeste.ambiente).all()
-        
-        # Tempo médio por tipo de teste
-        tempo_por_tipo = db.session.query(
-            ExecucaoTeste.tipo,
-            db.func.avg(ExecucaoTeste.duracao).label('tempo_medio')
-        ).group_by(ExecucaoTeste.tipo).all()
-        
-        return jsonify({
-            'execucoes_por_status': {item.status: item.quantidade for item in execucoes_por_status},
-            'execucoes_por_ambiente': {item.ambiente: item.quantidade for item in execucoes_por_ambiente},
-            'tempo_por_tipo': {item.tipo: round(item.tempo_medio, 2) for item in tempo_por_tipo},
+        # Status, ambiente e tempo médio por tipo (uma única varredura)
+        metricas = ExecucaoTeste.get_metricas_agrupadas()
+        
+        dias = obter_limite(request.args.get('dias', type=int), JANELA_PADRAO_PERCENTIS, JANELA_MAXIMA_PERCENTIS)
+        desde = datetime.utcnow().date() - timedelta(days=dias - 1)
+        resposta = {
+            'execucoes_por_status': metricas['por_status'],
+            'execucoes_por_ambiente': metricas['por_ambiente'],
+            'tempo_por_tipo': {tipo: dados['tempo_medio'] for tipo, dados in metricas['por_tipo'].items()},
+            'janela_percentis_dias': dias,
+            'percentis_duracao_por_tipo': HistogramaDuracao.percentis_execucoes(desde),
             'timestamp': datetime.now().isoformat()
-        })
+        }
         
+        testes = request.args.getlist('teste')[:MAX_TESTES_PERCENTIS]
+        if testes:
+            resposta['percentis_testes'] = HistogramaDuracao.percentis_testes(testes, desde, request.args.get('tipo'))
+        
+        return jsonify(resposta)
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -110,7 +164,8 @@ def obter_metricas_detalhadas():
 def listar_execucoes():
     """Lista execuções de testes recentes"""
     try:
-        limite = request.args.get('limite', 10, type=int)
+        limite = obter_limite(request.args.get('limite', type=int), 10, LIMITE_MAXIMO_EXECUCOES)
+        cursor = request.args.get('cursor')
         tipo = request.args.get('tipo')
         status = request.args.get('status')
         
@@ -121,10 +176,14 @@ def listar_execucoes():
         if status:
             query = query.filter(ExecucaoTeste.status == status)
         
-        execucoes = query.order_by(ExecucaoTeste.data_criacao.desc()).limit(limite).all()
-        
-        return jsonify([execucao.to_dict() for execucao in execucoes])
+        execucoes, proximo_cursor = paginar(
+            query, [ExecucaoTeste.data_criacao, ExecucaoTeste.id], cursor, limite
+        )
         
+        return resposta_lista_paginada(ExecucaoTeste.serializar_lista(execucoes), proximo_cursor)
+    
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -132,24 +191,127 @@ def listar_execucoes():
 def obter_execucao(execucao_id):
     """Obtém detalhes de uma execução específica"""
     try:
-        execucao = ExecucaoTeste.query.get_or_404(execucao_id)
+        # Execuções arquivadas respondem pelo resumo guardado no banco
+        execucao = db.session.get(ExecucaoTeste, execucao_id) or db.session.get(ExecucaoArquivada, execucao_id)
+        if not execucao:
+            return jsonify({'erro': 'Execução não encontrada'}), 404
         return jsonify(execucao.to_dict())
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 @execucoes_bp.route('/execucoes/<int:execucao_id>/resultados', methods=['GET'])
 def obter_resultados_execucao(execucao_id):
-    """Obtém resultados de uma execução específica"""
+    """Obtém resultados de uma execução específica (paginados por cursor)"""
     try:
-        execucao = ExecucaoTeste.query.get_or_404(execucao_id)
-        resultados = ResultadoTeste.query.filter_by(execucao_id=execucao_id).all()
+        limite = obter_limite(
+            request.args.get('limite', type=int), LIMITE_PADRAO_RESULTADOS, LIMITE_MAXIMO_RESULTADOS
+        )
+        cursor = request.args.get('cursor')
+        
+        execucao = db.session.get(ExecucaoTeste, execucao_id)
+        if not execucao:
+            arquivada = db.session.get(ExecucaoArquivada, execucao_id)
+            if not arquivada:
+                return jsonify({'erro': 'Execução não encontrada'}), 404
+            _, resultados = carregar_execucao_arquivada(current_app.extensions['arquivo'], arquivada)
+            if quer_ndjson():
+                return resposta_ndjson_itens(None, resultados)
+            resultados, proximo_cursor = paginar_resultados_arquivados(resultados, cursor, limite)
+            return jsonify({'execucao': arquivada.to_dict(), 'resultados': resultados, 'next_cursor': proximo_cursor})
+        
+        # Streaming NDJSON: todos os resultados, um por linha, sem paginação
+        if quer_ndjson():
+            return resposta_ndjson(
+                None,
+                ResultadoTeste.query.filter_by(execucao_id=execucao_id).order_by(ResultadoTeste.id)
+            )
+        
+        resultados, proximo_cursor = paginar(
+            ResultadoTeste.query.filter_by(execucao_id=execucao_id),
+            [ResultadoTeste.id], cursor, limite, descendente=False
+        )
         
         return jsonify({
             'execucao': execucao.to_dict(),
-            'resultados': [resultado.to_dict() for resultado in resultados]
+            'resultados': [resultado.to_dict() for resultado in resultados],
+            'next_cursor': proximo_cursor
         })
+    
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@execucoes_bp.route('/execucoes/<int:execucao_id>/resultados', methods=['POST'])
+def registrar_resultados_execucao(execucao_id):
+    """Registra resultados em lote (array JSON ou NDJSON) em uma única transação"""
+    execucao = db.session.get(ExecucaoTeste, execucao_id)
+    if not execucao:
+        return jsonify({'erro': 'Execução não encontrada'}), 404
+    
+    try:
+        if request.mimetype == MIMETYPE_NDJSON:
+            registros = ler_ndjson(request.stream)
+        else:
+            registros = request.get_json(silent=True)
+            if not isinstance(registros, list):
+                return jsonify({'erro': 'Corpo deve ser um array JSON ou NDJSON'}), 400
+        
+        resumo = inserir_resultados(execucao_id, registros)
+        execucao.data_atualizacao = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify({'execucao_id': execucao_id, **resumo}), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@execucoes_bp.route('/resultados/busca', methods=['GET'])
+def buscar_falhas():
+    """Busca textual em mensagens de erro e stack traces, por relevância"""
+    try:
+        limite = obter_limite(request.args.get('limite', type=int), LIMITE_PADRAO_BUSCA, LIMITE_MAXIMO_BUSCA)
+        inicio = request.args.get('inicio')
+        fim = request.args.get('fim')
+        
+        resultados = buscar_resultados(
+            request.args.get('q', ''),
+            tipo=request.args.get('tipo'),
+            ambiente=request.args.get('ambiente'),
+            status=request.args.get('status'),
+            inicio=datetime.fromisoformat(inicio) if inicio else None,
+            fim=datetime.fromisoformat(fim) if fim else None,
+            limite=limite
+        )
+        return jsonify({'total': len(resultados), 'resultados': resultados})
+    
+    except ConsultaInvalida as e:
+        return jsonify({'erro': str(e)}), 400
+    except ValueError:
+        return jsonify({'erro': "'inicio' e 'fim' devem estar em formato ISO 8601"}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@execucoes_bp.route('/execucoes/junit', methods=['POST'])
+def importar_execucao_junit():
+    """Cria uma execução a partir de um relatório JUnit XML (lido em streaming)"""
+    try:
+        tipo = request.args.get('tipo', 'completo')
+        ambiente = request.args.get('ambiente', 'desenvolvimento')
+        
+        # Upload multipart (campo 'arquivo') ou XML no corpo da requisição
+        arquivo = request.files.get('arquivo')
+        origem = arquivo.stream if arquivo else request.stream
         
+        resumo = importar_junit(
+            origem, tipo, ambiente, request.args.get('observacoes'), request.args.get('commit_hash')
+        )
+        return jsonify(resumo), 201
+    
+    except (ParseError, DefusedXmlException) as e:
+        return jsonify({'erro': f'JUnit XML inválido: {e}'}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -160,37 +322,59 @@ def executar_testes():
         dados = request.get_json() or {}
         tipo_teste = dados.get('tipo', 'completo')
         ambiente = dados.get('ambiente', 'desenvolvimento')
+        commit_hash = dados.get('commit_hash')
+        
+        # No modo pytest só tipos com suíte mapeada: recusar antes de enfileirar
+        suites = current_app.config['SUITES_PYTEST']
+        if current_app.config['EXECUTOR_MODO'] == 'pytest' and tipo_teste not in suites:
+            return jsonify({
+                'erro': f'Tipo sem suíte configurada: {tipo_teste} (disponíveis: {", ".join(sorted(suites))})'
+            }), 400
+        
+        executor = current_app.extensions['executor']
+        
+        # Recusar antes de criar a execução (429 se a fila estiver cheia)
+        executor.verificar_capacidade()
         
-        # Criar nova execução
         execucao = ExecucaoTeste(
             tipo=tipo_teste,
             status='executando',
             duracao=0,
             ambiente=ambiente,
+            commit_hash=commit_hash,
             observacoes=f'Execução iniciada via API - {datetime.now().strftime("%d/%m/%Y %H:%M")}'
         )
         
         db.session.add(execucao)
-        db.session.commit()
+        db.session.flush()
+        contabilizar_criacao_execucao(execucao)
         
-        # Simular execução de testes (em produção, isso seria feito em background)
-        import threading
-        thread = threading.Thread(target=simular_execucao_testes, args=(execucao.id,))
-        thread.start()
+        # Execução e job gravados na mesma transação
+        job = executor.enfileirar(execucao)
+        db.session.commit()
+        executor.notificar()
         
         return jsonify({
             'mensagem': 'Execução de testes iniciada',
             'execucao_id': execucao.id,
+            'job_id': job.id,
             'status': 'executando'
         }), 202
-        
+    
+    except FilaCheia as e:
+        resposta = jsonify({'erro': str(e), 'retry_after': e.retry_after})
+        resposta.headers['Retry-After'] = str(e.retry_after)
+        return resposta, 429
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
-def simular_execucao_testes(execucao_id):
-    """Simula a execução de testes em background"""
+def simular_execucao_testes(execucao_id, cancelado=None):
+    """Simula a execução de testes em background
+    
+    `cancelado` é o evento de cancelamento do job; quando sinalizado, a
+    execução é encerrada com status 'cancelado'.
+    """
     try:
-        import time
         execucao = ExecucaoTeste.query.get(execucao_id)
         if not execucao:
             return
@@ -198,60 +382,141 @@ def simular_execucao_testes(execucao_id):
         # Simular tempo de execução (reduzido para demonstração)
         tempo_execucao = random.randint(5, 15)  # 5-15 segundos
         
-        # Simular execução em tempo real
-        time.sleep(tempo_execucao)
+        # Simular execução em tempo real (interrompível pelo cancelamento)
+        cancelado = cancelado or threading.Event()
+        if cancelado.wait(tempo_execucao):
+            execucao.status = 'cancelado'
+            execucao.data_atualizacao = datetime.utcnow()
+            db.session.commit()
+            return
         
         # Simular resultados de teste
         tipos_teste = ['Login', 'Navegação', 'Formulários', 'API', 'Performance']
         status_possiveis = ['passou', 'falhou', 'ignorado']
         
-        for i, tipo_teste in enumerate(tipos_teste):
-            resultado = ResultadoTeste(
-                execucao_id=execucao_id,
-                nome_teste=f'Teste {tipo_teste} - {i+1}',
-                status=random.choice(status_possiveis),
-                tempo_execucao=random.randint(5, 30),
-                mensagem_erro='' if random.choice([True, False]) else 'Erro de validação'
-            )
-            db.session.add(resultado)
+        inserir_resultados(execucao_id, [
+            {
+                'nome_teste': f'Teste {tipo_teste} - {i+1}',
+                'status': random.choice(status_possiveis),
+                'tempo_execucao': random.randint(5, 30),
+                'mensagem_erro': '' if random.choice([True, False]) else 'Erro de validação'
+            }
+            for i, tipo_teste in enumerate(tipos_teste)
+        ])
         
         # Atualizar execução
+        status_anterior, duracao_anterior = execucao.status, execucao.duracao
         execucao.duracao = tempo_execucao
         execucao.status = 'sucesso' if random.random() > 0.2 else 'falha'  # nosec B311
         execucao.data_atualizacao = datetime.utcnow()
+        contabilizar_conclusao_execucao(execucao, status_anterior, duracao_anterior)
         
         db.session.commit()
-        
+    
     except Exception as e:
         print(f"Erro na simulação de execução: {e}")
 
+@execucoes_bp.route('/jobs/estatisticas', methods=['GET'])
+def obter_estatisticas_jobs():
+    """Profundidade da fila, execuções em andamento e latências do executor"""
+    try:
+        return jsonify(current_app.extensions['executor'].estatisticas())
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@execucoes_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def obter_job(job_id):
+    """Status de um job do executor"""
+    try:
+        job = current_app.extensions['executor'].obter(job_id)
+        if not job:
+            return jsonify({'erro': 'Job não encontrado'}), 404
+        return jsonify(job.to_dict())
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@execucoes_bp.route('/jobs/<int:job_id>/cancelar', methods=['POST'])
+def cancelar_job(job_id):
+    """Cancela um job pendente ou sinaliza o cancelamento de um em execução"""
+    try:
+        job = current_app.extensions['executor'].cancelar(job_id)
+        if not job:
+            return jsonify({'erro': 'Job não encontrado'}), 404
+        
+        return jsonify(job.to_dict())
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
 # =============================================================================
 # ROTAS DO SISTEMA
 # =============================================================================
 
 @sistema_bp.route('/sistema', methods=['GET'])
 def obter_metricas_sistema():
-    """Retorna métricas atuais do sistema"""
+    """Retorna métricas atuais do sistema (última amostra do amostrador)"""
     try:
-        metricas = MetricaSistema.get_metricas_atuais()
-        return jsonify(metricas)
+        amostrador = current_app.extensions.get('amostrador')
+        amostra = amostrador.ultima() if amostrador else None
         
+        if amostra is None:
+            metricas = MetricaSistema.get_metricas_atuais()
+        else:
+            metricas = MetricaSistema.resumir(amostra)
+        
+        return jsonify(metricas)
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 @sistema_bp.route('/sistema/historico', methods=['GET'])
 def obter_historico_sistema():
-    """Retorna histórico de métricas do sistema"""
+    """Retorna histórico de métricas do sistema
+    
+    O nível (bruto, minuto ou hora) é escolhido para que a janela caiba em
+    `max_pontos`, ou informado explicitamente em `resolucao`.
+    """
     try:
         horas = request.args.get('horas', 24, type=int)
+        max_pontos = request.args.get('max_pontos', MAX_PONTOS_PADRAO_HISTORICO, type=int)
+        nivel = request.args.get('resolucao')
+        limite = obter_limite(
+            request.args.get('limite', type=int), LIMITE_PADRAO_HISTORICO, LIMITE_MAXIMO_HISTORICO
+        )
+        cursor = request.args.get('cursor')
         data_inicio = datetime.utcnow() - timedelta(hours=horas)
         
-        metricas = MetricaSistema.query.filter(
-            MetricaSistema.data_coleta >= data_inicio
-        ).order_by(MetricaSistema.data_coleta.desc()).all()
+        if nivel is None:
+            nivel = MetricaSistemaAgregada.selecionar_nivel(
+                horas, max(max_pontos, 1), current_app.config['AMOSTRAGEM_INTERVALO']
+            )
+        elif nivel != 'bruto' and nivel not in MetricaSistemaAgregada.RESOLUCOES:
+            return jsonify({'erro': 'Resolução inválida (use bruto, minuto ou hora)'}), 400
+        
+        if nivel == 'bruto':
+            query = MetricaSistema.query.filter(MetricaSistema.data_coleta >= data_inicio)
+            colunas = [MetricaSistema.data_coleta, MetricaSistema.id]
+        else:
+            query = MetricaSistemaAgregada.query.filter(
+                MetricaSistemaAgregada.resolucao == MetricaSistemaAgregada.RESOLUCOES[nivel],
+                MetricaSistemaAgregada.inicio >= data_inicio
+            )
+            colunas = [MetricaSistemaAgregada.inicio, MetricaSistemaAgregada.id]
         
-        return jsonify([metrica.to_dict() for metrica in metricas])
+        # Streaming NDJSON: toda a janela, uma métrica por linha
+        if quer_ndjson():
+            resposta = resposta_ndjson(None, query.order_by(*[coluna.desc() for coluna in colunas]))
+        else:
+            metricas, proximo_cursor = paginar(query, colunas, cursor, limite)
+            resposta = resposta_lista_paginada([metrica.to_dict() for metrica in metricas], proximo_cursor)
         
+        resposta.headers['X-Resolucao'] = nivel
+        return resposta
+    
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -264,7 +529,7 @@ def obter_configuracoes():
             return jsonify(configuracao.to_dict())
         else:
             return jsonify({'erro': 'Configuração não encontrada'}), 404
-            
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -291,7 +556,7 @@ def atualizar_configuracoes():
         db.session.commit()
         
         return jsonify(configuracao.to_dict())
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -310,7 +575,7 @@ def listar_pipelines():
             pipelines = criar_pipelines_exemplo()
         
         return jsonify(pipelines)
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -320,7 +585,7 @@ def obter_pipeline(pipeline_id):
     try:
         pipeline = PipelineCI.query.get_or_404(pipeline_id)
         return jsonify(pipeline.to_dict())
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -344,7 +609,7 @@ def criar_pipeline():
         db.session.commit()
         
         return jsonify(pipeline.to_dict()), 201
-        
+    
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -389,34 +654,309 @@ def criar_pipelines_exemplo():
 
 @execucoes_bp.route('/relatorios/<int:execucao_id>', methods=['GET'])
 def gerar_relatorio(execucao_id):
-    """Gera relatório de uma execução"""
+    """Gera relatório de uma execução
+    
+    Execuções finalizadas são servidas do cache de relatórios (gzip, ETag
+    forte, `Cache-Control: immutable`); ver relatorios.py. Execuções
+    arquivadas são lidas do arquivo frio.
+    """
     try:
-        execucao = ExecucaoTeste.query.get_or_404(execucao_id)
-        resultados = ResultadoTeste.query.filter_by(execucao_id=execucao_id).all()
+        execucao = db.session.get(ExecucaoTeste, execucao_id)
+        if not execucao:
+            arquivada = db.session.get(ExecucaoArquivada, execucao_id)
+            if not arquivada:
+                return jsonify({'erro': 'Execução não encontrada'}), 404
+            relatorio = relatorio_arquivado(current_app.extensions['arquivo'], arquivada)
+            if quer_ndjson():
+                resultados = relatorio.pop('resultados')
+                return resposta_ndjson_itens(relatorio, resultados)
+            return resposta_relatorio_imutavel(relatorio)
+        
+        # Streaming NDJSON: cabeçalho com execução e estatísticas, depois um resultado por linha
+        if quer_ndjson():
+            return resposta_ndjson(
+                {
+                    'execucao': execucao.to_dict(),
+                    'estatisticas': ResultadoTeste.get_estatisticas(execucao_id),
+                    'gerado_em': datetime.now().isoformat()
+                },
+                ResultadoTeste.query.filter_by(execucao_id=execucao_id).order_by(ResultadoTeste.id)
+            )
         
-        # Estatísticas do relatório
-        total_testes = len(resultados)
-        testes_passaram = len([r for r in resultados if r.status == 'passou'])
-        testes_falharam = len([r for r in resultados if r.status == 'falhou'])
-        testes_ignorados = len([r for r in resultados if r.status == 'ignorado'])
+        if execucao.status in STATUS_FINALIZADOS:
+            return resposta_relatorio(relatorio_em_cache(execucao))
+        
+        return jsonify(montar_relatorio(execucao))
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+# =============================================================================
+# ROTAS DE PLANEJAMENTO
+# =============================================================================
+
+def ler_parametros_planejamento():
+    """(tipo, n, testes) de um GET (query string) ou POST (JSON)
+    
+    `testes` é None em um GET; levanta ValueError com a mensagem de erro.
+    """
+    dados = request.get_json(silent=True) if request.method == 'POST' else None
+    if not isinstance(dados, dict):
+        dados = {}
+    tipo = dados.get('tipo', request.args.get('tipo'))
+    testes = dados.get('testes')
+    
+    if not tipo:
+        raise ValueError("Parâmetro 'tipo' é obrigatório")
+    if request.method == 'POST' and (
+        not isinstance(testes, list) or not all(isinstance(nome, str) for nome in testes)
+    ):
+        raise ValueError("'testes' deve ser uma lista de nomes de teste")
+    return tipo, dados.get('n', request.args.get('n', type=int)), testes
+
+@planejamento_bp.route('/planejamento/shards', methods=['GET', 'POST'])
+def planejar_shards_suite():
+    """Divide a suíte de um tipo em `n` shards de duração equilibrada
+    
+    GET planeja todos os testes conhecidos do tipo; POST recebe a lista de
+    testes a executar (`testes`), e os que não têm histórico são estimados.
+    """
+    try:
+        try:
+            tipo, quantidade, testes = ler_parametros_planejamento()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        if isinstance(quantidade, bool) or not isinstance(quantidade, int) or not 1 <= quantidade <= MAX_SHARDS:
+            return jsonify({'erro': f"Parâmetro 'n' deve ser um inteiro entre 1 e {MAX_SHARDS}"}), 400
+        
+        return jsonify(planejar_shards(tipo, quantidade, testes))
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@planejamento_bp.route('/planejamento/prioridade', methods=['GET', 'POST'])
+def priorizar_testes():
+    """Ordena os testes pela probabilidade de falha recente por segundo de execução
+    
+    GET ordena todos os testes conhecidos do tipo; POST ordena a lista
+    informada em `testes`.
+    """
+    try:
+        try:
+            tipo, _, testes = ler_parametros_planejamento()
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
         
-        tempo_total = sum(r.tempo_execucao for r in resultados)
+        return jsonify(priorizar(tipo, testes))
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+# =============================================================================
+# ROTAS DE ANALYTICS
+# =============================================================================
+
+@analytics_bp.route('/analytics/flaky', methods=['GET'])
+def listar_testes_flaky():
+    """Testes que alternam entre passou e falhou no mesmo commit/ambiente
+    
+    Uma linha por (tipo, ambiente, nome_teste), ordenadas pela taxa de
+    alternância (`score`); `min_comparacoes` descarta testes com pouco
+    histórico. Paginação pelo header X-Next-Cursor.
+    """
+    try:
+        limite = obter_limite(request.args.get('limite', type=int), LIMITE_PADRAO_FLAKY, LIMITE_MAXIMO_FLAKY)
+        min_comparacoes = request.args.get('min_comparacoes', MIN_COMPARACOES_PADRAO_FLAKY, type=int)
+        min_score = request.args.get('min_score', type=float)
+        
+        # Sem `min_score`, apenas testes que alternaram ao menos uma vez
+        query = FlakinessTeste.query.filter(
+            FlakinessTeste.comparacoes >= min_comparacoes,
+            FlakinessTeste.score > 0 if min_score is None else FlakinessTeste.score >= min_score
+        )
+        for campo in ('tipo', 'ambiente'):
+            if request.args.get(campo):
+                query = query.filter(getattr(FlakinessTeste, campo) == request.args[campo])
+        testes, proximo_cursor = paginar(
+            query, [FlakinessTeste.score, FlakinessTeste.id], request.args.get('cursor'), limite
+        )
         
-        relatorio = {
-            'execucao': execucao.to_dict(),
-            'estatisticas': {
-                'total_testes': total_testes,
-                'testes_passaram': testes_passaram,
-                'testes_falharam': testes_falharam,
-                'testes_ignorados': testes_ignorados,
-                'taxa_sucesso': (testes_passaram / total_testes * 100) if total_testes > 0 else 0,
-                'tempo_total': round(tempo_total, 2)
-            },
-            'resultados': [resultado.to_dict() for resultado in resultados],
-            'gerado_em': datetime.now().isoformat()
-        }
+        return resposta_lista_paginada([teste.to_dict() for teste in testes], proximo_cursor)
+    
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@analytics_bp.route('/analytics/clusters', methods=['GET'])
+def listar_clusters_falhas():
+    """Clusters de falhas com mais ocorrências em uma execução ou nos últimos `dias`"""
+    try:
+        limite = obter_limite(request.args.get('limite', type=int), LIMITE_PADRAO_CLUSTERS, LIMITE_MAXIMO_CLUSTERS)
+        execucao_id = request.args.get('execucao_id', type=int)
         
-        return jsonify(relatorio)
+        if execucao_id is not None:
+            clusters = OcorrenciaCluster.ranking(limite, execucao_id=execucao_id)
+        else:
+            dias = obter_limite(request.args.get('dias', type=int), JANELA_PADRAO_CLUSTERS, JANELA_MAXIMA_PERCENTIS)
+            clusters = OcorrenciaCluster.ranking(limite, desde=datetime.utcnow().date() - timedelta(days=dias - 1))
         
+        return jsonify(clusters)
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@analytics_bp.route('/analytics/clusters/<int:cluster_id>/resultados', methods=['GET'])
+def listar_resultados_cluster(cluster_id):
+    """Falhas de um cluster, das mais recentes às mais antigas (paginadas por cursor)"""
+    try:
+        if not db.session.get(ClusterFalha, cluster_id):
+            return jsonify({'erro': 'Cluster não encontrado'}), 404
+        limite = obter_limite(request.args.get('limite', type=int), LIMITE_PADRAO_RESULTADOS, LIMITE_MAXIMO_RESULTADOS)
+        
+        resultados, proximo_cursor = paginar(
+            ResultadoTeste.query.filter(ResultadoTeste.cluster_id == cluster_id),
+            [ResultadoTeste.id], request.args.get('cursor'), limite
+        )
+        return resposta_lista_paginada([resultado.to_dict() for resultado in resultados], proximo_cursor)
+    
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+# =============================================================================
+# ROTAS DE ARTEFATOS
+# =============================================================================
+
+@artefatos_bp.route('/artefatos', methods=['POST'])
+def enviar_artefato():
+    """Recebe um screenshot ou log (corpo bruto ou campo multipart `arquivo`)
+    
+    O conteúdo é gravado pelo SHA-256: um upload repetido não ocupa espaço
+    novo e retorna 200 com `deduplicado`. Com `resultado_id`, o artefato é
+    vinculado ao resultado (`tipo` screenshot também preenche `screenshot_path`).
+    """
+    try:
+        resultado_id = request.args.get('resultado_id', type=int)
+        tipo = request.args.get('tipo', 'screenshot')
+        if tipo not in TIPOS_ARTEFATO:
+            return jsonify({'erro': f"Tipo inválido. Use: {', '.join(TIPOS_ARTEFATO)}"}), 400
+        
+        resultado = None
+        if resultado_id is not None:
+            resultado = db.session.get(ResultadoTeste, resultado_id)
+            if not resultado:
+                return jsonify({'erro': 'Resultado não encontrado'}), 404
+        
+        if request.mimetype == 'multipart/form-data':
+            arquivo = request.files.get('arquivo')
+            if not arquivo:
+                return jsonify({'erro': "Campo 'arquivo' é obrigatório"}), 400
+            origem, tipo_conteudo, nome = arquivo.stream, arquivo.mimetype, arquivo.filename
+        else:
+            origem, tipo_conteudo, nome = request.stream, request.mimetype, request.args.get('nome')
+        
+        armazem = current_app.extensions['artefatos']
+        hash_conteudo, tamanho, novo = armazem.gravar(origem)
+        if not tamanho:
+            return jsonify({'erro': 'Artefato vazio'}), 400
+        
+        artefato = Artefato.registrar(
+            hash_conteudo, tamanho, tipo_conteudo or 'application/octet-stream', (nome or '')[:255] or None
+        )
+        if resultado:
+            ReferenciaArtefato.vincular([{'artefato_id': artefato.id, 'resultado_id': resultado.id, 'tipo': tipo}])
+            if tipo == 'screenshot':
+                resultado.screenshot_path = artefato.url
+                RelatorioExecucao.invalidar(resultado.execucao_id)
+        db.session.commit()
+        
+        return jsonify({**artefato.to_dict(), 'deduplicado': not novo}), 201 if novo else 200
+    
+    except ArtefatoMuitoGrande as e:
+        return jsonify({'erro': str(e)}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@artefatos_bp.route('/artefatos/<hash_conteudo>', methods=['GET'])
+def baixar_artefato(hash_conteudo):
+    """Conteúdo de um artefato com suporte a Range e If-None-Match
+    
+    O hash é o ETag e o conteúdo nunca muda, então clientes e proxies podem
+    manter o arquivo em cache indefinidamente.
+    """
+    try:
+        armazem = current_app.extensions['artefatos']
+        artefato = Artefato.query.filter_by(hash_conteudo=hash_conteudo).first() if hash_valido(hash_conteudo) else None
+        if not artefato or not armazem.existe(hash_conteudo):
+            return jsonify({'erro': 'Artefato não encontrado'}), 404
+        
+        resposta = send_file(
+            armazem.caminho(hash_conteudo),
+            mimetype=artefato.tipo_conteudo,
+            download_name=artefato.nome_original or hash_conteudo,
+            etag=hash_conteudo,
+            conditional=True,
+            max_age=CACHE_ARTEFATOS_SEGUNDOS
+        )
+        resposta.cache_control.public = True
+        resposta.cache_control.immutable = True
+        return resposta
+    
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+# =============================================================================
+# ROTAS DE EXPORTAÇÃO
+# =============================================================================
+
+def ler_parametros_exportacao():
+    """Formato e filtros das exportações (ValueError se inválidos)"""
+    formato = request.args.get('formato', 'csv').lower()
+    validar_formato(formato)
+    inicio = request.args.get('inicio')
+    fim = request.args.get('fim')
+    try:
+        filtros = {
+            'inicio': datetime.fromisoformat(inicio) if inicio else None,
+            'fim': datetime.fromisoformat(fim) if fim else None
+        }
+    except ValueError:
+        raise ValueError("'inicio' e 'fim' devem estar em formato ISO 8601")
+    for campo in ('tipo', 'ambiente', 'status'):
+        filtros[campo] = request.args.get(campo)
+    return formato, filtros
+
+@exportacao_bp.route('/export/execucoes', methods=['GET'])
+def exportar_execucoes():
+    """Execuções em CSV, Parquet ou Arrow, em streaming (ver exportacao.py)"""
+    try:
+        formato, filtros = ler_parametros_exportacao()
+        return resposta_exportacao('execucoes', formato, COLUNAS_EXECUCOES, lotes_execucoes(**filtros))
+    
+    except FormatoIndisponivel as e:
+        return jsonify({'erro': str(e)}), 501
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@exportacao_bp.route('/export/resultados', methods=['GET'])
+def exportar_resultados():
+    """Resultados em CSV, Parquet ou Arrow, em streaming
+    
+    O período (`inicio`/`fim`) é o da criação da execução; `status` filtra
+    o status do resultado.
+    """
+    try:
+        formato, filtros = ler_parametros_exportacao()
+        return resposta_exportacao('resultados', formato, COLUNAS_RESULTADOS, lotes_resultados(**filtros))
+    
+    except FormatoIndisponivel as e:
+        return jsonify({'erro': str(e)}), 501
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Respostas em Streaming (NDJSON)
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Respostas `application/x-ndjson` (um objeto JSON por linha) geradas sob
+demanda a partir de um cursor no servidor, com memória constante
+independente do tamanho do resultado.
+"""
+
+import json
+from flask import Response, request, stream_with_context
+
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+# Linhas lidas do banco por lote durante o streaming
+TAMANHO_LOTE_STREAMING = 1000
+
+def quer_ndjson():
+    """Indica se o cliente pediu streaming (Accept NDJSON ou ?stream=1)"""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', MIMETYPE_NDJSON]) == MIMETYPE_NDJSON
+
+def linha_ndjson(objeto):
+    """Serializa um objeto como uma linha NDJSON"""
+    return json.dumps(objeto, ensure_ascii=False) + '\n'
+
+def iterar_query(query, tamanho_lote=TAMANHO_LOTE_STREAMING):
+    """Itera uma query ORM em lotes usando cursor no servidor (yield_per)"""
+    return query.execution_options(stream_results=True).yield_per(tamanho_lote)
+
+def resposta_ndjson(cabecalho, query, serializar=lambda item: item.to_dict()):
+    """Resposta NDJSON: linha opcional de cabeçalho seguida de uma linha por item
+    
+    O gerador roda dentro do contexto da requisição (stream_with_context),
+    então a sessão do banco permanece válida até a última linha.
+    """
+    def gerar():
+        if cabecalho is not None:
+            yield linha_ndjson(cabecalho)
+        for item in iterar_query(query):
+            yield linha_ndjson(serializar(item))
+    
+    return Response(stream_with_context(gerar()), mimetype=MIMETYPE_NDJSON)
+
+def resposta_ndjson_itens(cabecalho, itens):
+    """Resposta NDJSON a partir de um iterável de dicts (ex.: execução arquivada, lida sob demanda)"""
+    def gerar():
+        if cabecalho is not None:
+            yield linha_ndjson(cabecalho)
+        for item in itens:
+            yield linha_ndjson(item)
+    
+    return Response(gerar(), mimetype=MIMETYPE_NDJSON)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Executor de Suítes pytest
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Executa a suíte pytest do tipo solicitado dividida em shards de duração
+equilibrada (ver planejamento.py), um processo pytest por shard; com
+`priorizar`, cada shard roda primeiro os testes com maior chance de falha.
+Cada processo envia os resultados por um pipe (ver plugin_pytest.py) e eles
+são gravados em `ResultadoTeste` à medida que os testes terminam; ao final,
+a execução recebe a duração e o status. Os node ids de cada shard vão para o
+pytest em um arquivo de argumentos (`@arquivo`), e não na linha de comando,
+que tem tamanho limitado; um shard que termina com erro do pytest
+(e não por testes falhando) tem as últimas linhas do stderr anexadas às
+observações.
+"""
+
+import json
+import os
+import queue
+import subprocess  # nosec B404
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from models import db, ExecucaoTeste, contabilizar_conclusao_execucao
+from ingestao import inserir_resultados
+from plugin_pytest import VARIAVEL_DESCRITOR
+from planejamento import planejar_shards, priorizar
+
+# Raiz do repositório: caminhos das suítes são relativos a ela
+RAIZ_PROJETO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Suítes por tipo de execução
+SUITES_PADRAO = {
+    'api': ['automation/api/test_api.py'],
+    'web': ['automation/selenium/test_web.py'],
+    'completo': ['automation/api/test_api.py', 'automation/selenium/test_web.py']
+}
+
+# Exportada para os processos pytest; permite às suítes saber que rodam
+# dentro do dashboard (ex.: não disparar novas execuções recursivamente)
+VARIAVEL_EXECUCAO = 'QA_DASHBOARD_EXECUCAO_ID'
+
+# Gravação dos resultados: a cada N registros ou a cada intervalo (segundos)
+TAMANHO_LOTE_GRAVACAO = 200
+INTERVALO_GRAVACAO = 1.0
+
+# Linhas finais da saída do pytest guardadas nas observações em caso de erro
+LINHAS_SAIDA_ERRO = 5
+
+# Bytes finais da saída de um shard lidos para extrair essas linhas
+BYTES_SAIDA_ERRO = 8192
+
+# Códigos de saída do pytest que não indicam erro: todos passaram, algum
+# teste falhou, nenhum teste coletado
+CODIGOS_PYTEST_OK = (0, 1, 5)
+
+_FIM_SHARD = object()
+
+class ErroSuite(Exception):
+    """A suíte não pôde ser coletada ou não existe para o tipo"""
+
+class ExecutorSuites:
+    """Tarefa do executor de execuções que roda a suíte pytest real
+    
+    `suites` mapeia tipo -> caminhos (relativos a `raiz`); `processos` é o
+    número máximo de processos pytest por execução.
+    """
+    
+    def __init__(self, suites=None, processos=None, raiz=RAIZ_PROJETO, priorizar=True):
+        self.suites = SUITES_PADRAO if suites is None else suites
+        self.processos = processos or os.cpu_count() or 1
+        self.raiz = raiz
+        self.priorizar = priorizar
+    
+    def __call__(self, execucao_id, cancelado=None):
+        execucao = db.session.get(ExecucaoTeste, execucao_id)
+        if not execucao:
+            return
+        
+        cancelado = cancelado or threading.Event()
+        inicio = time.monotonic()
+        try:
+            testes = self.coletar(execucao.tipo)
+            shards = self.dividir(execucao.tipo, testes)
+            falhas, codigos, erros = self._executar_shards(execucao_id, shards, cancelado)
+            if cancelado.is_set():
+                status = 'cancelado'
+            else:
+                status = 'sucesso' if not falhas and all(codigo in (0, 5) for codigo in codigos) else 'falha'
+                if erros:
+                    execucao.observacoes = '\n'.join([execucao.observacoes or '', *erros]).strip()
+        except ErroSuite as e:
+            db.session.rollback()
+            status = 'falha'
+            execucao.observacoes = f'{execucao.observacoes or ""}\n{e}'.strip()
+        
+        status_anterior, duracao_anterior = execucao.status, execucao.duracao
+        execucao.duracao = int(round(time.monotonic() - inicio))
+        execucao.status = status
+        execucao.data_atualizacao = datetime.utcnow()
+        contabilizar_conclusao_execucao(execucao, status_anterior, duracao_anterior)
+        db.session.commit()
+    
+    def coletar(self, tipo):
+        """Node ids dos testes da suíte do tipo (pytest --collect-only)"""
+        caminhos = self.suites.get(tipo)
+        if not caminhos:
+            raise ErroSuite(f"Nenhuma suíte pytest configurada para o tipo '{tipo}'")
+        
+        processo = subprocess.run(  # nosec B603
+            self._comando('--collect-only', '-q', *caminhos),
+            cwd=self.raiz, capture_output=True, text=True
+        )
+        if processo.returncode not in (0, 5):
+            saida = (processo.stdout + processo.stderr).strip().splitlines()
+            raise ErroSuite('Falha ao coletar a suíte: ' + ' | '.join(saida[-LINHAS_SAIDA_ERRO:]))
+        return [linha for linha in processo.stdout.splitlines() if '::' in linha]
+    
+    def dividir(self, tipo, testes):
+        """Shards não vazios de duração equilibrada (LPT sobre o histórico)"""
+        quantidade = max(1, min(self.processos, len(testes)))
+        shards = [shard['testes'] for shard in planejar_shards(tipo, quantidade, testes)['shards'] if shard['testes']]
+        if not self.priorizar:
+            return shards
+        
+        # Dentro de cada shard, falhas prováveis e rápidas primeiro
+        ordem = {item['nome_teste']: indice for indice, item in enumerate(priorizar(tipo, testes)['testes'])}
+        return [sorted(shard, key=ordem.__getitem__) for shard in shards]
+    
+    # -------------------------------------------------------------------------
+    # Internos
+    # -------------------------------------------------------------------------
+    
+    def _comando(self, *argumentos):
+        return [sys.executable, '-m', 'pytest', '--rootdir', self.raiz, '-p', 'no:cacheprovider', *argumentos]
+    
+    def _ambiente(self, execucao_id, descritor):
+        ambiente = dict(os.environ)
+        caminho_backend = os.path.dirname(os.path.abspath(__file__))
+        ambiente['PYTHONPATH'] = os.pathsep.join(filter(None, [caminho_backend, ambiente.get('PYTHONPATH')]))
+        ambiente[VARIAVEL_DESCRITOR] = str(descritor)
+        ambiente[VARIAVEL_EXECUCAO] = str(execucao_id)
+        return ambiente
+    
+    def _iniciar_shard(self, execucao_id, shard, fila):
+        """Inicia o pytest do shard; retorna (processo, arquivo de argumentos, saída)"""
+        descritor, argumentos = tempfile.mkstemp(prefix=f'shard-{execucao_id}-', suffix='.txt')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('\n'.join(shard) + '\n')
+        saida = tempfile.TemporaryFile()
+        leitura, escrita = os.pipe()
+        try:
+            processo = subprocess.Popen(  # nosec B603
+                self._comando('-q', '-p', 'plugin_pytest', f'@{argumentos}'),
+                cwd=self.raiz, env=self._ambiente(execucao_id, escrita), pass_fds=(escrita,),
+                stdout=subprocess.DEVNULL, stderr=saida
+            )
+        except Exception:
+            os.close(leitura)
+            saida.close()
+            os.unlink(argumentos)
+            raise
+        finally:
+            os.close(escrita)
+        
+        def ler():
+            with os.fdopen(leitura, encoding='utf-8') as origem:
+                for linha in origem:
+                    fila.put(linha)
+            fila.put(_FIM_SHARD)
+        
+        threading.Thread(target=ler, name=f'shard-execucao-{execucao_id}', daemon=True).start()
+        return processo, argumentos, saida
+    
+    @staticmethod
+    def _final_saida(saida):
+        """Últimas linhas não vazias do stderr capturado de um shard"""
+        saida.seek(0, os.SEEK_END)
+        saida.seek(max(0, saida.tell() - BYTES_SAIDA_ERRO))
+        linhas = saida.read().decode('utf-8', errors='replace').strip().splitlines()
+        return ' | '.join(linha.strip() for linha in linhas[-LINHAS_SAIDA_ERRO:] if linha.strip())
+    
+    def _executar_shards(self, execucao_id, shards, cancelado):
+        """Roda os shards em paralelo gravando os resultados conforme chegam
+        
+        Retorna (quantidade de falhas, códigos de saída dos processos,
+        final do stderr dos shards que terminaram com erro do pytest).
+        """
+        fila = queue.Queue()
+        iniciados = []
+        try:
+            for shard in shards:
+                iniciados.append(self._iniciar_shard(execucao_id, shard, fila))
+            falhas = self._gravar_resultados(execucao_id, [processo for processo, _, _ in iniciados], fila, cancelado)
+            
+            codigos, erros = [], []
+            for indice, (processo, _, saida) in enumerate(iniciados, start=1):
+                codigo = processo.wait()
+                codigos.append(codigo)
+                if codigo not in CODIGOS_PYTEST_OK and not cancelado.is_set():
+                    erros.append(f'Shard {indice} terminou com código {codigo}: {self._final_saida(saida)}')
+            return falhas, codigos, erros
+        finally:
+            for processo, argumentos, saida in iniciados:
+                if processo.poll() is None:
+                    processo.kill()
+                    processo.wait()
+                saida.close()
+                os.unlink(argumentos)
+    
+    def _gravar_resultados(self, execucao_id, processos, fila, cancelado):
+        """Grava em lotes os resultados enviados pelos shards; retorna as falhas"""
+        ativos = len(processos)
+        falhas = 0
+        lote = []
+        ultima_gravacao = time.monotonic()
+        interrompido = False
+        while ativos:
+            if cancelado.is_set() and not interrompido:
+                for processo in processos:
+                    processo.terminate()
+                interrompido = True
+            
+            try:
+                item = fila.get(timeout=0.2)
+            except queue.Empty:
+                item = None
+            
+            if item is _FIM_SHARD:
+                ativos -= 1
+            elif item:
+                try:
+                    registro = json.loads(item)
+                except ValueError:
+                    continue
+                falhas += registro.get('status') == 'falhou'
+                lote.append(registro)
+            
+            if lote and (len(lote) >= TAMANHO_LOTE_GRAVACAO or not ativos
+                         or time.monotonic() - ultima_gravacao >= INTERVALO_GRAVACAO):
+                inserir_resultados(execucao_id, lote)
+                db.session.commit()
+                lote = []
+                ultima_gravacao = time.monotonic()
+        
+        return falhas
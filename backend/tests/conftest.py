@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Fixtures dos Testes de Backend
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import os
+import sys
+import pytest
+
+# Permitir `from app import ...` ao executar `pytest tests/` a partir de backend/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import criar_aplicacao
+from models import db, ExecucaoTeste
+from planejamento import limpar_cache
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    """Arquivo SQLite isolado por teste"""
+    return tmp_path / 'qa_dashboard_teste.db'
+
+@pytest.fixture
+def app(caminho_banco):
+    """Aplicação configurada com banco temporário e dados de exemplo"""
+    # Caches por processo não devem atravessar bancos de testes diferentes
+    limpar_cache()
+    aplicacao = criar_aplicacao({
+        'TESTING': True,
+        'AMOSTRADOR_ATIVO': False,
+        'EXECUTOR_ATIVO': False,
+        'EXECUTOR_MODO': 'simulacao',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}',
+        'ARTEFATOS_DIR': str(caminho_banco.parent / 'artefatos'),
+        'ARQUIVAMENTO_DIR': str(caminho_banco.parent / 'arquivo')
+    })
+    yield aplicacao
+    with aplicacao.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    """Cliente HTTP de testes"""
+    return app.test_client()
+
+@pytest.fixture
+def criar_execucao_com_resultados(client):
+    """Fábrica: cria uma execução e envia os resultados pela rota de ingestão
+    
+    `padrao` completa cada resultado (ex.: `{'status': 'falhou'}`); os demais
+    argumentos nomeados são campos da execução (ex.: `commit_hash`).
+    Retorna o id da execução; nenhum resultado pode ser rejeitado.
+    """
+    def criar(resultados, padrao=None, tipo='unidade', status='sucesso', ambiente='desenvolvimento', **campos):
+        with client.application.app_context():
+            execucao = ExecucaoTeste(tipo=tipo, status=status, duracao=0, ambiente=ambiente, **campos)
+            db.session.add(execucao)
+            db.session.commit()
+            execucao_id = execucao.id
+        resposta = client.post(f'/api/execucoes/{execucao_id}/resultados', json=[
+            {'tempo_execucao': 0.1, **(padrao or {}), **resultado} for resultado in resultados
+        ])
+        assert resposta.status_code == 201 and not resposta.get_json()['rejeitados'], resposta.get_data(as_text=True)
+        return execucao_id
+    return criar
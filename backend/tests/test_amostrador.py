@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Amostrador de Métricas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import time
+from amostrador import AmostradorSistema
+from models import MetricaSistema
+
+def test_amostrador_coleta_em_buffer_e_persiste_em_lote(app):
+    """As amostras ficam no buffer circular e são gravadas em lotes"""
+    amostrador = AmostradorSistema(intervalo=0.05, capacidade=3, tamanho_lote=2)
+    amostrador.iniciar(app)
+    try:
+        limite = time.time() + 5
+        while len(amostrador.amostras()) < 3 and time.time() < limite:
+            time.sleep(0.05)
+    finally:
+        amostrador.parar()
+    
+    assert not amostrador.ativo
+    assert len(amostrador.amostras()) == 3  # capacidade do buffer
+    with app.app_context():
+        assert MetricaSistema.query.count() >= 3
+
+def test_reinicio_registra_o_encerramento_uma_vez(app, monkeypatch):
+    """Parar e iniciar de novo não acumula handlers de atexit"""
+    registrados = []
+    monkeypatch.setattr('amostrador.atexit.register', registrados.append)
+    amostrador = AmostradorSistema(intervalo=0.05)
+    for _ in range(3):
+        amostrador.iniciar(app)
+        amostrador.parar()
+    
+    assert registrados == [amostrador.parar]
+
+def test_sistema_responde_com_ultima_amostra(app, client):
+    """/api/sistema usa a amostra mais recente sem coletar novamente"""
+    amostrador = app.extensions['amostrador']
+    amostra = amostrador.coletar_agora()
+    
+    inicio = time.time()
+    response = client.get('/api/sistema')
+    
+    assert response.status_code == 200
+    assert time.time() - inicio < 0.5
+    assert response.get_json() == MetricaSistema.resumir(amostra)
+
+def test_apenas_o_lider_grava_o_historico(app):
+    """Workers com amostrador próprio não duplicam as amostras gravadas"""
+    lider, outro = (AmostradorSistema(intervalo=5, tamanho_lote=2) for _ in range(2))
+    for amostrador in (lider, outro):
+        amostrador.app = app
+    with app.app_context():
+        antes = MetricaSistema.query.count()
+    
+    for _ in range(2):
+        lider.coletar_agora()
+        outro.coletar_agora()
+    with app.app_context():
+        assert MetricaSistema.query.count() == antes + 2
+    # O outro processo continua respondendo pela própria amostra em memória
+    assert len(outro.amostras()) == 2
+    
+    # Líder encerrado: o lease é devolvido e o outro processo assume
+    lider.parar()
+    for _ in range(2):
+        outro.coletar_agora()
+    with app.app_context():
+        assert MetricaSistema.query.count() == antes + 4
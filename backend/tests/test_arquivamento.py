@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Arquivamento de Execuções
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import os
+from datetime import datetime
+import arquivamento
+from arquivamento import arquivar_execucoes, paginar_resultados_arquivados
+from models import db, ExecucaoTeste, ResultadoTeste, ExecucaoArquivada, EstatisticaTeste, JobExecucao
+
+def criar_execucao(client, data_criacao, status='sucesso', resultados=5):
+    with client.application.app_context():
+        execucao = ExecucaoTeste(
+            tipo='api', status=status, duracao=40, ambiente='homologacao', data_criacao=data_criacao
+        )
+        db.session.add(execucao)
+        db.session.commit()
+        execucao_id = execucao.id
+    resposta = client.post(f'/api/execucoes/{execucao_id}/resultados', json=[
+        {'nome_teste': f'test_arquivo_{indice}', 'status': 'falhou' if indice == 0 else 'passou',
+         'tempo_execucao': 1.5, 'mensagem_erro': 'Timeout após 30s' if indice == 0 else None}
+        for indice in range(resultados)
+    ])
+    assert resposta.status_code == 201
+    return execucao_id
+
+def arquivar(client, idade_dias=180):
+    with client.application.app_context():
+        return arquivar_execucoes(client.application.extensions['arquivo'], idade_dias, lote=1)
+
+def test_execucoes_antigas_vao_para_arquivos_mensais(client):
+    janeiro = criar_execucao(client, datetime(2020, 1, 15))
+    fevereiro = criar_execucao(client, datetime(2020, 2, 3), status='falha', resultados=3)
+    criar_execucao(client, datetime(2020, 2, 4), status='executando')
+    recente = criar_execucao(client, datetime.utcnow())
+    
+    resumo = arquivar(client)
+    assert resumo == {'execucoes': 2, 'resultados': 8, 'arquivos': ['2020-01.ndjson.gz', '2020-02.ndjson.gz']}
+    raiz = client.application.config['ARQUIVAMENTO_DIR']
+    assert sorted(os.listdir(raiz)) == resumo['arquivos']
+    
+    with client.application.app_context():
+        assert not db.session.get(ExecucaoTeste, janeiro)
+        assert not ResultadoTeste.query.filter_by(execucao_id=fevereiro).count()
+        assert db.session.get(ExecucaoTeste, recente)
+        arquivada = db.session.get(ExecucaoArquivada, janeiro)
+        assert (arquivada.total_testes, arquivada.testes_falharam, arquivada.tempo_total) == (5, 1, 7.5)
+        # Consolidados continuam no banco
+        assert EstatisticaTeste.query.filter_by(tipo='api', nome_teste='test_arquivo_0').one().execucoes == 4
+    
+    # Nada novo a arquivar: os arquivos não crescem
+    tamanhos = [os.path.getsize(os.path.join(raiz, nome)) for nome in resumo['arquivos']]
+    assert arquivar(client)['execucoes'] == 0
+    assert [os.path.getsize(os.path.join(raiz, nome)) for nome in resumo['arquivos']] == tamanhos
+
+def test_leitura_transparente_de_execucao_arquivada(client, monkeypatch):
+    # Blocos pequenos: linhas e o fim do membro gzip atravessam vários blocos
+    monkeypatch.setattr(arquivamento, 'TAMANHO_BLOCO_ARQUIVO', 7)
+    execucao_id = criar_execucao(client, datetime(2020, 1, 15), resultados=5)
+    criar_execucao(client, datetime.utcnow())
+    antes = client.get(f'/api/relatorios/{execucao_id}').get_json()
+    
+    assert arquivar(client)['execucoes'] == 1
+    
+    execucao = client.get(f'/api/execucoes/{execucao_id}').get_json()
+    assert execucao['arquivada'] is True
+    assert execucao['total_testes'] == 5 and execucao['testes_falharam'] == 1
+    
+    relatorio = client.get(f'/api/relatorios/{execucao_id}')
+    assert relatorio.status_code == 200
+    assert relatorio.get_json()['estatisticas'] == antes['estatisticas']
+    assert relatorio.get_json()['resultados'] == antes['resultados']
+    assert 'immutable' in relatorio.headers['Cache-Control']
+    revalidado = client.get(f'/api/relatorios/{execucao_id}', headers={'If-None-Match': relatorio.headers['ETag']})
+    assert revalidado.status_code == 304
+    
+    # Paginação por cursor igual à das execuções no banco
+    pagina = client.get(f'/api/execucoes/{execucao_id}/resultados?limite=2').get_json()
+    ids = [resultado['id'] for resultado in pagina['resultados']]
+    while pagina['next_cursor']:
+        pagina = client.get(
+            f"/api/execucoes/{execucao_id}/resultados?limite=2&cursor={pagina['next_cursor']}"
+        ).get_json()
+        ids += [resultado['id'] for resultado in pagina['resultados']]
+    assert ids == [resultado['id'] for resultado in antes['resultados']]
+    
+    assert client.get('/api/execucoes/999999').status_code == 404
+
+def test_pagina_arquivada_para_de_ler_apos_o_limite():
+    lidos = []
+    
+    def resultados():
+        for resultado_id in range(1, 1001):
+            lidos.append(resultado_id)
+            yield {'id': resultado_id}
+    
+    pagina, cursor = paginar_resultados_arquivados(resultados(), limite=2)
+    assert [resultado['id'] for resultado in pagina] == [1, 2]
+    assert len(lidos) == 3
+    
+    lidos.clear()
+    pagina, _ = paginar_resultados_arquivados(resultados(), cursor, limite=2)
+    assert [resultado['id'] for resultado in pagina] == [3, 4]
+    assert len(lidos) == 5
+
+def test_execucao_com_job_ativo_nao_e_arquivada(client):
+    execucao_id = criar_execucao(client, datetime(2020, 1, 15))
+    criar_execucao(client, datetime.utcnow())
+    with client.application.app_context():
+        db.session.add(JobExecucao(execucao_id=execucao_id, tipo='api', ambiente='homologacao', status='pendente'))
+        db.session.commit()
+    
+    assert arquivar(client)['execucoes'] == 0
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Armazenamento de Artefatos
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+from artefatos import coletar_artefatos
+from models import db, ExecucaoTeste, ResultadoTeste, Artefato, ReferenciaArtefato
+
+SCREENSHOT = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 40
+
+def criar_resultado(client):
+    with client.application.app_context():
+        execucao = ExecucaoTeste(tipo='web', status='falha', duracao=0, ambiente='desenvolvimento')
+        db.session.add(execucao)
+        db.session.flush()
+        resultado = ResultadoTeste(execucao_id=execucao.id, nome_teste='test_login', status='falhou', tempo_execucao=1.2)
+        db.session.add(resultado)
+        db.session.commit()
+        return resultado.id
+
+def enviar(client, conteudo, **parametros):
+    return client.post(
+        '/api/artefatos', query_string=parametros,
+        data={'arquivo': (io.BytesIO(conteudo), 'falha.png', 'image/png')},
+        content_type='multipart/form-data'
+    )
+
+def test_upload_repetido_e_deduplicado(client):
+    primeiro = enviar(client, SCREENSHOT)
+    segundo = client.post('/api/artefatos', data=SCREENSHOT, content_type='image/png')
+    
+    assert primeiro.status_code == 201
+    assert segundo.status_code == 200
+    hash_conteudo = hashlib.sha256(SCREENSHOT).hexdigest()
+    assert primeiro.get_json()['hash'] == segundo.get_json()['hash'] == hash_conteudo
+    assert segundo.get_json()['deduplicado'] is True
+    assert primeiro.get_json()['url'] == f'/api/artefatos/{hash_conteudo}'
+    
+    raiz = client.application.config['ARTEFATOS_DIR']
+    blobs = [nome for _, _, arquivos in os.walk(raiz) for nome in arquivos]
+    assert blobs == [hash_conteudo]
+    assert os.path.isfile(os.path.join(raiz, hash_conteudo[:2], hash_conteudo[2:4], hash_conteudo))
+
+def test_download_com_range_etag_e_cache_imutavel(client):
+    url = enviar(client, SCREENSHOT).get_json()['url']
+    
+    completo = client.get(url)
+    assert completo.status_code == 200
+    assert completo.data == SCREENSHOT
+    assert completo.mimetype == 'image/png'
+    assert 'immutable' in completo.headers['Cache-Control']
+    
+    parcial = client.get(url, headers={'Range': 'bytes=100-199'})
+    assert parcial.status_code == 206
+    assert parcial.data == SCREENSHOT[100:200]
+    
+    revalidado = client.get(url, headers={'If-None-Match': completo.headers['ETag']})
+    assert revalidado.status_code == 304
+    
+    assert client.get('/api/artefatos/' + 'f' * 64).status_code == 404
+    assert client.get('/api/artefatos/nao-e-hash').status_code == 404
+
+def test_upload_vinculado_preenche_screenshot_path(client):
+    resultado_id = criar_resultado(client)
+    resposta = enviar(client, SCREENSHOT, resultado_id=resultado_id)
+    assert resposta.status_code == 201
+    
+    with client.application.app_context():
+        resultado = db.session.get(ResultadoTeste, resultado_id)
+        assert resultado.screenshot_path == resposta.get_json()['url']
+        assert ReferenciaArtefato.query.filter_by(resultado_id=resultado_id, tipo='screenshot').count() == 1
+    
+    assert enviar(client, SCREENSHOT, resultado_id=999999).status_code == 404
+    assert enviar(client, SCREENSHOT, tipo='video').status_code == 400
+
+def test_upload_acima_do_limite_retorna_413(client):
+    client.application.extensions['artefatos'].tamanho_maximo = 1024
+    resposta = client.post('/api/artefatos', data=SCREENSHOT, content_type='image/png')
+    
+    assert resposta.status_code == 413
+    raiz = client.application.config['ARTEFATOS_DIR']
+    assert not [nome for _, _, arquivos in os.walk(raiz) for nome in arquivos]
+
+def test_coleta_remove_apenas_artefatos_sem_referencia(client):
+    resultado_id = criar_resultado(client)
+    referenciado = enviar(client, SCREENSHOT, resultado_id=resultado_id).get_json()['hash']
+    solto = enviar(client, b'log sem dono').get_json()['hash']
+    recente = enviar(client, b'upload em andamento').get_json()['hash']
+    armazem = client.application.extensions['artefatos']
+    
+    # Arquivo sem registro no banco (upload interrompido antes do commit)
+    orfao, _, _ = armazem.gravar(io.BytesIO(b'orfao'))
+    
+    with client.application.app_context():
+        antigo = datetime.utcnow() - timedelta(hours=2)
+        Artefato.query.filter(Artefato.hash_conteudo.in_([referenciado, solto])).update(
+            {'ultimo_upload': antigo}, synchronize_session=False
+        )
+        db.session.commit()
+        
+        resumo = coletar_artefatos(armazem, carencia=3600)
+        assert resumo['artefatos_removidos'] == 1
+        assert resumo['bytes_liberados'] == len(b'log sem dono')
+        assert resumo['arquivos_orfaos'] == 0
+        
+        assert not armazem.existe(solto)
+        assert armazem.existe(referenciado) and armazem.existe(recente) and armazem.existe(orfao)
+        
+        # Sem carência, o blob sem registro também é removido
+        assert coletar_artefatos(armazem, carencia=0)['arquivos_orfaos'] == 1
+        assert not armazem.existe(orfao)
+        assert armazem.existe(referenciado)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes da Configuração do Banco
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import fcntl
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app import criar_aplicacao
+from banco import normalizar_uri, opcoes_engine, trava_inicializacao, BIND_LEITURA, COOKIE_ULTIMA_ESCRITA
+from models import db, ExecucaoTeste, RelatorioExecucao, TendenciaDiaria
+
+def engines_usados(app, requisicao):
+    """Executa a requisição e retorna as chaves dos engines que receberam SELECTs"""
+    usados = set()
+    with app.app_context():
+        ouvintes = {}
+        for chave, engine in db.engines.items():
+            def registrar(conexao, cursor, sql, parametros, contexto, executemany, chave=chave):
+                if sql.lstrip().upper().startswith('SELECT'):
+                    usados.add(chave)
+            ouvintes[engine] = registrar
+            event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            resposta = requisicao()
+        finally:
+            for engine, registrar in ouvintes.items():
+                event.remove(engine, 'before_cursor_execute', registrar)
+    assert resposta.status_code < 400, resposta.get_data(as_text=True)
+    return usados
+
+def config_banco(uri, **extras):
+    return {
+        'SQLALCHEMY_DATABASE_URI': uri, 'DB_POOL_SIZE': 10, 'DB_MAX_OVERFLOW': 20,
+        'DB_POOL_TIMEOUT': 30.0, 'DB_POOL_RECYCLE': 1800, 'DB_ENGINE_OPTIONS': {}, **extras
+    }
+
+def test_pragmas_aplicados_em_cada_conexao(app):
+    with app.app_context():
+        # Conexão nova do pool, além da usada na inicialização
+        with db.engine.connect() as conexao:
+            def pragma(nome):
+                return conexao.exec_driver_sql(f'PRAGMA {nome}').scalar()
+            
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+            assert pragma('cache_size') == -64 * 1024
+            assert pragma('mmap_size') == 256 * 1024 * 1024
+
+def test_opcoes_do_engine_por_banco():
+    postgres = opcoes_engine(config_banco(normalizar_uri('postgres://qa:segredo@db:5432/qa_dashboard')))
+    assert postgres == {
+        'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30.0, 'pool_recycle': 1800, 'pool_pre_ping': True
+    }
+    assert opcoes_engine(config_banco('sqlite://')) == {}
+    assert opcoes_engine(config_banco('sqlite:///qa.db'))['pool_size'] == 10
+    
+    # DB_ENGINE_OPTIONS sobrescreve as opções calculadas
+    sobrescrito = opcoes_engine(config_banco('postgresql://db/qa', DB_ENGINE_OPTIONS={'pool_size': 4, 'echo': True}))
+    assert (sobrescrito['pool_size'], sobrescrito['echo'], sobrescrito['max_overflow']) == (4, True, 20)
+    assert normalizar_uri(None) == 'sqlite:///qa_dashboard.db'
+
+def test_gets_leem_do_pool_somente_leitura(app, client):
+    assert engines_usados(app, lambda: client.get('/api/execucoes')) == {BIND_LEITURA}
+    assert engines_usados(app, lambda: client.get('/api/metricas')) == {BIND_LEITURA}
+    assert engines_usados(app, lambda: client.get('/api/sistema/historico?horas=24')) == {BIND_LEITURA}
+    
+    with app.app_context():
+        with db.engines[BIND_LEITURA].connect() as conexao:
+            assert conexao.exec_driver_sql('PRAGMA query_only').scalar() == 1
+            with pytest.raises(OperationalError):
+                conexao.exec_driver_sql("DELETE FROM execucoes_teste")
+
+def test_get_que_grava_cache_usa_o_primario(app, client):
+    with app.app_context():
+        # Só relatórios de execuções finalizadas vão para o cache
+        execucao = ExecucaoTeste(tipo='api', status='sucesso', duracao=10, ambiente='homologacao')
+        db.session.add(execucao)
+        db.session.commit()
+        execucao_id = execucao.id
+    
+    resposta = client.get(f'/api/relatorios/{execucao_id}')
+    assert resposta.status_code == 200
+    with app.app_context():
+        assert db.session.get(RelatorioExecucao, execucao_id)
+    revalidado = client.get(f'/api/relatorios/{execucao_id}', headers={'If-None-Match': resposta.headers['ETag']})
+    assert revalidado.status_code == 304
+
+def test_cliente_le_as_proprias_escritas(app, client):
+    with app.app_context():
+        execucao_id = ExecucaoTeste.query.first().id
+    resposta = client.post(f'/api/execucoes/{execucao_id}/resultados', json=[{'nome_teste': 'test_rw', 'status': 'passou'}])
+    assert resposta.status_code == 201
+    ultima_escrita = resposta.headers['X-Ultima-Escrita']
+    assert COOKIE_ULTIMA_ESCRITA in resposta.headers['Set-Cookie']
+    
+    # Mesmo cliente (cookie) ou cabeçalho devolvido: primário; outros clientes: leitura
+    assert engines_usados(app, lambda: client.get(f'/api/execucoes/{execucao_id}/resultados')) == {None}
+    outro = app.test_client()
+    assert engines_usados(app, lambda: outro.get(f'/api/execucoes/{execucao_id}/resultados')) == {BIND_LEITURA}
+    assert engines_usados(app, lambda: outro.get(
+        f'/api/execucoes/{execucao_id}/resultados', headers={'X-Ultima-Escrita': ultima_escrita}
+    )) == {None}
+    
+    # Depois da tolerância de atraso o cliente volta à leitura
+    app.extensions['roteador_leituras'].atraso_maximo = 0
+    assert engines_usados(app, lambda: client.get(f'/api/execucoes/{execucao_id}/resultados')) == {BIND_LEITURA}
+
+def test_replica_atrasada_e_ignorada(app, client, monkeypatch):
+    roteador = app.extensions['roteador_leituras']
+    monkeypatch.setattr(roteador, 'atraso', lambda: roteador.atraso_maximo + 1)
+    assert engines_usados(app, lambda: client.get('/api/execucoes')) == {None}
+
+def test_trava_inicializacao_exclui_outros_processos(app, caminho_banco):
+    with app.app_context(), trava_inicializacao(db.engine):
+        with open(f'{caminho_banco}.lock', 'a') as arquivo:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+def test_backfill_roda_uma_vez_como_migracao(app):
+    configuracao = {chave: app.config[chave] for chave in (
+        'TESTING', 'AMOSTRADOR_ATIVO', 'EXECUTOR_ATIVO', 'SQLALCHEMY_DATABASE_URI', 'ARTEFATOS_DIR', 'ARQUIVAMENTO_DIR'
+    )}
+    with app.app_context():
+        TendenciaDiaria.query.delete()
+        db.session.commit()
+    
+    # Reinício comum: consolidado vazio não dispara reconstrução
+    reiniciado = criar_aplicacao(configuracao)
+    with reiniciado.app_context():
+        assert TendenciaDiaria.query.count() == 0
+        db.session.execute(db.text('DELETE FROM versao_esquema WHERE versao >= 7'))
+        db.session.commit()
+        db.engine.dispose()
+    
+    # Banco anterior à migração de backfill: reconstrói uma vez
+    migrado = criar_aplicacao(configuracao)
+    with migrado.app_context():
+        assert TendenciaDiaria.query.count() > 0
+        db.engine.dispose()
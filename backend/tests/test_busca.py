@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes da Busca Textual de Falhas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from app import criar_aplicacao
+from models import db, ResultadoTeste
+
+STACK_TIMEOUT = '''Traceback (most recent call last):
+  File "tests/test_login.py", line 42, in test_login_valido
+    driver.find_element(By.ID, "entrar").click()
+selenium.common.exceptions.TimeoutException: Message: elemento não encontrado'''
+
+# Cada resultado ingerido nos testes é uma falha
+FALHA = {'status': 'falhou', 'tempo_execucao': 1.0}
+
+def buscar(client, consulta):
+    resposta = client.get(f'/api/resultados/busca?{consulta}')
+    assert resposta.status_code == 200
+    return resposta.get_json()['resultados']
+
+def test_busca_com_ranking_destaque_e_filtros(client, criar_execucao_com_resultados):
+    criar_execucao_com_resultados([
+        {'nome_teste': 'test_login_valido', 'mensagem_erro': 'TimeoutException ao clicar em entrar',
+         'stack_trace': STACK_TIMEOUT},
+        {'nome_teste': 'test_relatorio', 'mensagem_erro': 'AssertionError: total incorreto',
+         'stack_trace': 'E   AssertionError\\n  aguardando TimeoutException de rede'}
+    ], FALHA, tipo='web')
+    criar_execucao_com_resultados([
+        {'nome_teste': 'test_pagamento', 'mensagem_erro': 'TimeoutException no gateway',
+         'data_execucao': (datetime.utcnow() - timedelta(days=10)).isoformat()}
+    ], FALHA, tipo='api', ambiente='homologacao')
+    
+    encontrados = buscar(client, 'q=timeoutexception')
+    assert [item['nome_teste'] for item in encontrados][-1] == 'test_relatorio'  # só no stack trace
+    assert len(encontrados) == 3
+    primeiro = next(item for item in encontrados if item['nome_teste'] == 'test_login_valido')
+    assert '<mark>TimeoutException</mark>' in primeiro['destaque_mensagem']
+    assert '<mark>TimeoutException</mark>' in primeiro['destaque_stack_trace']
+    
+    assert [item['nome_teste'] for item in buscar(client, 'q=timeout*&tipo=api')] == ['test_pagamento']
+    assert [item['nome_teste'] for item in buscar(client, 'q=TimeoutException&ambiente=desenvolvimento&limite=1')] \
+        == ['test_login_valido']
+    inicio = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    assert 'test_pagamento' not in [item['nome_teste'] for item in buscar(client, f'q=TimeoutException&inicio={inicio}')]
+    
+    # Identificadores com `_` e acentos (remove_diacritics)
+    assert [item['nome_teste'] for item in buscar(client, 'q=test_login_valido')] == ['test_login_valido']
+    assert len(buscar(client, 'q=nao encontrado')) == 1
+    # Sintaxe FTS digitada pelo usuário não quebra a consulta
+    assert buscar(client, 'q="AND (entrar') is not None
+    
+    assert client.get('/api/resultados/busca?q=').status_code == 400
+    assert client.get('/api/resultados/busca?q=erro&inicio=ontem').status_code == 400
+
+def test_triggers_acompanham_alteracoes_e_remocoes(client, criar_execucao_com_resultados):
+    execucao_id = criar_execucao_com_resultados([
+        {'nome_teste': 'test_checkout', 'mensagem_erro': 'ConnectionResetError no checkout'}
+    ], FALHA, tipo='web')
+    assert len(buscar(client, 'q=ConnectionResetError')) == 1
+    
+    with client.application.app_context():
+        resultado = ResultadoTeste.query.filter_by(execucao_id=execucao_id).one()
+        resultado.mensagem_erro = 'BrokenPipeError no checkout'
+        db.session.commit()
+    assert buscar(client, 'q=ConnectionResetError') == []
+    assert len(buscar(client, 'q=BrokenPipeError')) == 1
+    
+    with client.application.app_context():
+        ResultadoTeste.query.filter_by(execucao_id=execucao_id).delete()
+        db.session.commit()
+    assert buscar(client, 'q=checkout') == []
+
+def test_migracao_indexa_resultados_existentes(caminho_banco):
+    configuracao = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}', 'AMOSTRADOR_ATIVO': False,
+                    'EXECUTOR_ATIVO': False}
+    with criar_aplicacao(configuracao).app_context():
+        db.engine.dispose()
+    
+    # Banco anterior ao índice: sem tabela FTS nem triggers
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.executescript('''
+        DROP TABLE resultados_busca;
+        DROP TRIGGER resultados_teste_busca_ai;
+        DROP TRIGGER resultados_teste_busca_ad;
+        DROP TRIGGER resultados_teste_busca_au;
+        DELETE FROM versao_esquema WHERE versao >= 5;
+        UPDATE resultados_teste SET mensagem_erro = 'Erro de validação legado' WHERE id = 1;
+    ''')
+    conexao.close()
+    
+    app = criar_aplicacao(configuracao)
+    with app.app_context():
+        db.engine.dispose()
+    assert [item['id'] for item in buscar(app.test_client(), 'q=legado')] == [1]
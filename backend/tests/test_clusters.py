@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Agrupamento de Falhas
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+from agrupamento import assinatura_falha, hash_assinatura
+from models import db, ResultadoTeste, ClusterFalha, RelatorioExecucao
+
+STACK_CONEXAO = '''Traceback (most recent call last):
+  File "/builds/{build}/tests/test_pedidos.py", line {linha}, in test_criar_pedido
+    resposta = cliente.post("/pedidos", json=dados)
+  File "/builds/{build}/tests/cliente.py", line 88, in post
+    return self.sessao.request("POST", url, **kwargs)
+  File "/usr/lib/python3/requests/sessions.py", line 589, in request
+    resp = self.send(prep, **send_kwargs)
+requests.exceptions.ConnectionError: HTTPConnectionPool(host='db-{build}', port=5432): Max retries exceeded'''
+
+# Cada resultado ingerido nos testes é uma falha
+FALHA = {'status': 'falhou', 'tempo_execucao': 0.5}
+
+def test_assinatura_mascara_ids_datas_e_caminhos():
+    primeira = assinatura_falha(
+        'Pedido 84213 expirou em 2024-12-07T10:02:11Z (sessão 3f2a9c1e-1b2c-4d5e-8f90-1234567890ab, obj 0x7f3a2c)',
+        STACK_CONEXAO.format(build=1771, linha=42)
+    )
+    segunda = assinatura_falha(
+        'Pedido 7 expirou em 2025-01-31T23:59:59Z (sessão 00000000-aaaa-4d5e-8f90-1234567890ab, obj 0xdeadbeef)',
+        STACK_CONEXAO.format(build=9, linha=57)
+    )
+    assert hash_assinatura(primeira) == hash_assinatura(segunda)
+    assert '<caminho>/test_pedidos.py' in primeira
+    assert assinatura_falha('', None) == ''
+
+def test_falhas_agrupadas_na_ingestao_e_ranking(client, criar_execucao_com_resultados):
+    execucao_id = criar_execucao_com_resultados([
+        {'nome_teste': f'test_pedido_{indice}', 'mensagem_erro': f'ConnectionError: pedido {indice}',
+         'stack_trace': STACK_CONEXAO.format(build=100 + indice, linha=indice)}
+        for indice in range(30)
+    ] + [
+        # Um frame a mais: assinatura diferente, mas parecida (MinHash/LSH)
+        {'nome_teste': 'test_pedido_lento', 'mensagem_erro': 'ConnectionError: pedido 99',
+         'stack_trace': STACK_CONEXAO.format(build=1, linha=1).replace(
+             '    return self.sessao',
+             '    self.registrar_tentativa()\n  File "/builds/1/tests/cliente.py", line 91, in post\n    return self.sessao'
+         )},
+        {'nome_teste': 'test_login', 'mensagem_erro': 'AssertionError: esperado 200, recebido 401',
+         'stack_trace': 'tests/test_login.py:12: in test_login\n    assert resposta.status_code == 200'},
+        {'nome_teste': 'test_sem_texto'},
+        {'nome_teste': 'test_ok', 'status': 'passou', 'mensagem_erro': 'ConnectionError: aviso'}
+    ], FALHA)
+    
+    with client.application.app_context():
+        clusters = {
+            resultado.nome_teste: resultado.cluster_id
+            for resultado in ResultadoTeste.query.filter_by(execucao_id=execucao_id)
+        }
+    assert len({clusters[f'test_pedido_{indice}'] for indice in range(30)}) == 1
+    assert clusters['test_pedido_lento'] == clusters['test_pedido_0']
+    assert clusters['test_login'] not in (None, clusters['test_pedido_0'])
+    assert clusters['test_sem_texto'] is None and clusters['test_ok'] is None
+    
+    ranking = client.get(f'/api/analytics/clusters?execucao_id={execucao_id}').get_json()
+    assert [(cluster['id'], cluster['ocorrencias']) for cluster in ranking] == [
+        (clusters['test_pedido_0'], 31), (clusters['test_login'], 1)
+    ]
+    assert ranking[0]['mensagem_exemplo'] == 'ConnectionError: pedido 0'
+    assert ranking[0]['execucoes'] == 1
+    
+    # Nova execução com a mesma causa soma na janela
+    criar_execucao_com_resultados([
+        {'nome_teste': 'test_pedido_0', 'mensagem_erro': 'ConnectionError: pedido 5',
+         'stack_trace': STACK_CONEXAO.format(build=7, linha=3)}
+    ], FALHA)
+    janela = {cluster['id']: cluster for cluster in client.get('/api/analytics/clusters?dias=1').get_json()}
+    assert (janela[clusters['test_pedido_0']]['ocorrencias'], janela[clusters['test_pedido_0']]['execucoes']) == (32, 2)
+    assert len(client.get('/api/analytics/clusters?dias=1&limite=1').get_json()) == 1
+    
+    resposta = client.get(f'/api/analytics/clusters/{clusters["test_login"]}/resultados')
+    assert [resultado['nome_teste'] for resultado in resposta.get_json()] == ['test_login']
+    assert client.get('/api/analytics/clusters/999999/resultados').status_code == 404
+
+def test_reconstrucao_reproduz_a_ingestao(client, criar_execucao_com_resultados):
+    execucao_id = criar_execucao_com_resultados([
+        {'nome_teste': f'test_{indice}', 'mensagem_erro': f'Erro {indice % 3} no passo {indice}',
+         'stack_trace': f'tests/test_{indice % 3}.py:{indice}: in test\n    raise Erro{indice % 3}()'}
+        for indice in range(9)
+    ], FALHA)
+    
+    with client.application.app_context():
+        def instantaneo():
+            grupos = {}
+            for nome, cluster_id in db.session.query(ResultadoTeste.nome_teste, ResultadoTeste.cluster_id).filter(
+                ResultadoTeste.cluster_id.isnot(None)
+            ):
+                grupos.setdefault(cluster_id, set()).add(nome)
+            return sorted(sorted(nomes) for nomes in grupos.values())
+        
+        incremental = instantaneo()
+    
+    # Relatório em cache sobrevive à reconstrução quando os clusters não mudam
+    assert client.get(f'/api/relatorios/{execucao_id}').status_code == 200
+    with client.application.app_context():
+        assert ClusterFalha.reconstruir(tamanho_lote=4) == ClusterFalha.query.count()
+        assert instantaneo() == incremental
+        assert db.session.get(RelatorioExecucao, execucao_id)
+        
+        # Falha que muda de cluster invalida o relatório da sua execução
+        db.session.execute(db.update(ResultadoTeste).where(ResultadoTeste.execucao_id == execucao_id).values(cluster_id=None))
+        db.session.commit()
+        ClusterFalha.reconstruir()
+        assert db.session.get(RelatorioExecucao, execucao_id) is None
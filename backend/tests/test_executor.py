@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Executor de Execuções
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app import criar_aplicacao
+from executor import ExecutorExecucoes, FilaCheia, interpretar_limites
+from ingestao import inserir_resultados
+from models import (
+    db, ExecucaoTeste, JobExecucao, ResultadoTeste, EstatisticaTeste, HistogramaDuracao, FlakinessTeste, SequenciaTeste
+)
+
+def aguardar(condicao, timeout=5):
+    limite = time.time() + timeout
+    while not condicao() and time.time() < limite:
+        time.sleep(0.01)
+    return condicao()
+
+def enfileirar(app, executor, tipo, quantidade, ambiente='desenvolvimento'):
+    """Cria `quantidade` execuções com seus jobs e retorna os ids das execuções"""
+    with app.app_context():
+        ids = []
+        for _ in range(quantidade):
+            execucao = ExecucaoTeste(tipo=tipo, status='executando', duracao=0, ambiente=ambiente)
+            db.session.add(execucao)
+            db.session.flush()
+            executor.enfileirar(execucao)
+            ids.append(execucao.id)
+        db.session.commit()
+        return ids
+
+def estatisticas(app, executor):
+    with app.app_context():
+        return executor.estatisticas()
+
+def test_limite_de_concorrencia_por_grupo(app):
+    """Jobs do mesmo grupo respeitam o limite mesmo com workers livres"""
+    liberar = threading.Event()
+    simultaneos = {'atual': 0, 'maximo': 0}
+    lock = threading.Lock()
+    
+    def tarefa(execucao_id, cancelado):
+        with lock:
+            simultaneos['atual'] += 1
+            simultaneos['maximo'] = max(simultaneos['maximo'], simultaneos['atual'])
+        liberar.wait(5)
+        with lock:
+            simultaneos['atual'] -= 1
+    
+    executor = ExecutorExecucoes(tarefa, workers=4, fila_maxima=10, limite_por_grupo=1,
+                                 limites={'api': 2}, intervalo_poll=0.05)
+    enfileirar(app, executor, 'web', 3)
+    enfileirar(app, executor, 'api', 3)
+    executor.iniciar(app)
+    try:
+        assert aguardar(lambda: estatisticas(app, executor)['executando'] == 3)
+        atuais = estatisticas(app, executor)
+        assert atuais['executando_por_grupo'] == {'web/desenvolvimento': 1, 'api/desenvolvimento': 2}
+        assert atuais['fila'] == 3
+        
+        liberar.set()
+        assert aguardar(lambda: estatisticas(app, executor)['concluidos'] == 6)
+    finally:
+        liberar.set()
+        executor.parar(timeout=5)
+    
+    assert simultaneos['maximo'] == 3
+
+def test_dois_processos_nao_executam_o_mesmo_job(app):
+    """Executores distintos (como workers do gunicorn) dividem a fila sem repetir jobs"""
+    executados = []
+    lock = threading.Lock()
+    
+    def tarefa(execucao_id, cancelado):
+        time.sleep(0.01)
+        with lock:
+            executados.append(execucao_id)
+    
+    executores = [
+        ExecutorExecucoes(tarefa, workers=3, limite_por_grupo=10, intervalo_poll=0.05)
+        for _ in range(2)
+    ]
+    ids = enfileirar(app, executores[0], 'api', 30)
+    for executor in executores:
+        executor.iniciar(app)
+    try:
+        assert aguardar(lambda: estatisticas(app, executores[0])['concluidos'] == 30, timeout=15)
+    finally:
+        for executor in executores:
+            executor.parar(timeout=5)
+    
+    assert sorted(executados) == ids
+    with app.app_context():
+        donos = {dono for (dono,) in db.session.query(JobExecucao.dono)}
+        assert donos == {None}
+
+def test_leases_expirados_sao_recuperados_na_inicializacao(app):
+    """Job de um processo morto volta para a fila; sem tentativas restantes, falha"""
+    executados = []
+    executor = ExecutorExecucoes(lambda execucao_id, cancelado: executados.append(execucao_id),
+                                 workers=1, max_tentativas=2, intervalo_poll=0.05)
+    retomada, esgotada = enfileirar(app, executor, 'web', 2)
+    
+    with app.app_context():
+        duracoes_antes = duracoes_registradas('web')
+        expirado = datetime.utcnow() - timedelta(minutes=5)
+        for execucao_id, tentativas in ((retomada, 1), (esgotada, 2)):
+            JobExecucao.query.filter_by(execucao_id=execucao_id).update({
+                'status': 'executando', 'dono': 'outro-host:123:abc',
+                'tentativas': tentativas, 'lease_expira_em': expirado
+            })
+        # Resultado parcial gravado pela tentativa interrompida
+        inserir_resultados(retomada, [{'nome_teste': 'test_parcial', 'status': 'passou', 'tempo_execucao': 1.0}])
+        db.session.commit()
+    
+    executor.iniciar(app)
+    try:
+        assert aguardar(lambda: executados == [retomada])
+        assert aguardar(lambda: estatisticas(app, executor)['concluidos'] == 1)
+    finally:
+        executor.parar(timeout=5)
+    
+    with app.app_context():
+        job = JobExecucao.query.filter_by(execucao_id=esgotada).one()
+        assert job.status == 'falhou'
+        assert db.session.get(ExecucaoTeste, esgotada).status == 'falha'
+        # A falha por lease esgotado passa pelos consolidados da conclusão
+        assert duracoes_registradas('web') == duracoes_antes + 1
+        assert JobExecucao.query.filter_by(execucao_id=retomada).one().tentativas == 2
+        # A nova tentativa recomeça sem os resultados da anterior
+        assert ResultadoTeste.query.filter_by(execucao_id=retomada).count() == 0
+
+def duracoes_registradas(tipo):
+    return db.session.query(db.func.coalesce(db.func.sum(HistogramaDuracao.contagem), 0)).filter(
+        HistogramaDuracao.escopo == 'execucao', HistogramaDuracao.tipo == tipo
+    ).scalar()
+
+NOMES_RETENTATIVA = ('test_retentativa_a', 'test_retentativa_b', 'test_retentativa_parcial')
+
+def executar_historico(app, interromper):
+    """Duas execuções do mesmo commit; com `interromper`, o job da segunda é repetido
+    
+    A tentativa interrompida grava resultados diferentes dos finais (inclusive
+    um teste que a nova tentativa não executa). Retorna os consolidados dos
+    testes envolvidos, sem campos que dependem do horário.
+    """
+    def tarefa(execucao_id, cancelado):
+        inserir_resultados(execucao_id, [
+            {'nome_teste': 'test_retentativa_a', 'status': 'falhou', 'tempo_execucao': 2.0},
+            {'nome_teste': 'test_retentativa_b', 'status': 'passou', 'tempo_execucao': 0.5}
+        ])
+        db.session.commit()
+    
+    executor = ExecutorExecucoes(tarefa, workers=1, max_tentativas=2, intervalo_poll=0.05)
+    with app.app_context():
+        anterior, repetida = (
+            ExecucaoTeste(tipo='web', status='executando', duracao=0, ambiente='homologacao', commit_hash='abc123')
+            for _ in range(2)
+        )
+        db.session.add_all([anterior, repetida])
+        db.session.flush()
+        executor.enfileirar(repetida)
+        inserir_resultados(anterior.id, [
+            {'nome_teste': 'test_retentativa_a', 'status': 'falhou', 'tempo_execucao': 3.0},
+            {'nome_teste': 'test_retentativa_b', 'status': 'passou', 'tempo_execucao': 0.4}
+        ])
+        if interromper:
+            JobExecucao.query.filter_by(execucao_id=repetida.id).update({
+                'status': 'executando', 'dono': 'outro-host:123:abc', 'tentativas': 1,
+                'lease_expira_em': datetime.utcnow() - timedelta(minutes=5)
+            })
+            inserir_resultados(repetida.id, [
+                {'nome_teste': 'test_retentativa_a', 'status': 'passou', 'tempo_execucao': 30.0},
+                {'nome_teste': 'test_retentativa_parcial', 'status': 'falhou', 'tempo_execucao': 1.0}
+            ])
+        db.session.commit()
+    
+    executor.iniciar(app)
+    try:
+        assert aguardar(lambda: estatisticas(app, executor)['concluidos'] == 1)
+    finally:
+        executor.parar(timeout=5)
+    
+    with app.app_context():
+        return {
+            'estatisticas': {
+                estatistica.nome_teste: (
+                    estatistica.execucoes, estatistica.execucoes_cronometradas, estatistica.tempo_total,
+                    estatistica.falhas, estatistica.peso_execucoes, estatistica.peso_falhas
+                )
+                for estatistica in EstatisticaTeste.query.filter(EstatisticaTeste.nome_teste.in_(NOMES_RETENTATIVA))
+            },
+            'histogramas': {
+                (histograma.nome_teste, histograma.indice): histograma.contagem
+                for histograma in HistogramaDuracao.query.filter(HistogramaDuracao.nome_teste.in_(NOMES_RETENTATIVA))
+            },
+            'flakiness': {
+                flaky.nome_teste: (flaky.comparacoes, flaky.transicoes)
+                for flaky in FlakinessTeste.query.filter(FlakinessTeste.nome_teste.in_(NOMES_RETENTATIVA))
+            },
+            'sequencias': {
+                sequencia.nome_teste: sequencia.ultimo_status
+                for sequencia in SequenciaTeste.query.filter(SequenciaTeste.nome_teste.in_(NOMES_RETENTATIVA))
+            }
+        }
+
+def test_retentativa_nao_duplica_consolidados(app, caminho_banco):
+    """Um job repetido deixa os consolidados por teste iguais aos de uma única execução"""
+    repetido = executar_historico(app, interromper=True)
+    
+    unica = criar_aplicacao({
+        'TESTING': True, 'AMOSTRADOR_ATIVO': False, 'EXECUTOR_ATIVO': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco.parent / "execucao_unica.db"}'
+    })
+    try:
+        esperado = executar_historico(unica, interromper=False)
+    finally:
+        with unica.app_context():
+            db.engine.dispose()
+    
+    assert esperado['flakiness'] == {'test_retentativa_a': (1, 0), 'test_retentativa_b': (1, 0)}
+    assert repetido == esperado
+
+def test_cancelamento_de_job_em_execucao_de_outro_processo(app):
+    """O pedido de cancelamento gravado no banco chega ao dono pelo heartbeat"""
+    iniciou = threading.Event()
+    
+    def tarefa(execucao_id, cancelado):
+        iniciou.set()
+        cancelado.wait(5)
+    
+    dono = ExecutorExecucoes(tarefa, workers=1, lease=0.3, intervalo_poll=0.05)
+    outro = ExecutorExecucoes(tarefa, workers=0)
+    (execucao_id,) = enfileirar(app, dono, 'web', 1)
+    dono.iniciar(app)
+    try:
+        assert iniciou.wait(5)
+        with app.app_context():
+            job_id = JobExecucao.query.filter_by(execucao_id=execucao_id).one().id
+            assert outro.cancelar(job_id).cancelamento_solicitado
+        assert aguardar(lambda: estatisticas(app, dono)['cancelados'] == 1)
+    finally:
+        dono.parar(timeout=5)
+
+def test_fila_cheia(app):
+    """A fila recusa além do máximo com uma sugestão de Retry-After"""
+    executor = ExecutorExecucoes(lambda execucao_id, cancelado: None, workers=0, fila_maxima=1)
+    enfileirar(app, executor, 'web', 1)
+    
+    with app.app_context():
+        with pytest.raises(FilaCheia) as erro:
+            executor.verificar_capacidade()
+        assert erro.value.retry_after > 0
+        assert executor.estatisticas()['recusados'] == 1
+
+def test_interpretar_limites():
+    assert interpretar_limites('performance=1, web:producao=3') == {'performance': 1, ('web', 'producao'): 3}
+
+def test_simulacao_aceita_qualquer_tipo(client):
+    """No modo de demonstração qualquer tipo é enfileirado"""
+    resposta = client.post('/api/executar-testes', json={'tipo': 'unidade'})
+    assert resposta.status_code == 202
+
+def test_endpoints_429_e_cancelamento(caminho_banco):
+    """Com a fila cheia a API responde 429; job pendente pode ser cancelado"""
+    app = criar_aplicacao({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}',
+        'AMOSTRADOR_ATIVO': False,
+        'EXECUTOR_ATIVO': False,
+        'EXECUTOR_FILA_MAXIMA': 1
+    })
+    client = app.test_client()
+    
+    # Modo padrão (pytest): tipo sem suíte é recusado sem ocupar a fila
+    sem_suite = client.post('/api/executar-testes', json={'tipo': 'unidade'})
+    assert sem_suite.status_code == 400
+    assert 'unidade' in sem_suite.get_json()['erro']
+    
+    aceita = client.post('/api/executar-testes', json={'tipo': 'web'})
+    assert aceita.status_code == 202
+    
+    recusada = client.post('/api/executar-testes', json={'tipo': 'web'})
+    assert recusada.status_code == 429
+    assert int(recusada.headers['Retry-After']) > 0
+    
+    job_id = aceita.get_json()['job_id']
+    assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'pendente'
+    assert client.get('/api/jobs/estatisticas').get_json()['fila'] == 1
+    
+    cancelado = client.post(f'/api/jobs/{job_id}/cancelar')
+    assert cancelado.get_json()['status'] == 'cancelado'
+    with app.app_context():
+        assert db.session.get(ExecucaoTeste, aceita.get_json()['execucao_id']).status == 'cancelado'
+        db.engine.dispose()
+    
+    assert client.get('/api/jobs/999').status_code == 404
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes da Exportação CSV/Parquet/Arrow
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import csv
+import io
+import pytest
+import exportacao
+from datetime import datetime, timedelta
+from exportacao import gerar_csv, gerar_parquet, lotes_resultados, COLUNAS_RESULTADOS
+from models import db, ExecucaoTeste, ResultadoTeste
+
+def ler_csv(resposta):
+    assert resposta.status_code == 200
+    return list(csv.DictReader(io.StringIO(resposta.get_data(as_text=True))))
+
+def criar_execucao_antiga(client):
+    """Execução de 2020 com 3 resultados, fora do período dos dados de exemplo"""
+    with client.application.app_context():
+        execucao = ExecucaoTeste(
+            tipo='api', status='falha', duracao=30, ambiente='homologacao', data_criacao=datetime(2020, 3, 10)
+        )
+        db.session.add(execucao)
+        db.session.flush()
+        db.session.add_all([
+            ResultadoTeste(execucao_id=execucao.id, nome_teste=f'test_antigo_{indice}',
+                           status='falhou' if indice == 0 else 'passou', tempo_execucao=0.5)
+            for indice in range(3)
+        ])
+        db.session.commit()
+        return execucao.id
+
+def test_csv_de_resultados_com_filtros(client):
+    execucao_id = criar_execucao_antiga(client)
+    
+    resposta = client.get('/api/export/resultados?inicio=2020-03-01&fim=2020-04-01')
+    assert resposta.mimetype == 'text/csv'
+    assert 'resultados.csv' in resposta.headers['Content-Disposition']
+    linhas = ler_csv(resposta)
+    assert [linha['nome_teste'] for linha in linhas] == ['test_antigo_0', 'test_antigo_1', 'test_antigo_2']
+    assert linhas[0]['execucao_id'] == str(execucao_id)
+    assert linhas[0]['tipo'] == 'api' and linhas[0]['ambiente'] == 'homologacao'
+    
+    falhas = ler_csv(client.get('/api/export/resultados?fim=2020-04-01&status=falhou'))
+    assert [linha['nome_teste'] for linha in falhas] == ['test_antigo_0']
+    
+    with client.application.app_context():
+        assert len(ler_csv(client.get('/api/export/resultados'))) == ResultadoTeste.query.count()
+
+def test_csv_de_execucoes_traz_contadores(client):
+    execucao_id = criar_execucao_antiga(client)
+    
+    linhas = ler_csv(client.get('/api/export/execucoes?tipo=api&ambiente=homologacao'))
+    assert [linha['id'] for linha in linhas] == [str(execucao_id)]
+    assert linhas[0]['data_criacao'] == '2020-03-10T00:00:00'
+    assert (linhas[0]['total_testes'], linhas[0]['testes_passaram'], linhas[0]['testes_falharam']) == ('3', '2', '1')
+
+def test_parametros_invalidos(client):
+    assert client.get('/api/export/resultados?formato=xlsx').status_code == 400
+    assert client.get('/api/export/execucoes?inicio=ontem').status_code == 400
+
+def test_parquet_sem_pyarrow_retorna_501(client, monkeypatch):
+    monkeypatch.setattr(exportacao, 'pa', None)
+    resposta = client.get('/api/export/resultados?formato=parquet')
+    assert resposta.status_code == 501
+    assert 'pyarrow' in resposta.get_json()['erro']
+    assert client.get('/api/export/resultados?formato=csv').status_code == 200
+
+def test_csv_e_gerado_por_lote(app):
+    with app.app_context():
+        partes = list(gerar_csv(COLUNAS_RESULTADOS, lotes_resultados(tamanho_lote=10)))
+        total = ResultadoTeste.query.count()
+    
+    # Cabeçalho + um pedaço por lote lido do cursor
+    assert len(partes) == 1 + -(-total // 10)
+    assert sum(parte.count('\r\n') for parte in partes) == total + 1
+
+def test_parquet_em_row_groups(app, client):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with app.app_context():
+        total = ResultadoTeste.query.count()
+        conteudo = b''.join(gerar_parquet(COLUNAS_RESULTADOS, lotes_resultados(tamanho_lote=25)))
+    
+    arquivo = pq.ParquetFile(io.BytesIO(conteudo))
+    assert arquivo.metadata.num_rows == total
+    assert arquivo.num_row_groups == -(-total // 25)
+    
+    resposta = client.get('/api/export/resultados?formato=parquet')
+    assert resposta.status_code == 200
+    tabela = pq.read_table(io.BytesIO(resposta.data))
+    assert tabela.num_rows == total
+    assert str(tabela.schema.field('data_execucao').type) == 'timestamp[us]'
+
+def test_arrow_stream_de_execucoes(client):
+    ipc = pytest.importorskip('pyarrow.ipc')
+    inicio = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    
+    resposta = client.get(f'/api/export/execucoes?formato=arrow&inicio={inicio}')
+    assert resposta.status_code == 200
+    tabela = ipc.open_stream(resposta.data).read_all()
+    with client.application.app_context():
+        assert tabela.num_rows == ExecucaoTeste.query.filter(ExecucaoTeste.data_criacao >= inicio).count()
+    assert tabela.column_names[-3:] == ['total_testes', 'testes_passaram', 'testes_falharam']
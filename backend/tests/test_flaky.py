@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes da Detecção de Testes Instáveis
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import sqlite3
+from app import criar_aplicacao
+from models import db, FlakinessTeste, SequenciaTeste
+
+def instantaneo(app):
+    """Contagens dos testes criados aqui (os dados de exemplo usam outros nomes)"""
+    with app.app_context():
+        return {
+            flaky.nome_teste: (flaky.comparacoes, flaky.transicoes, round(flaky.score, 4))
+            for flaky in FlakinessTeste.query if flaky.nome_teste.startswith('test_')
+        }
+
+def test_alternancias_no_mesmo_commit(client, criar_execucao_com_resultados):
+    """Só execuções do mesmo commit e ambiente são comparadas; ignorados não contam"""
+    for status in ('passou', 'falhou', 'passou', 'ignorado', 'passou'):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_instavel', 'status': status},
+            {'nome_teste': 'test_estavel', 'status': 'passou'}
+        ], commit_hash='abc123')
+    # Mudou de status entre commits diferentes: correção ou regressão, não instabilidade
+    criar_execucao_com_resultados([{'nome_teste': 'test_corrigido', 'status': 'falhou'}], commit_hash='abc123')
+    criar_execucao_com_resultados([{'nome_teste': 'test_corrigido', 'status': 'passou'}], commit_hash='def456')
+    criar_execucao_com_resultados([{'nome_teste': 'test_instavel', 'status': 'falhou'}],
+                                  commit_hash='abc123', ambiente='producao')
+    # Sem commit não há sequência: nada é comparado
+    for status in ('passou', 'falhou', 'passou'):
+        criar_execucao_com_resultados([{'nome_teste': 'test_sem_commit', 'status': status}])
+    
+    assert instantaneo(client.application) == {
+        'test_instavel': (3, 2, 0.6667),
+        'test_estavel': (4, 0, 0.0)
+    }
+
+def test_score_separado_por_tipo_e_ambiente(client, criar_execucao_com_resultados):
+    """O mesmo nome em outro ambiente ou tipo tem sequência e score próprios"""
+    for ambiente, tipo, statuses in (
+        ('homologacao', 'unidade', ('passou', 'falhou', 'passou')),
+        ('producao', 'unidade', ('passou', 'passou', 'passou')),
+        ('homologacao', 'web', ('falhou', 'falhou'))
+    ):
+        for status in statuses:
+            criar_execucao_com_resultados([{'nome_teste': 'test_compartilhado', 'status': status}],
+                                          commit_hash='abc123', ambiente=ambiente, tipo=tipo)
+    
+    with client.application.app_context():
+        linhas = {
+            (flaky.tipo, flaky.ambiente): (flaky.comparacoes, flaky.transicoes)
+            for flaky in FlakinessTeste.query.filter_by(nome_teste='test_compartilhado')
+        }
+    assert linhas == {('unidade', 'homologacao'): (2, 2), ('unidade', 'producao'): (2, 0), ('web', 'homologacao'): (1, 0)}
+    
+    resposta = client.get('/api/analytics/flaky?ambiente=producao&min_comparacoes=1&min_score=0')
+    assert [(item['nome_teste'], item['ambiente']) for item in resposta.get_json()] == [('test_compartilhado', 'producao')]
+
+def test_reconstrucao_reproduz_a_ingestao(client, criar_execucao_com_resultados):
+    for indice, status in enumerate(('passou', 'falhou', 'falhou', 'passou')):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_a', 'status': status},
+            {'nome_teste': 'test_b', 'status': 'passou' if indice % 2 else 'falhou'},
+            {'nome_teste': 'test_c', 'status': 'passou'}
+        ], commit_hash='abc123')
+    criar_execucao_com_resultados([{'nome_teste': 'test_a', 'status': 'falhou'}])
+    
+    incremental = instantaneo(client.application)
+    assert incremental['test_b'] == (3, 3, 1.0)
+    with client.application.app_context():
+        FlakinessTeste.reconstruir(tamanho_lote=2)
+    assert instantaneo(client.application) == incremental
+
+def test_endpoint_ordena_por_score_com_paginacao(client, criar_execucao_com_resultados):
+    with client.application.app_context():
+        db.session.execute(db.delete(SequenciaTeste))
+        db.session.execute(db.delete(FlakinessTeste))
+        db.session.commit()
+    
+    for indice in range(6):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_sempre_alterna', 'status': 'passou' if indice % 2 else 'falhou'},
+            {'nome_teste': 'test_as_vezes', 'status': 'falhou' if indice == 3 else 'passou'},
+            {'nome_teste': 'test_estavel', 'status': 'passou'}
+        ], commit_hash='abc123')
+    criar_execucao_com_resultados([{'nome_teste': 'test_pouco_historico', 'status': 'falhou'}], commit_hash='abc123')
+    criar_execucao_com_resultados([{'nome_teste': 'test_pouco_historico', 'status': 'passou'}], commit_hash='abc123')
+    
+    resposta = client.get('/api/analytics/flaky?limite=1')
+    assert resposta.status_code == 200
+    assert [item['nome_teste'] for item in resposta.get_json()] == ['test_sempre_alterna']
+    assert resposta.get_json()[0]['score'] == 1.0
+    
+    segunda = client.get(f'/api/analytics/flaky?limite=1&cursor={resposta.headers["X-Next-Cursor"]}')
+    assert [item['nome_teste'] for item in segunda.get_json()] == ['test_as_vezes']
+    assert 'X-Next-Cursor' not in segunda.headers
+    
+    nomes = [item['nome_teste'] for item in client.get('/api/analytics/flaky?min_comparacoes=1').get_json()]
+    # Empate no score: o mais recente (maior id) primeiro
+    assert nomes == ['test_pouco_historico', 'test_sempre_alterna', 'test_as_vezes']
+    
+    assert client.get('/api/analytics/flaky?cursor=invalido').status_code == 400
+
+def test_migracao_separa_flakiness_global(client, caminho_banco, criar_execucao_com_resultados):
+    """Um banco com a chave global por nome_teste é recriado e reconstruído por (tipo, ambiente)"""
+    for ambiente in ('homologacao', 'producao'):
+        for status in ('passou', 'falhou', 'passou'):
+            criar_execucao_com_resultados([{'nome_teste': 'test_migrado', 'status': status}],
+                                          commit_hash='abc123', ambiente=ambiente)
+    with client.application.app_context():
+        esperado = {
+            (flaky.tipo, flaky.ambiente, flaky.nome_teste): flaky.transicoes for flaky in FlakinessTeste.query
+        }
+        db.engine.dispose()
+    assert esperado[('unidade', 'producao', 'test_migrado')] == 2
+    
+    # Voltar as tabelas ao esquema da versão 11
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.executescript('''
+        DROP TABLE flakiness_testes;
+        DROP TABLE sequencias_testes;
+        CREATE TABLE sequencias_testes (
+            id INTEGER PRIMARY KEY, nome_teste VARCHAR(200) NOT NULL, ambiente VARCHAR(50) NOT NULL,
+            commit_hash VARCHAR(40) NOT NULL, ultimo_status VARCHAR(20) NOT NULL,
+            ultima_execucao_id INTEGER, atualizado_em DATETIME,
+            CONSTRAINT uq_sequencias_testes_ambiente_commit_nome UNIQUE (ambiente, commit_hash, nome_teste)
+        );
+        CREATE TABLE flakiness_testes (
+            id INTEGER PRIMARY KEY, nome_teste VARCHAR(200) NOT NULL UNIQUE, comparacoes INTEGER NOT NULL,
+            transicoes INTEGER NOT NULL, score FLOAT NOT NULL, ultima_transicao DATETIME
+        );
+        INSERT INTO flakiness_testes VALUES (1, 'obsoleto', 1, 1, 1.0, NULL);
+        DELETE FROM versao_esquema WHERE versao >= 12;
+    ''')
+    conexao.close()
+    
+    configuracao = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}', 'AMOSTRADOR_ATIVO': False, 'EXECUTOR_ATIVO': False
+    }
+    with criar_aplicacao(configuracao).app_context():
+        migrado = {
+            (flaky.tipo, flaky.ambiente, flaky.nome_teste): flaky.transicoes for flaky in FlakinessTeste.query
+        }
+        db.engine.dispose()
+    assert migrado == esperado
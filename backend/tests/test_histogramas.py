@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes dos Histogramas de Duração
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import random
+from datetime import datetime, timedelta
+from histogramas import PRECISAO_RELATIVA, indice_bucket, quantis
+from models import db, ExecucaoTeste, HistogramaDuracao, contabilizar_criacao_execucao
+
+def criar_execucao_concluida(app, tipo, duracao, data_criacao=None):
+    with app.app_context():
+        execucao = ExecucaoTeste(
+            tipo=tipo, status='sucesso', duracao=duracao, ambiente='desenvolvimento',
+            data_criacao=data_criacao or datetime.utcnow()
+        )
+        db.session.add(execucao)
+        db.session.flush()
+        contabilizar_criacao_execucao(execucao)
+        db.session.commit()
+        return execucao.id
+
+def test_quantis_respeitam_a_precisao_relativa():
+    gerador = random.Random(42)
+    valores = sorted(gerador.lognormvariate(0, 1.5) for _ in range(20000))
+    
+    resumo = quantis(contar_buckets(valores).items())
+    
+    assert resumo['amostras'] == len(valores)
+    for percentil in (50, 90, 95, 99):
+        exato = valores[int(percentil / 100 * (len(valores) - 1))]
+        assert abs(resumo[f'p{percentil}'] - exato) <= PRECISAO_RELATIVA * exato + 0.001
+    assert quantis([]) is None
+
+def contar_buckets(valores):
+    contagens = {}
+    for valor in valores:
+        contagens[indice_bucket(valor)] = contagens.get(indice_bucket(valor), 0) + 1
+    return contagens
+
+def test_percentis_por_tipo_na_janela(client):
+    """Dias diferentes são combinados somando buckets; a janela exclui dias antigos"""
+    app = client.application
+    ontem = datetime.utcnow() - timedelta(days=1)
+    for duracao in range(1, 101):
+        criar_execucao_concluida(app, 'unidade', duracao, ontem if duracao % 2 else None)
+    criar_execucao_concluida(app, 'unidade', 10000, datetime.utcnow() - timedelta(days=60))
+    
+    metricas = client.get('/api/metricas/detalhadas').get_json()
+    percentis = metricas['percentis_duracao_por_tipo']['unidade']
+    assert metricas['janela_percentis_dias'] == 30
+    assert percentis['amostras'] == 100
+    assert abs(percentis['p50'] - 50) <= 0.5
+    assert abs(percentis['p99'] - 99) <= 1
+    
+    percentis = client.get('/api/metricas/detalhadas?dias=90').get_json()['percentis_duracao_por_tipo']['unidade']
+    assert percentis['amostras'] == 101
+    assert abs(percentis['p99'] - 100) <= 1
+
+def test_percentis_de_testes_e_reconstrucao(client):
+    app = client.application
+    with app.app_context():
+        execucao_id = ExecucaoTeste.query.first().id
+    resposta = client.post(f'/api/execucoes/{execucao_id}/resultados', json=[
+        {'nome_teste': 'test_cauda_longa', 'status': 'passou', 'tempo_execucao': 30.0 if indice == 99 else 1.0}
+        for indice in range(100)
+    ] + [{'nome_teste': 'test_cauda_longa', 'status': 'ignorado', 'tempo_execucao': 0}])
+    assert resposta.status_code == 201
+    
+    resposta = client.get('/api/metricas/detalhadas?teste=test_cauda_longa&teste=test_inexistente')
+    percentis = resposta.get_json()['percentis_testes']
+    assert set(percentis) == {'test_cauda_longa'}
+    assert percentis['test_cauda_longa']['amostras'] == 100
+    # Uma única execução lenta em 100 não chega ao p99
+    assert abs(percentis['test_cauda_longa']['p95'] - 1) <= 0.011
+    assert abs(percentis['test_cauda_longa']['p99'] - 1) <= 0.011
+    
+    with app.app_context():
+        def instantaneo():
+            return sorted(
+                (h.escopo, h.nome_teste, h.tipo, h.data, h.indice, h.contagem) for h in HistogramaDuracao.query
+            )
+        
+        incremental = instantaneo()
+        HistogramaDuracao.reconstruir(tamanho_lote=7)
+        assert instantaneo() == incremental
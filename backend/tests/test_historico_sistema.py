@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Histórico Consolidado do Sistema
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+from datetime import datetime, timedelta
+from models import MetricaSistema, MetricaSistemaAgregada
+
+def amostra(data_coleta, cpu):
+    """Amostra bruta com CPU variável e demais valores fixos"""
+    return {
+        'cpu_percent': cpu, 'memoria_percent': 50.0, 'disco_percent': 40.0,
+        'rede_bytes_enviados': 1000, 'rede_bytes_recebidos': 2000, 'data_coleta': data_coleta
+    }
+
+def test_consolidacao_minuto_e_hora(app):
+    """Amostras brutas viram intervalos de minuto e hora com min/média/máx"""
+    base = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    with app.app_context():
+        MetricaSistema.salvar_lote([
+            amostra(base + timedelta(seconds=15 * i), cpu=float(i % 4) * 10) for i in range(8)
+        ])
+        MetricaSistemaAgregada.consolidar_todas()
+        # Segunda execução só recalcula os intervalos recentes, sem duplicar
+        MetricaSistemaAgregada.consolidar_todas()
+        
+        minutos = MetricaSistemaAgregada.query.filter_by(resolucao=60).order_by(MetricaSistemaAgregada.inicio).all()
+        hora = MetricaSistemaAgregada.query.filter_by(resolucao=3600).one()
+    
+    assert [minuto.amostras for minuto in minutos] == [4, 4]
+    assert (minutos[0].cpu_min, minutos[0].cpu_media, minutos[0].cpu_max) == (0.0, 15.0, 30.0)
+    assert hora.inicio == base
+    assert hora.amostras == 8
+    assert hora.cpu_media == 15.0
+
+def test_retencao_por_nivel(app):
+    """Cada nível é podado de acordo com a retenção configurada"""
+    agora = datetime.utcnow()
+    with app.app_context():
+        MetricaSistema.salvar_lote([amostra(agora - timedelta(days=2), 10.0), amostra(agora, 20.0)])
+        MetricaSistemaAgregada.consolidar_todas()
+        removidos = MetricaSistemaAgregada.aplicar_retencao()
+        
+        assert removidos['bruto'] == 1
+        assert removidos['minuto'] == 0
+        assert MetricaSistema.query.count() == 1
+
+def test_historico_escolhe_nivel_pela_janela(app, client):
+    """A janela e max_pontos definem o nível lido pelo endpoint"""
+    with app.app_context():
+        MetricaSistema.salvar_lote([amostra(datetime.utcnow() - timedelta(minutes=5), 10.0)])
+        MetricaSistemaAgregada.consolidar_todas()
+    
+    assert client.get('/api/sistema/historico?horas=1&max_pontos=1000').headers['X-Resolucao'] == 'bruto'
+    assert client.get('/api/sistema/historico?horas=24&max_pontos=2000').headers['X-Resolucao'] == 'minuto'
+    
+    response = client.get('/api/sistema/historico?horas=720')
+    assert response.headers['X-Resolucao'] == 'hora'
+    assert response.get_json()[0]['resolucao'] == 3600
+    
+    assert client.get('/api/sistema/historico?resolucao=semana').status_code == 400
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes de Índices e Migrações
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+
+Verifica via EXPLAIN QUERY PLAN que os endpoints mais consultados não fazem
+varredura completa de tabela e que bancos antigos recebem os índices.
+"""
+
+import sqlite3
+import pytest
+from sqlalchemy import event
+from app import criar_aplicacao
+from models import db
+
+TABELAS_QUENTES = ('execucoes_teste', 'resultados_teste', 'metricas_sistema', 'metricas_sistema_agregadas')
+
+def capturar_consultas(app, client, url):
+    """Executa a requisição e retorna as consultas SELECT emitidas"""
+    consultas = []
+    
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        if sql.lstrip().upper().startswith('SELECT'):
+            consultas.append((sql, parametros))
+    
+    with app.app_context():
+        # Primário e engine de leitura (GETs vão para a réplica)
+        engines = set(db.engines.values())
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            response = client.get(url)
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', registrar)
+    
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return consultas
+
+def varreduras_completas(app, consultas):
+    """Retorna os passos do plano que percorrem uma tabela quente inteira"""
+    varreduras = []
+    with app.app_context():
+        with db.engine.connect() as conexao:
+            for sql, parametros in consultas:
+                plano = conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parametros).fetchall()
+                for passo in plano:
+                    detalhe = passo[-1]
+                    for tabela in TABELAS_QUENTES:
+                        if detalhe == f'SCAN {tabela}':
+                            varreduras.append((sql, detalhe))
+    return varreduras
+
+@pytest.mark.parametrize('url', [
+    '/api/execucoes',
+    '/api/execucoes?tipo=web&limite=5',
+    '/api/execucoes?status=sucesso',
+    '/api/execucoes/1',
+    '/api/execucoes/1/resultados',
+    '/api/relatorios/1',
+    '/api/sistema/historico?horas=24',
+    '/api/sistema/historico?horas=1&resolucao=bruto',
+    '/api/sistema/historico?horas=720&resolucao=minuto',
+])
+def test_endpoints_sem_varredura_completa(app, client, url):
+    """Nenhuma consulta do endpoint deve varrer uma tabela quente inteira"""
+    consultas = capturar_consultas(app, client, url)
+    assert consultas
+    assert varreduras_completas(app, consultas) == []
+
+def test_migracao_cria_indices_em_banco_existente(caminho_banco):
+    """Um banco criado antes dos índices é atualizado na inicialização"""
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.executescript('''
+        CREATE TABLE execucoes_teste (
+            id INTEGER PRIMARY KEY, tipo VARCHAR(50) NOT NULL, status VARCHAR(20) NOT NULL,
+            duracao INTEGER NOT NULL, ambiente VARCHAR(50) NOT NULL, observacoes TEXT,
+            data_criacao DATETIME, data_atualizacao DATETIME
+        );
+        CREATE TABLE resultados_teste (
+            id INTEGER PRIMARY KEY, execucao_id INTEGER NOT NULL REFERENCES execucoes_teste (id),
+            nome_teste VARCHAR(200) NOT NULL, status VARCHAR(20) NOT NULL, tempo_execucao FLOAT NOT NULL,
+            mensagem_erro TEXT, stack_trace TEXT, screenshot_path VARCHAR(500), data_execucao DATETIME
+        );
+        CREATE TABLE metricas_sistema (
+            id INTEGER PRIMARY KEY, cpu_percent FLOAT NOT NULL, memoria_percent FLOAT NOT NULL,
+            disco_percent FLOAT NOT NULL, rede_bytes_enviados BIGINT, rede_bytes_recebidos BIGINT,
+            data_coleta DATETIME
+        );
+    ''')
+    conexao.close()
+    
+    app = criar_aplicacao({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}'})
+    with app.app_context():
+        indices = {
+            nome for (nome,) in db.session.execute(
+                db.text("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'")
+            )
+        }
+        versao = db.session.execute(db.text('SELECT MAX(versao) FROM versao_esquema')).scalar()
+        db.engine.dispose()
+    
+    assert {
+        'ix_execucoes_teste_data_criacao',
+        'ix_execucoes_teste_tipo_data_criacao',
+        'ix_execucoes_teste_status_data_criacao',
+        'ix_resultados_teste_execucao_status',
+        'ix_metricas_sistema_data_coleta',
+    } <= indices
+    assert versao >= 1
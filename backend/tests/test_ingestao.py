@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes de Ingestão de Resultados em Lote
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import json
+from datetime import datetime
+from ingestao import inserir_resultados
+from models import db, ResultadoTeste
+
+def resultado(i, status='passou'):
+    return {'nome_teste': f'test_ingestao_{i}', 'status': status, 'tempo_execucao': 0.5}
+
+def contar(app, execucao_id=1):
+    with app.app_context():
+        return ResultadoTeste.query.filter_by(execucao_id=execucao_id).count()
+
+def test_ingestao_array_json(app, client):
+    """Um array JSON é validado e gravado, retornando as contagens"""
+    antes = contar(app)
+    payload = [resultado(i) for i in range(25)] + [{'nome_teste': 'sem status', 'tempo_execucao': 1}]
+    
+    response = client.post('/api/execucoes/1/resultados', json=payload)
+    
+    assert response.status_code == 201
+    dados = response.get_json()
+    assert (dados['inseridos'], dados['rejeitados']) == (25, 1)
+    assert dados['erros'][0]['indice'] == 25
+    assert contar(app) == antes + 25
+
+def test_ingestao_ndjson(app, client):
+    """Corpos NDJSON são lidos linha a linha"""
+    antes = contar(app)
+    corpo = '\n'.join(json.dumps(resultado(i, 'falhou')) for i in range(10)) + '\n{quebrado\n'
+    
+    response = client.post(
+        '/api/execucoes/1/resultados', data=corpo, content_type='application/x-ndjson'
+    )
+    
+    assert response.status_code == 201
+    assert (response.get_json()['inseridos'], response.get_json()['rejeitados']) == (10, 1)
+    assert contar(app) == antes + 10
+
+def test_ingestao_em_blocos_na_mesma_transacao(app):
+    """Blocos menores que o total são todos desfeitos por um rollback"""
+    antes = contar(app)
+    with app.app_context():
+        resumo = inserir_resultados(1, (resultado(i) for i in range(35)), tamanho_lote=10)
+        assert resumo['inseridos'] == 35
+        db.session.rollback()
+    assert contar(app) == antes
+
+def test_ingestao_corpo_invalido(client):
+    """Corpo que não é array nem NDJSON retorna 400"""
+    response = client.post('/api/execucoes/1/resultados', json={'nome_teste': 'x'})
+    assert response.status_code == 400
+    
+    response = client.post('/api/execucoes/999999/resultados', json=[{'nome_teste': 'x', 'status': 'passou'}])
+    assert response.status_code == 404
+
+def test_data_execucao_no_futuro_e_rejeitada(client):
+    resposta = client.post('/api/execucoes/1/resultados', json=[
+        {'nome_teste': 'test_futuro', 'status': 'passou', 'tempo_execucao': 1.0, 'data_execucao': '2099-01-01T00:00:00'},
+        {'nome_teste': 'test_fuso', 'status': 'passou', 'tempo_execucao': 1.0, 'data_execucao': '2024-05-01T10:00:00-03:00'}
+    ])
+    assert resposta.status_code == 201
+    resumo = resposta.get_json()
+    assert (resumo['inseridos'], resumo['rejeitados']) == (1, 1)
+    assert 'futuro' in resumo['erros'][0]['erro']
+    with client.application.app_context():
+        resultado = ResultadoTeste.query.filter_by(nome_teste='test_fuso').one()
+        assert resultado.data_execucao == datetime(2024, 5, 1, 13, 0)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes de Importação JUnit XML
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import io
+from junit import iterar_casos_junit
+from models import ExecucaoTeste, ResultadoTeste
+
+JUNIT_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="3" failures="1" skipped="1">
+    <testcase classname="test_api.TestAPI" name="test_health" time="0.25"/>
+    <testcase classname="test_api.TestAPI" name="test_metricas" time="1.5">
+      <failure message="assert 500 == 200">Traceback (most recent call last):
+AssertionError: assert 500 == 200</failure>
+    </testcase>
+    <testcase classname="test_web.TestWeb" name="test_login" time="0">
+      <skipped message="Chrome indisponível"/>
+    </testcase>
+  </testsuite>
+</testsuites>'''.encode('utf-8')
+
+def test_iterar_casos_junit():
+    """Cada <testcase> vira um resultado com status e mensagens mapeados"""
+    casos = list(iterar_casos_junit(io.BytesIO(JUNIT_XML)))
+    
+    assert [caso['status'] for caso in casos] == ['passou', 'falhou', 'ignorado']
+    assert casos[0]['nome_teste'] == 'test_api.TestAPI::test_health'
+    assert casos[1]['mensagem_erro'] == 'assert 500 == 200'
+    assert 'AssertionError' in casos[1]['stack_trace']
+    assert casos[2]['mensagem_erro'] == 'Chrome indisponível'
+
+def test_saidas_da_suite_sao_descartadas():
+    """<system-out>/<system-err> da suíte são descartados sem afetar os casos"""
+    xml = b'''<testsuite name="pytest">
+      <testcase name="test_a" time="0.1"><system-out>saida do caso</system-out></testcase>
+      <system-out>log inteiro da suite</system-out>
+      <system-err>avisos da suite</system-err>
+      <testcase name="test_b" time="0.2"/>
+    </testsuite>'''
+    casos = iterar_casos_junit(io.BytesIO(xml))
+    assert [caso['nome_teste'] for caso in casos] == ['test_a', 'test_b']
+
+def test_endpoint_importa_junit(app, client):
+    """O endpoint cria a execução e grava os resultados"""
+    response = client.post(
+        '/api/execucoes/junit?tipo=api', data=JUNIT_XML, content_type='application/xml'
+    )
+    
+    assert response.status_code == 201
+    resumo = response.get_json()
+    assert resumo['inseridos'] == 3
+    assert resumo['status'] == 'falha'
+    with app.app_context():
+        execucao = ExecucaoTeste.query.get(resumo['execucao_id'])
+        assert execucao.tipo == 'api'
+        assert ResultadoTeste.query.filter_by(execucao_id=execucao.id).count() == 3
+
+def test_endpoint_junit_invalido(client):
+    """XML malformado retorna 400"""
+    response = client.post('/api/execucoes/junit', data=b'<testsuite>', content_type='application/xml')
+    assert response.status_code == 400
+
+def test_endpoint_junit_recusa_entidades(client):
+    """Expansão de entidades (billion laughs) é recusada com 400"""
+    xml = b'''<?xml version="1.0"?>
+<!DOCTYPE lol [<!ENTITY lol "lol"><!ENTITY lol2 "&lol;&lol;&lol;&lol;&lol;&lol;&lol;&lol;">]>
+<testsuite><testcase name="&lol2;" time="0"/></testsuite>'''
+    response = client.post('/api/execucoes/junit', data=xml, content_type='application/xml')
+    assert response.status_code == 400
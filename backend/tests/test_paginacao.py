@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes de Paginação por Cursor
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+from test_indices import capturar_consultas, varreduras_completas
+
+def percorrer(client, url, extrair):
+    """Segue os cursores até o fim e retorna (ids, cursores usados)"""
+    ids, cursores, cursor = [], [], None
+    while True:
+        separador = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separador}cursor={cursor}' if cursor else url)
+        assert response.status_code == 200
+        pagina, cursor = extrair(response)
+        ids.extend(item['id'] for item in pagina)
+        if not cursor:
+            return ids, cursores
+        cursores.append(cursor)
+
+def test_execucoes_paginadas_sem_repeticao(client):
+    """Percorrer todas as páginas retorna cada execução uma única vez, em ordem"""
+    todas = client.get('/api/execucoes?limite=1000').get_json()
+    ids, cursores = percorrer(
+        client, '/api/execucoes?limite=3',
+        lambda response: (response.get_json(), response.headers.get('X-Next-Cursor'))
+    )
+    
+    assert cursores
+    assert ids == [execucao['id'] for execucao in todas]
+
+def test_resultados_paginados_sem_repeticao(client):
+    """Resultados de uma execução são paginados pelo campo next_cursor"""
+    completos = client.get('/api/execucoes/1/resultados').get_json()['resultados']
+    ids, cursores = percorrer(
+        client, '/api/execucoes/1/resultados?limite=2',
+        lambda response: (response.get_json()['resultados'], response.get_json()['next_cursor'])
+    )
+    
+    assert cursores
+    assert ids == sorted(resultado['id'] for resultado in completos)
+
+def test_paginas_seguintes_usam_indice(app, client):
+    """As consultas com cursor não devem varrer a tabela inteira"""
+    cursor = client.get('/api/execucoes?limite=2').headers['X-Next-Cursor']
+    for url in (f'/api/execucoes?limite=2&cursor={cursor}', f'/api/execucoes?tipo=web&cursor={cursor}'):
+        assert varreduras_completas(app, capturar_consultas(app, client, url)) == []
+    
+    cursor = client.get('/api/execucoes/1/resultados?limite=1').get_json()['next_cursor']
+    url = f'/api/execucoes/1/resultados?limite=1&cursor={cursor}'
+    assert varreduras_completas(app, capturar_consultas(app, client, url)) == []
+
+def test_cursor_invalido(client):
+    """Cursor malformado retorna 400"""
+    response = client.get('/api/execucoes?cursor=nao-e-um-cursor')
+    assert response.status_code == 400
+    assert 'erro' in response.get_json()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Planejamento de Shards
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from app import criar_aplicacao
+from models import db, EstatisticaTeste, EpocaDecaimento, EPOCA_DECAIMENTO
+from planejamento import distribuir_lpt, planejar_shards
+
+def test_distribuir_lpt_equilibra_as_cargas():
+    shards = distribuir_lpt({'a': 7, 'b': 5, 'c': 4, 'd': 3, 'e': 3, 'f': 2}, 2)
+    assert [carga for carga, _ in shards] == [12, 12]
+    assert shards[0][1] == ['a', 'd', 'f']
+
+def test_estatisticas_incrementais_e_reconstrucao(client, criar_execucao_com_resultados):
+    """A ingestão atualiza as estatísticas e o backfill chega ao mesmo resultado"""
+    for tempo in (2.0, 4.0):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_lento', 'status': 'passou', 'tempo_execucao': tempo},
+            {'nome_teste': 'test_pulado', 'status': 'ignorado', 'tempo_execucao': 0}
+        ])
+    
+    with client.application.app_context():
+        def instantaneo():
+            return {
+                estatistica.nome_teste: (estatistica.execucoes, estatistica.execucoes_cronometradas, estatistica.tempo_medio)
+                for estatistica in EstatisticaTeste.query.filter_by(tipo='unidade')
+            }
+        
+        incremental = instantaneo()
+        assert incremental == {'test_lento': (2, 2, 3.0), 'test_pulado': (2, 0, None)}
+        
+        EstatisticaTeste.reconstruir()
+        assert instantaneo() == incremental
+
+def test_endpoint_planeja_com_estimativa_para_desconhecidos(client, criar_execucao_com_resultados):
+    criar_execucao_com_resultados([
+        {'nome_teste': f'test_{indice}', 'status': 'passou', 'tempo_execucao': float(indice)}
+        for indice in range(1, 10)
+    ])
+    
+    plano = client.get('/api/planejamento/shards?tipo=unidade&n=3').get_json()
+    assert plano['total_testes'] == 9
+    assert plano['duracao_total'] == 45
+    # LPT é uma aproximação: 16 contra o ótimo de 15 neste caso
+    assert (plano['limite_inferior'], plano['makespan_previsto']) == (15, 16)
+    assert sum(shard['quantidade'] for shard in plano['shards']) == 9
+    
+    plano = client.post('/api/planejamento/shards', json={
+        'tipo': 'unidade', 'n': 2, 'testes': ['test_9', 'test_novo']
+    }).get_json()
+    assert plano['testes_estimados'] == 1
+    assert plano['estimativa_desconhecidos'] == 5
+    assert [shard['testes'] for shard in plano['shards']] == [['test_9'], ['test_novo']]
+    
+    assert client.get('/api/planejamento/shards?tipo=unidade&n=0').status_code == 400
+    assert client.get('/api/planejamento/shards?n=2').status_code == 400
+    assert client.post('/api/planejamento/shards', json={'tipo': 'unidade', 'n': 2}).status_code == 400
+
+def test_planejamento_de_50_mil_testes(app):
+    """Com as durações em cache, planejar 50k testes leva milissegundos"""
+    with app.app_context():
+        db.session.execute(db.insert(EstatisticaTeste), [
+            {'tipo': 'massivo', 'nome_teste': f'test_{indice}', 'execucoes': 1,
+             'execucoes_cronometradas': 1, 'tempo_total': (indice % 97) / 10}
+            for indice in range(50000)
+        ])
+        db.session.commit()
+        
+        planejar_shards('massivo', 8)
+        inicio = time.perf_counter()
+        plano = planejar_shards('massivo', 8, [f'test_{indice}' for indice in range(50000)])
+        decorrido = time.perf_counter() - inicio
+    
+    assert plano['total_testes'] == 50000
+    assert plano['makespan_previsto'] - plano['limite_inferior'] < 10
+    assert decorrido < 1
+
+def test_prioridade_pondera_recencia_e_duracao(client, criar_execucao_com_resultados):
+    """Falhas recentes pesam mais que antigas; com a mesma chance, o mais rápido vem antes"""
+    antigo = (datetime.utcnow() - timedelta(days=120)).isoformat()
+    for _ in range(5):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_falhava', 'status': 'falhou', 'tempo_execucao': 1.0, 'data_execucao': antigo},
+            {'nome_teste': 'test_estavel', 'status': 'passou', 'tempo_execucao': 1.0, 'data_execucao': antigo}
+        ])
+    for status in ('passou', 'falhou'):
+        criar_execucao_com_resultados([
+            {'nome_teste': 'test_falhava', 'status': 'passou', 'tempo_execucao': 1.0},
+            {'nome_teste': 'test_quebrou', 'status': status, 'tempo_execucao': 1.0},
+            {'nome_teste': 'test_quebrou_lento', 'status': status, 'tempo_execucao': 10.0},
+            {'nome_teste': 'test_estavel', 'status': 'passou', 'tempo_execucao': 1.0}
+        ])
+    
+    ordem = client.post('/api/planejamento/prioridade', json={
+        'tipo': 'unidade',
+        'testes': ['test_estavel', 'test_falhava', 'test_quebrou_lento', 'test_quebrou', 'test_novo']
+    }).get_json()
+    
+    nomes = [item['nome_teste'] for item in ordem['testes']]
+    assert nomes.index('test_quebrou') < nomes.index('test_quebrou_lento')
+    assert nomes.index('test_quebrou') < nomes.index('test_falhava') < nomes.index('test_estavel')
+    probabilidades = {item['nome_teste']: item['probabilidade_falha'] for item in ordem['testes']}
+    assert probabilidades['test_falhava'] < probabilidades['test_quebrou']
+    assert ordem['testes_sem_historico'] == 1
+    assert ordem['tempo_esperado_primeira_falha']['priorizado'] < ordem['tempo_esperado_primeira_falha']['ordem_original']
+    
+    assert client.post('/api/planejamento/prioridade', json={'tipo': 'unidade'}).status_code == 400
+
+def test_epoca_antiga_e_avancada_sem_overflow(client, criar_execucao_com_resultados):
+    """Pesos perto do limite do float são reescalados; a taxa ponderada não muda"""
+    criar_execucao_com_resultados([
+        {'nome_teste': 'test_epoca', 'status': status, 'tempo_execucao': 1.0} for status in ('falhou', 'passou', 'passou')
+    ])
+    with client.application.app_context():
+        taxa = EstatisticaTeste.query.filter_by(nome_teste='test_epoca').one().taxa_falha_recente
+        # Simula 30 anos desde a época (acima de LIMITE_EPOCA_DIAS)
+        EpocaDecaimento.definir(EPOCA_DECAIMENTO.replace(year=datetime.utcnow().year - 30))
+        db.session.commit()
+    
+    criar_execucao_com_resultados([{'nome_teste': 'test_outro', 'status': 'passou', 'tempo_execucao': 1.0}])
+    with client.application.app_context():
+        assert EpocaDecaimento.atual() == datetime.utcnow().date()
+        estatistica = EstatisticaTeste.query.filter_by(nome_teste='test_epoca').one()
+        assert abs(estatistica.taxa_falha_recente - taxa) < 1e-9
+        assert EstatisticaTeste.query.filter_by(nome_teste='test_outro').one().peso_execucoes == 1.0
+    
+    resposta = client.post('/api/planejamento/prioridade', json={'tipo': 'unidade', 'testes': ['test_epoca']})
+    assert resposta.status_code == 200
+
+def test_migracao_adiciona_pesos_de_falha(caminho_banco):
+    """Um banco com a tabela de estatísticas anterior ganha as colunas e é reconstruído"""
+    configuracao = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho_banco}', 'AMOSTRADOR_ATIVO': False}
+    with criar_aplicacao(configuracao).app_context():
+        db.engine.dispose()
+    
+    # Voltar a tabela ao esquema da versão 2
+    conexao = sqlite3.connect(caminho_banco)
+    conexao.executescript('''
+        DROP TABLE estatisticas_testes;
+        CREATE TABLE estatisticas_testes (
+            id INTEGER PRIMARY KEY, tipo VARCHAR(50) NOT NULL, nome_teste VARCHAR(200) NOT NULL,
+            execucoes INTEGER NOT NULL, execucoes_cronometradas INTEGER NOT NULL,
+            tempo_total FLOAT NOT NULL, ultima_execucao DATETIME,
+            CONSTRAINT uq_estatisticas_testes_tipo_nome UNIQUE (tipo, nome_teste)
+        );
+        INSERT INTO estatisticas_testes VALUES (1, 'web', 'obsoleto', 1, 1, 1.0, NULL);
+        DELETE FROM versao_esquema WHERE versao >= 3;
+    ''')
+    conexao.close()
+    
+    app = criar_aplicacao(configuracao)
+    with app.app_context():
+        estatisticas = EstatisticaTeste.query.all()
+        assert estatisticas
+        assert all(estatistica.nome_teste != 'obsoleto' for estatistica in estatisticas)
+        assert sum(estatistica.peso_execucoes for estatistica in estatisticas) > 0
+        db.engine.dispose()
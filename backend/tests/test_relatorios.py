@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Cache de Relatórios
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import gzip
+import json
+from models import db, ExecucaoTeste, RelatorioExecucao
+
+def criar_execucao(client, status, quantidade=3):
+    with client.application.app_context():
+        execucao = ExecucaoTeste(tipo='api', status=status, duracao=60, ambiente='homologacao')
+        db.session.add(execucao)
+        db.session.commit()
+        execucao_id = execucao.id
+    adicionar_resultados(client, execucao_id, quantidade)
+    return execucao_id
+
+def adicionar_resultados(client, execucao_id, quantidade):
+    resposta = client.post(f'/api/execucoes/{execucao_id}/resultados', json=[
+        {'nome_teste': f'test_caso_{indice}', 'status': 'passou', 'tempo_execucao': 0.2}
+        for indice in range(quantidade)
+    ])
+    assert resposta.status_code == 201
+
+def test_execucao_finalizada_usa_cache_com_etag_forte(client):
+    execucao_id = criar_execucao(client, 'sucesso')
+    url = f'/api/relatorios/{execucao_id}'
+    
+    primeiro = client.get(url)
+    assert primeiro.status_code == 200
+    relatorio = primeiro.get_json()
+    assert relatorio['estatisticas']['total_testes'] == len(relatorio['resultados']) == 3
+    assert 'immutable' in primeiro.headers['Cache-Control']
+    etag = primeiro.headers['ETag']
+    assert not etag.startswith('W/')
+    
+    # Gerado uma vez: a segunda chamada devolve os mesmos bytes
+    assert client.get(url).data == primeiro.data
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    with client.application.app_context():
+        assert RelatorioExecucao.query.filter_by(execucao_id=execucao_id).count() == 1
+
+def test_cliente_com_gzip_recebe_o_conteudo_comprimido(client):
+    execucao_id = criar_execucao(client, 'falha')
+    url = f'/api/relatorios/{execucao_id}'
+    
+    comprimido = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert comprimido.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in comprimido.headers['Vary']
+    assert json.loads(gzip.decompress(comprimido.data)) == client.get(url).get_json()
+    
+    assert client.get(url, headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': comprimido.headers['ETag']
+    }).status_code == 304
+
+def test_novos_resultados_invalidam_o_cache(client):
+    execucao_id = criar_execucao(client, 'sucesso')
+    url = f'/api/relatorios/{execucao_id}'
+    antes = client.get(url)
+    
+    adicionar_resultados(client, execucao_id, 2)
+    with client.application.app_context():
+        assert not db.session.get(RelatorioExecucao, execucao_id)
+    
+    depois = client.get(url, headers={'If-None-Match': antes.headers['ETag']})
+    assert depois.status_code == 200
+    assert depois.get_json()['estatisticas']['total_testes'] == 5
+    assert depois.headers['ETag'] != antes.headers['ETag']
+
+def test_execucao_em_andamento_nao_e_cacheada(client):
+    execucao_id = criar_execucao(client, 'executando')
+    
+    resposta = client.get(f'/api/relatorios/{execucao_id}')
+    assert resposta.status_code == 200
+    assert 'immutable' not in resposta.headers.get('Cache-Control', '')
+    with client.application.app_context():
+        assert not db.session.get(RelatorioExecucao, execucao_id)
+    
+    assert client.get('/api/relatorios/999999').status_code == 404
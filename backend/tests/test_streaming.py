@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes de Streaming NDJSON
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import json
+
+def ler_ndjson(response):
+    """Converte o corpo NDJSON em lista de objetos"""
+    return [json.loads(linha) for linha in response.get_data(as_text=True).splitlines() if linha]
+
+def test_resultados_ndjson_por_accept(client):
+    """Accept: application/x-ndjson devolve um resultado por linha"""
+    esperados = client.get('/api/execucoes/1/resultados').get_json()['resultados']
+    response = client.get('/api/execucoes/1/resultados', headers={'Accept': 'application/x-ndjson'})
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    assert ler_ndjson(response) == esperados
+
+def test_relatorio_ndjson_com_cabecalho(client):
+    """O relatório em streaming começa pelo cabeçalho com as estatísticas"""
+    relatorio = client.get('/api/relatorios/1').get_json()
+    linhas = ler_ndjson(client.get('/api/relatorios/1?stream=1'))
+    
+    assert linhas[0]['estatisticas'] == relatorio['estatisticas']
+    assert linhas[0]['execucao']['id'] == 1
+    assert linhas[1:] == relatorio['resultados']
+    assert relatorio['estatisticas']['total_testes'] == len(relatorio['resultados'])
+
+def test_historico_ndjson(client):
+    """O histórico do sistema também pode ser transmitido em NDJSON"""
+    response = client.get('/api/sistema/historico?stream=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
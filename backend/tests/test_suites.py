@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QA Test Automation Dashboard - Testes do Executor de Suítes pytest
+Desenvolvido por Isabella Barbosa - Engenheira de QA Sênior
+"""
+
+import threading
+import time
+from models import db, ExecucaoTeste, ResultadoTeste
+from ingestao import inserir_resultados
+from suites import ExecutorSuites
+
+SUITE_EXEMPLO = '''
+import pytest
+
+@pytest.mark.parametrize('numero', range(4))
+def test_passa(numero):
+    assert numero >= 0
+
+def test_falha():
+    assert 1 == 2, 'valor inesperado'
+
+@pytest.mark.skip(reason='não se aplica')
+def test_ignorado():
+    pass
+'''
+
+SUITE_LENTA = '''
+import time
+
+def test_demorado():
+    time.sleep(30)
+'''
+
+# Só os shards (processos com a execução no ambiente) terminam com erro interno
+CONFTEST_ERRO_SHARD = '''
+import os
+import sys
+
+def pytest_sessionfinish(session, exitstatus):
+    if os.environ.get('QA_DASHBOARD_EXECUCAO_ID'):
+        print('plugin interno quebrou no shard', file=sys.stderr)
+        session.exitstatus = 3
+'''
+
+def criar_execucao(tipo):
+    execucao = ExecucaoTeste(tipo=tipo, status='executando', duracao=0, ambiente='desenvolvimento')
+    db.session.add(execucao)
+    db.session.commit()
+    return execucao.id
+
+def test_executa_suite_em_shards_e_grava_resultados(app, tmp_path):
+    """Cada teste vira um ResultadoTeste e a execução recebe o status final"""
+    (tmp_path / 'test_exemplo.py').write_text(SUITE_EXEMPLO, encoding='utf-8')
+    tarefa = ExecutorSuites(suites={'unidade': ['test_exemplo.py']}, processos=3, raiz=str(tmp_path))
+    
+    with app.app_context():
+        execucao_id = criar_execucao('unidade')
+        assert len(tarefa.coletar('unidade')) == 6
+        
+        tarefa(execucao_id)
+        
+        resultados = {r.nome_teste: r for r in ResultadoTeste.query.filter_by(execucao_id=execucao_id)}
+        assert len(resultados) == 6
+        assert resultados['test_exemplo.py::test_passa[2]'].status == 'passou'
+        assert resultados['test_exemplo.py::test_ignorado'].status == 'ignorado'
+        falha = resultados['test_exemplo.py::test_falha']
+        assert falha.status == 'falhou'
+        assert 'valor inesperado' in falha.mensagem_erro
+        assert 'assert 1 == 2' in falha.stack_trace
+        
+        assert db.session.get(ExecucaoTeste, execucao_id).status == 'falha'
+
+def test_testes_com_falhas_recentes_rodam_primeiro(app, tmp_path):
+    """Com histórico, a ordem do shard segue a prioridade e não a do arquivo"""
+    (tmp_path / 'test_exemplo.py').write_text(SUITE_EXEMPLO, encoding='utf-8')
+    tarefa = ExecutorSuites(suites={'unidade': ['test_exemplo.py']}, processos=1, raiz=str(tmp_path))
+    
+    with app.app_context():
+        anterior = criar_execucao('unidade')
+        inserir_resultados(anterior, [
+            {'nome_teste': nome, 'status': 'falhou' if nome.endswith('[3]') else 'passou', 'tempo_execucao': 0.1}
+            for nome in tarefa.coletar('unidade')
+        ])
+        db.session.commit()
+        
+        execucao_id = criar_execucao('unidade')
+        tarefa(execucao_id)
+        
+        primeiro = ResultadoTeste.query.filter_by(execucao_id=execucao_id).order_by(ResultadoTeste.id).first()
+        assert primeiro.nome_teste == 'test_exemplo.py::test_passa[3]'
+
+def test_erro_do_pytest_no_shard_vai_para_as_observacoes(app, tmp_path):
+    (tmp_path / 'test_exemplo.py').write_text(SUITE_EXEMPLO, encoding='utf-8')
+    (tmp_path / 'conftest.py').write_text(CONFTEST_ERRO_SHARD, encoding='utf-8')
+    tarefa = ExecutorSuites(suites={'unidade': ['test_exemplo.py']}, processos=1, raiz=str(tmp_path))
+    
+    with app.app_context():
+        execucao_id = criar_execucao('unidade')
+        tarefa(execucao_id)
+        
+        execucao = db.session.get(ExecucaoTeste, execucao_id)
+        assert execucao.status == 'falha'
+        assert 'Shard 1 terminou com código 3' in execucao.observacoes
+        assert 'plugin interno quebrou no shard' in execucao.observacoes
+        # Node ids chegaram pelo arquivo de argumentos
+        assert ResultadoTeste.query.filter_by(execucao_id=execucao_id).count() == 6
+
+def test_tipo_sem_suite_falha_com_observacao(app, tmp_path):
+    with app.app_context():
+        execucao_id = criar_execucao('performance')
+        ExecutorSuites(suites={}, raiz=str(tmp_path))(execucao_id)
+        
+        execucao = db.session.get(ExecucaoTeste, execucao_id)
+        assert execucao.status == 'falha'
+        assert "Nenhuma suíte pytest configurada para o tipo 'performance'" in execucao.observacoes
+
+def test_cancelamento_interrompe_os_processos(app, tmp_path):
+    (tmp_path / 'test_lento.py').write_text(SUITE_LENTA, encoding='utf-8')
+    tarefa = ExecutorSuites(suites={'lento': ['test_lento.py']}, processos=1, raiz=str(tmp_path))
+    cancelado = threading.Event()
+    threading.Timer(1.0, cancelado.set).start()
+    
+    with app.app_context():
+        execucao_id = criar_execucao('lento')
+        inicio = time.monotonic()
+        tarefa(execucao_id, cancelado=cancelado)
+        
+        assert time.monotonic() - inicio < 10
+        assert db.session.get(ExecucaoTeste, execucao_id).status == 'cancelado'